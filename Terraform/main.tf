@@ -8,6 +8,12 @@ module "dynamodb" {
   ttl_attribute_name = "expiresAt"
 }
 
+module "sqs" {
+  source       = "./modules/sqs"
+  project_name = var.project_name
+  tags         = var.tags
+}
+
 module "iam" {
   source       = "./modules/iam"
   project_name = var.project_name
@@ -16,6 +22,16 @@ module "iam" {
   urls_table_arn   = module.dynamodb.urls_table_arn
   clicks_table_arn = module.dynamodb.clicks_table_arn
   trends_table_arn = module.dynamodb.trends_table_arn
+  click_queue_arn  = module.sqs.click_queue_arn
+
+  click_rollups_table_arn = module.dynamodb.click_rollups_table_arn
+  counters_table_arn      = module.dynamodb.counters_table_arn
+  url_hashes_table_arn    = module.dynamodb.url_hashes_table_arn
+  category_cache_table_arn = module.dynamodb.category_cache_table_arn
+  click_counters_table_arn = module.dynamodb.click_counters_table_arn
+
+  hotlinks_kvs_arn     = module.edge.kvs_arn
+  edge_logs_bucket_arn = module.edge.log_bucket_arn
 }
 
 module "lambda" {
@@ -27,19 +43,32 @@ module "lambda" {
   urls_table_name   = module.dynamodb.urls_table_name
   clicks_table_name = module.dynamodb.clicks_table_name
   trends_table_name = module.dynamodb.trends_table_name
+  click_rollups_table_name = module.dynamodb.click_rollups_table_name
+  counters_table_name = module.dynamodb.counters_table_name
+  url_hashes_table_name = module.dynamodb.url_hashes_table_name
+  category_cache_table_name = module.dynamodb.category_cache_table_name
+  click_counters_table_name = module.dynamodb.click_counters_table_name
   BASE_URL = var.BASE_URL
 
+  click_queue_url = module.sqs.click_queue_url
+  click_queue_arn = module.sqs.click_queue_arn
+
   shorten_zip_path  = "${path.module}/../lambda/shorten/shorten.zip"
   redirect_zip_path = "${path.module}/../lambda/redirect/redirect.zip"
+  common_layer_zip_path = "${path.module}/../lambda/common/common_layer.zip"
+  click_consumer_zip_path = "${path.module}/../lambda/click_consumer/click_consumer.zip"
   stats_zip_path    = "${path.module}/../lambda/stats/stats.zip"
   analyze_zip_path  = "${path.module}/../lambda/analyze/analyze.zip"
   trends_latest_zip_path = "${path.module}/../lambda/trends_latest/trends_latest.zip"
   categorize_zip_path = "${path.module}/../lambda/categorize/categorize.zip"
+  hotlinks_zip_path   = "${path.module}/../lambda/hotlinks/hotlinks.zip"
+
+  hotlinks_kvs_arn = module.edge.kvs_arn
 
 
   openai_api_key    = var.openai_api_key
 
-  depends_on = [module.dynamodb, module.iam]
+  depends_on = [module.dynamodb, module.iam, module.sqs]
 }
 
 module "apigw" {
@@ -76,10 +105,12 @@ module "monitoring" {
   lambda_function_names = [
     module.lambda.shorten_function_name,
     module.lambda.redirect_function_name,
+    module.lambda.click_consumer_function_name,
     module.lambda.stats_function_name,
     module.lambda.analyze_function_name,
     module.lambda.trends_latest_function_name,
-    module.lambda.categorize_function_name
+    module.lambda.categorize_function_name,
+    module.lambda.hotlinks_function_name
   ]
 
   api_gateway_id    = module.apigw.api_id
@@ -103,9 +134,22 @@ module "scheduler" {
   categorize_lambda_function_name  = module.lambda.categorize_function_name
   categorize_lambda_function_arn   = module.lambda.categorize_function_arn
 
+  hotlinks_lambda_function_name    = module.lambda.hotlinks_function_name
+  hotlinks_lambda_function_arn     = module.lambda.hotlinks_function_arn
+
   depends_on = [module.lambda]
 }
 
+# 인기 링크 edge 리다이렉트 (KeyValueStore + CloudFront Function + 로그 버킷)
+module "edge" {
+  source       = "./modules/edge"
+  project_name = var.project_name
+  tags         = var.tags
+
+  hotlinks_function_name = module.lambda.hotlinks_function_name
+  hotlinks_function_arn  = module.lambda.hotlinks_function_arn
+}
+
 
 module "cloudfront" {
   source             = "./modules/cloudfront"
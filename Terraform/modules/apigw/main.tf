@@ -58,6 +58,13 @@ resource "aws_apigatewayv2_route" "shorten" {
   target    = "integrations/${aws_apigatewayv2_integration.shorten.id}"
 }
 
+# -------- Shorten batch (POST /shorten/batch) --------
+resource "aws_apigatewayv2_route" "shorten_batch" {
+  api_id    = aws_apigatewayv2_api.api.id
+  route_key = "POST /shorten/batch"
+  target    = "integrations/${aws_apigatewayv2_integration.shorten.id}"
+}
+
 # -------- Redirect (GET /{shortId}) --------
 resource "aws_apigatewayv2_integration" "redirect" {
   api_id             = aws_apigatewayv2_api.api.id
@@ -8,6 +8,25 @@ resource "aws_dynamodb_table" "urls" {
     type = "S"
   }
 
+  # categorize 대기열: categoryStatus가 있는 항목만 인덱싱되는 sparse GSI
+  attribute {
+    name = "categoryStatus"
+    type = "S"
+  }
+
+  attribute {
+    name = "createdAt"
+    type = "S"
+  }
+
+  global_secondary_index {
+    name               = "byCategoryStatus"
+    hash_key           = "categoryStatus"
+    range_key          = "createdAt"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["originalUrl", "title"]
+  }
+
   dynamic "ttl" {
     for_each = var.enable_ttl ? [1] : []
     content {
@@ -37,6 +56,20 @@ resource "aws_dynamodb_table" "clicks" {
     type = "S"
   }
 
+  # analyze 증분 집계: 시간 버킷별로 워터마크 이후 클릭만 조회
+  attribute {
+    name = "hourBucket"
+    type = "S"
+  }
+
+  global_secondary_index {
+    name               = "byHour"
+    hash_key           = "hourBucket"
+    range_key          = "timestamp"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["referer"]
+  }
+
   tags = merge(var.tags, {
     Name = "${var.project_name}-clicks"
   })
@@ -60,4 +93,108 @@ resource "aws_dynamodb_table" "trends" {
   tags = merge(var.tags, {
     Name = "${var.project_name}-trends"
   })
-}
\ No newline at end of file
+}
+
+# 시간/일 버킷 클릭 집계 (click_consumer 갱신, analyze 조회)
+resource "aws_dynamodb_table" "click_rollups" {
+  name         = "${var.project_name}-click-rollups"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "bucket"
+
+  attribute {
+    name = "bucket"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-click-rollups"
+  })
+}
+
+# shortId 발급용 카운터 (shorten이 블록 단위로 임대)
+resource "aws_dynamodb_table" "counters" {
+  name         = "${var.project_name}-counters"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "name"
+
+  attribute {
+    name = "name"
+    type = "S"
+  }
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-counters"
+  })
+}
+
+# 같은 originalUrl 재사용 (정규화 URL 해시 → shortId)
+resource "aws_dynamodb_table" "url_hashes" {
+  name         = "${var.project_name}-url-hashes"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "urlHash"
+
+  attribute {
+    name = "urlHash"
+    type = "S"
+  }
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-url-hashes"
+  })
+}
+
+# 쓰기가 몰리는 shortId의 clickCount 샤드 (urls.counterShards 로 승격된 링크만 사용)
+resource "aws_dynamodb_table" "click_counters" {
+  name         = "${var.project_name}-click-counters"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "shortId"
+  range_key    = "shard"
+
+  attribute {
+    name = "shortId"
+    type = "S"
+  }
+
+  attribute {
+    name = "shard"
+    type = "N"
+  }
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-click-counters"
+  })
+}
+
+# categorize LLM 판정 캐시 (host / host+path prefix 단위 득표 누적)
+resource "aws_dynamodb_table" "category_cache" {
+  name         = "${var.project_name}-category-cache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "pattern"
+
+  attribute {
+    name = "pattern"
+    type = "S"
+  }
+
+  # learned 룰로 승격된 host만 인덱싱되는 sparse GSI
+  attribute {
+    name = "learned"
+    type = "S"
+  }
+
+  global_secondary_index {
+    name               = "byLearned"
+    hash_key           = "learned"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["learnedCategory", "learnedConfidence", "learnedAt"]
+  }
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-category-cache"
+  })
+}
@@ -20,4 +20,44 @@ output "trends_table_name" {
 
 output "trends_table_arn"  { 
   value = aws_dynamodb_table.trends.arn 
-}
\ No newline at end of file
+}
+
+output "click_rollups_table_name" {
+  value = aws_dynamodb_table.click_rollups.name
+}
+
+output "click_rollups_table_arn" {
+  value = aws_dynamodb_table.click_rollups.arn
+}
+
+output "counters_table_name" {
+  value = aws_dynamodb_table.counters.name
+}
+
+output "counters_table_arn" {
+  value = aws_dynamodb_table.counters.arn
+}
+
+output "url_hashes_table_name" {
+  value = aws_dynamodb_table.url_hashes.name
+}
+
+output "url_hashes_table_arn" {
+  value = aws_dynamodb_table.url_hashes.arn
+}
+
+output "category_cache_table_name" {
+  value = aws_dynamodb_table.category_cache.name
+}
+
+output "category_cache_table_arn" {
+  value = aws_dynamodb_table.category_cache.arn
+}
+
+output "click_counters_table_name" {
+  value = aws_dynamodb_table.click_counters.name
+}
+
+output "click_counters_table_arn" {
+  value = aws_dynamodb_table.click_counters.arn
+}
@@ -0,0 +1,89 @@
+# 인기 링크 edge 리다이렉트
+# - KeyValueStore: hotlinks Lambda(publish)가 5분마다 top-N shortId → originalUrl 맵을 반영
+# - CloudFront Function: 맵에 있으면 viewer request 단계에서 바로 301, 없으면 origin(redirect Lambda)
+# - 로그 버킷: CloudFront 표준 로그 → hotlinks Lambda(ingest)가 edge 응답분을 클릭 큐로 전송
+# 리다이렉트 도메인(s.)은 현재 API Gateway custom domain → 함수는 CloudFront 배포를 앞에 둘 때 연결
+#   default_cache_behavior {
+#     function_association {
+#       event_type   = "viewer-request"
+#       function_arn = module.edge.redirect_function_arn
+#     }
+#   }
+#   logging_config { bucket = module.edge.log_bucket_domain_name }
+resource "aws_cloudfront_key_value_store" "hotlinks" {
+  name    = "${var.project_name}-hotlinks"
+  comment = "Hot shortId -> originalUrl map (published by hotlinks lambda)"
+}
+
+resource "aws_cloudfront_function" "redirect" {
+  name    = "${var.project_name}-edge-redirect"
+  runtime = "cloudfront-js-2.0"
+  comment = "Serve hot-link redirects from KeyValueStore"
+  publish = true
+  code    = file("${path.module}/redirect.js")
+
+  key_value_store_associations = [aws_cloudfront_key_value_store.hotlinks.arn]
+}
+
+# -------- CloudFront 표준 로그 (edge 클릭 수집) --------
+resource "aws_s3_bucket" "logs" {
+  bucket        = replace("${var.project_name}-edge-logs", "_", "-")
+  force_destroy = true
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-edge-logs"
+  })
+}
+
+resource "aws_s3_bucket_public_access_block" "logs" {
+  bucket                  = aws_s3_bucket.logs.id
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+# CloudFront 표준 로그 전송은 버킷 ACL 필요
+resource "aws_s3_bucket_ownership_controls" "logs" {
+  bucket = aws_s3_bucket.logs.id
+
+  rule {
+    object_ownership = "BucketOwnerPreferred"
+  }
+}
+
+# 클릭 큐로 옮긴 뒤에는 필요 없음
+resource "aws_s3_bucket_lifecycle_configuration" "logs" {
+  bucket = aws_s3_bucket.logs.id
+
+  rule {
+    id     = "expire-edge-logs"
+    status = "Enabled"
+
+    filter {}
+
+    expiration {
+      days = var.log_retention_days
+    }
+  }
+}
+
+resource "aws_lambda_permission" "allow_s3_hotlinks" {
+  statement_id  = "AllowExecutionFromS3EdgeLogs"
+  action        = "lambda:InvokeFunction"
+  function_name = var.hotlinks_function_name
+  principal     = "s3.amazonaws.com"
+  source_arn    = aws_s3_bucket.logs.arn
+}
+
+resource "aws_s3_bucket_notification" "logs" {
+  bucket = aws_s3_bucket.logs.id
+
+  lambda_function {
+    lambda_function_arn = var.hotlinks_function_arn
+    events              = ["s3:ObjectCreated:*"]
+    filter_suffix       = ".gz"
+  }
+
+  depends_on = [aws_lambda_permission.allow_s3_hotlinks]
+}
@@ -0,0 +1,19 @@
+output "kvs_arn" {
+  value = aws_cloudfront_key_value_store.hotlinks.arn
+}
+
+output "redirect_function_arn" {
+  value = aws_cloudfront_function.redirect.arn
+}
+
+output "log_bucket_name" {
+  value = aws_s3_bucket.logs.bucket
+}
+
+output "log_bucket_arn" {
+  value = aws_s3_bucket.logs.arn
+}
+
+output "log_bucket_domain_name" {
+  value = aws_s3_bucket.logs.bucket_domain_name
+}
@@ -0,0 +1,55 @@
+// CloudFront Function (viewer request, cloudfront-js-2.0)
+// hotlinks Lambda가 갱신하는 KeyValueStore(shortId → "<status> <maxAge> <originalUrl>")에 있으면 edge에서 바로 응답,
+// 없거나 조회 실패 시 요청을 그대로 origin(API Gateway → redirect Lambda)으로 넘김
+// 클릭은 CloudFront 로그 → hotlinks(ingest) → 클릭 큐 → click_consumer 로 집계
+import cf from 'cloudfront';
+
+const kvs = cf.kvs();
+
+// lambda/hotlinks/redirect_map.py SHORT_ID_RE 와 같은 규칙
+const SHORT_ID = /^[0-9A-Za-z]{4,16}$/;
+
+// lambda/common/python/redirect_policy.py 와 같은 상태 코드 / 캐시 헤더
+const STATUS_TEXT = {
+    301: 'Moved Permanently',
+    302: 'Found',
+    307: 'Temporary Redirect',
+    308: 'Permanent Redirect',
+};
+const NO_STORE = 'no-cache, no-store, must-revalidate';
+const ENTRY = /^(\d{3}) (\d+) (.+)$/;
+
+async function handler(event) {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return request;
+    }
+
+    const shortId = request.uri.slice(1);
+    if (!SHORT_ID.test(shortId)) {
+        return request;
+    }
+
+    let value;
+    try {
+        value = await kvs.get(shortId);
+    } catch (err) {
+        // 키 없음 (인기 링크가 아님)
+        return request;
+    }
+
+    const entry = ENTRY.exec(value);
+    if (!entry || !STATUS_TEXT[entry[1]]) {
+        return request;
+    }
+    const maxAge = parseInt(entry[2], 10);
+
+    return {
+        statusCode: parseInt(entry[1], 10),
+        statusDescription: STATUS_TEXT[entry[1]],
+        headers: {
+            'location': { value: entry[3] },
+            'cache-control': { value: maxAge > 0 ? `public, max-age=${maxAge}` : NO_STORE },
+        },
+    };
+}
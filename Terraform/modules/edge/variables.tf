@@ -0,0 +1,26 @@
+variable "project_name" {
+  type        = string
+  description = "Project name prefix for resource naming"
+}
+
+variable "tags" {
+  type        = map(string)
+  description = "Common tags"
+  default     = {}
+}
+
+variable "hotlinks_function_name" {
+  type        = string
+  description = "hotlinks lambda function name (CloudFront log ingest)"
+}
+
+variable "hotlinks_function_arn" {
+  type        = string
+  description = "hotlinks lambda function ARN (CloudFront log ingest)"
+}
+
+variable "log_retention_days" {
+  type        = number
+  description = "Days to keep CloudFront standard logs in the edge log bucket"
+  default     = 7
+}
@@ -33,12 +33,23 @@ resource "aws_iam_role_policy" "lambda_policy" {
           "dynamodb:GetItem",
           "dynamodb:PutItem",
           "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:BatchGetItem",
           "dynamodb:Query",
           "dynamodb:Scan"
         ]
         Resource = [
           var.urls_table_arn,
-          var.clicks_table_arn
+          "${var.urls_table_arn}/index/*",
+          var.clicks_table_arn,
+          "${var.clicks_table_arn}/index/*",
+          var.click_rollups_table_arn,
+          var.counters_table_arn,
+          var.url_hashes_table_arn,
+          var.category_cache_table_arn,
+          var.click_counters_table_arn,
+          "${var.category_cache_table_arn}/index/*"
         ]
       },
 
@@ -56,12 +67,52 @@ resource "aws_iam_role_policy" "lambda_policy" {
       {
         Effect = "Allow"
         Action = [
+          "dynamodb:GetItem",
           "dynamodb:PutItem",
           "dynamodb:Query"
         ]
         Resource = [
           var.trends_table_arn
         ]
+      },
+
+      # 클릭 이벤트 큐 (redirect 전송 / click_consumer 수신)
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:SendMessage",
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes"
+        ]
+        Resource = [
+          var.click_queue_arn
+        ]
+      },
+
+      # 인기 링크 edge 리다이렉트 맵 (hotlinks publish)
+      {
+        Effect = "Allow"
+        Action = [
+          "cloudfront-keyvaluestore:DescribeKeyValueStore",
+          "cloudfront-keyvaluestore:ListKeys",
+          "cloudfront-keyvaluestore:GetKey",
+          "cloudfront-keyvaluestore:UpdateKeys"
+        ]
+        Resource = [
+          var.hotlinks_kvs_arn
+        ]
+      },
+
+      # CloudFront 표준 로그 (hotlinks ingest)
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:GetObject"
+        ]
+        Resource = [
+          "${var.edge_logs_bucket_arn}/*"
+        ]
       }
 
 
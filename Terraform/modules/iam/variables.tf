@@ -22,4 +22,44 @@ variable "clicks_table_arn" {
 variable "trends_table_arn" {
   type        = string
   description = "ARN of clicks DynamoDB table"
-}
\ No newline at end of file
+}
+
+variable "click_queue_arn" {
+  type        = string
+  description = "ARN of click events SQS queue"
+}
+
+variable "click_rollups_table_arn" {
+  type        = string
+  description = "ARN of click rollups DynamoDB table"
+}
+
+variable "counters_table_arn" {
+  type        = string
+  description = "ARN of counters DynamoDB table"
+}
+
+variable "url_hashes_table_arn" {
+  type        = string
+  description = "ARN of url hashes DynamoDB table"
+}
+
+variable "category_cache_table_arn" {
+  type        = string
+  description = "ARN of categorize LLM result cache DynamoDB table"
+}
+
+variable "click_counters_table_arn" {
+  type        = string
+  description = "ARN of sharded click counters DynamoDB table"
+}
+
+variable "hotlinks_kvs_arn" {
+  type        = string
+  description = "ARN of CloudFront KeyValueStore holding the hot-link redirect map"
+}
+
+variable "edge_logs_bucket_arn" {
+  type        = string
+  description = "ARN of S3 bucket receiving CloudFront standard logs for edge redirects"
+}
@@ -1,18 +1,47 @@
+# 모든 Lambda 공용 모듈 (lambda/common/python → /opt/python)
+resource "aws_lambda_layer_version" "common" {
+  filename            = var.common_layer_zip_path
+  layer_name          = "${var.project_name}-common"
+  compatible_runtimes = ["python3.10", "python3.11"]
+
+  source_code_hash = filebase64sha256(var.common_layer_zip_path)
+}
+
 resource "aws_lambda_function" "shorten" {
   filename      = var.shorten_zip_path
   function_name = "${var.project_name}-shorten"
   role          = var.lambda_role_arn
   handler       = "handler.lambda_handler"
   runtime       = "python3.11"
-  timeout       = 10
+  timeout       = 30 # POST /shorten/batch (최대 MAX_BATCH_URLS건)
+  memory_size   = 256
 
   # zip 내용 변경 감지용
   source_code_hash = filebase64sha256(var.shorten_zip_path)
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   environment {
     variables = {
       URLS_TABLE = var.urls_table_name
       BASE_URL   = var.BASE_URL
+
+      # 7자리 counter ID → 기존 8자리 UUID ID와 겹치지 않음
+      SHORT_ID_STRATEGY   = "counter"
+      SHORT_ID_LENGTH     = "7"
+      SHORT_ID_BLOCK_SIZE = "1000"
+      COUNTERS_TABLE      = var.counters_table_name
+
+      MAX_BATCH_URLS      = "5000"
+      BATCH_WRITE_WORKERS = "8"
+
+      # 같은 URL 재사용 (요청 body의 dedup 값이 우선)
+      URL_HASHES_TABLE = var.url_hashes_table_name
+      DEDUP_URLS       = "true"
+
+      # 호출 단위 EMF 지표 (lambda/common/python/metrics.py)
+      METRICS_ENABLED   = var.metrics_enabled
+      METRICS_NAMESPACE = var.project_name
     }
   }
 
@@ -31,10 +60,26 @@ resource "aws_lambda_function" "redirect" {
 
   source_code_hash = filebase64sha256(var.redirect_zip_path)
 
+  # dynamodb 백엔드(폴백)일 때만 click_counter 사용
+  layers = [aws_lambda_layer_version.common.arn]
+
   environment {
     variables = {
-      URLS_TABLE   = var.urls_table_name
-      CLICKS_TABLE = var.clicks_table_name
+      URLS_TABLE         = var.urls_table_name
+      CLICKS_TABLE       = var.clicks_table_name
+      CLICK_SINK_BACKEND = "sqs"
+      CLICK_QUEUE_URL    = var.click_queue_url
+
+      # 컨테이너 내 shortId 캐시 (0이면 비활성)
+      URL_CACHE_SIZE         = "1000"
+      URL_CACHE_TTL          = "60"
+      URL_CACHE_NEGATIVE_TTL = "30"
+
+      CLICK_COUNTERS_TABLE = var.click_counters_table_name
+
+      # 호출 단위 EMF 지표 (lambda/common/python/metrics.py)
+      METRICS_ENABLED   = var.metrics_enabled
+      METRICS_NAMESPACE = var.project_name
     }
   }
 
@@ -43,6 +88,55 @@ resource "aws_lambda_function" "redirect" {
   })
 }
 
+# redirect가 보낸 클릭 이벤트를 clicks / clickCount에 일괄 반영
+resource "aws_lambda_function" "click_consumer" {
+  filename      = var.click_consumer_zip_path
+  function_name = "${var.project_name}-click-consumer"
+  role          = var.lambda_role_arn
+  handler       = "handler.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 30
+  memory_size   = 256
+
+  source_code_hash = filebase64sha256(var.click_consumer_zip_path)
+
+  layers = [aws_lambda_layer_version.common.arn]
+
+  environment {
+    variables = {
+      URLS_TABLE    = var.urls_table_name
+      CLICKS_TABLE  = var.clicks_table_name
+      ROLLUPS_TABLE = var.click_rollups_table_name
+      TOPK_CAPACITY = "200"  # 일별 top shortId 요약 크기 (analyze topUrls)
+      TOPK_SHARDS   = "8"    # 일별 요약을 나눠 저장할 item 수 (analyze / hotlinks와 같게)
+      ROLLUP_TTL_DAYS = "40" # rollup 버킷 TTL (analyze backfill과 같게)
+      HLL_PRECISION = "12"   # 고유 방문자 HyperLogLog 레지스터 2^12개 (0이면 비활성)
+
+      # 컨테이너 기준 10초 평균 clickCount 쓰기가 초당 10회를 넘거나 throttling 되면 16개 샤드로 승격
+      CLICK_COUNTERS_TABLE             = var.click_counters_table_name
+      CLICK_COUNTER_SHARDS             = "16"
+      CLICK_COUNTER_HOT_WRITES_PER_SEC = "10"
+      CLICK_COUNTER_WINDOW_SECONDS     = "10"
+
+      # 호출 단위 EMF 지표 (lambda/common/python/metrics.py)
+      METRICS_ENABLED   = var.metrics_enabled
+      METRICS_NAMESPACE = var.project_name
+    }
+  }
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-click-consumer"
+  })
+}
+
+resource "aws_lambda_event_source_mapping" "click_consumer" {
+  event_source_arn                   = var.click_queue_arn
+  function_name                      = aws_lambda_function.click_consumer.arn
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
 resource "aws_lambda_function" "stats" {
   filename      = var.stats_zip_path
   function_name = "${var.project_name}-stats"
@@ -55,10 +149,19 @@ resource "aws_lambda_function" "stats" {
   # zip 내용 변경 감지
   source_code_hash = filebase64sha256(var.stats_zip_path)
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   environment {
     variables = {
-      URLS_TABLE   = var.urls_table_name
-      CLICKS_TABLE = var.clicks_table_name
+      URLS_TABLE      = var.urls_table_name
+      CLICKS_TABLE    = var.clicks_table_name
+      ROLLUPS_TABLE   = var.click_rollups_table_name
+      MAX_CLICK_PAGES = "20"
+      CLICK_COUNTERS_TABLE = var.click_counters_table_name
+
+      # 호출 단위 EMF 지표 (lambda/common/python/metrics.py)
+      METRICS_ENABLED   = var.metrics_enabled
+      METRICS_NAMESPACE = var.project_name
     }
   }
 
@@ -79,13 +182,28 @@ resource "aws_lambda_function" "analyze" {
   # zip 내용 변경 감지
   source_code_hash = filebase64sha256(var.analyze_zip_path)
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   environment {
     variables = {
       URLS_TABLE   = var.urls_table_name
       CLICKS_TABLE = var.clicks_table_name
       TRENDS_TABLE = var.trends_table_name
+      ROLLUPS_TABLE = var.click_rollups_table_name
+      ANALYZE_MODE  = "incremental"
+      SCAN_SEGMENTS = "4"    # urls / clicks full scan 병렬 세그먼트 수
+      TOP_URLS_SOURCE = "sketch" # topUrls: 최근 7일 일별 요약 merge (exact / lifetime 가능)
+      TOPK_CAPACITY   = "200"
+      TOPK_SHARDS     = "8"
+      ROLLUP_TTL_DAYS = "40"
+      CLICK_COUNTERS_TABLE = var.click_counters_table_name
+      TRENDS_PAYLOAD_COMPRESS = "true" # trends_latest view별 응답을 gzip으로 미리 저장
       OPENAI_API_KEY  = var.openai_api_key
       PERIOD         = "1h"
+
+      # 호출 단위 EMF 지표 (lambda/common/python/metrics.py)
+      METRICS_ENABLED   = var.metrics_enabled
+      METRICS_NAMESPACE = var.project_name
     }
   }
 
@@ -105,10 +223,23 @@ resource "aws_lambda_function" "trends_latest" {
 
   source_code_hash = filebase64sha256(var.trends_latest_zip_path)
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   environment {
     variables = {
       TRENDS_TABLE    = var.trends_table_name
       DEFAULT_PERIOD  = "1h"
+      TRENDS_PERIODS  = "1h" # analyze가 쓰는 PERIOD 값만 조회 허용 (쉼표 구분)
+
+      # Cache-Control max-age = 다음 analyze 결과 예상 시각까지 (scheduler rate(1 hour)와 맞춤)
+      ANALYZE_INTERVAL_SECONDS        = "3600"
+      ANALYZE_RUN_LAG_SECONDS         = "120"
+      TRENDS_OVERDUE_MAX_AGE          = "60"
+      TRENDS_CACHE_REVALIDATE_SECONDS = "60"
+
+      # 호출 단위 EMF 지표 (lambda/common/python/metrics.py)
+      METRICS_ENABLED   = var.metrics_enabled
+      METRICS_NAMESPACE = var.project_name
     }
   }
 
@@ -129,12 +260,41 @@ resource "aws_lambda_function" "categorize" {
   # zip 변경 감지
   source_code_hash = filebase64sha256(var.categorize_zip_path)
 
+  layers = [aws_lambda_layer_version.common.arn]
+
   environment {
     variables = {
       URLS_TABLE        = var.urls_table_name
       OPENAI_API_KEY    = var.openai_api_key
       CATEGORIZE_LIMIT  = "50"
       LLM_BATCH_SIZE    = "15"
+
+      # LLM batch 동시 호출 / 초당 요청 제한 / 429·5xx 재시도 / 요청 timeout(초) / 결과 쓰기용 여유(ms)
+      # 요청 timeout은 Lambda 남은 시간에서 여유를 뺀 값까지로 줄어듦 (요청이 끝나지 않아도 여유 안에서 flush)
+      LLM_CONCURRENCY         = "4"
+      LLM_RATE_PER_SEC        = "5"
+      LLM_MAX_RETRIES         = "3"
+      LLM_REQUEST_TIMEOUT     = "30"
+      LLM_DEADLINE_RESERVE_MS = "15000"
+
+      # 분류 결과 write-behind (flush 단위 / 병렬 update 스레드 수)
+      CATEGORY_WRITE_FLUSH_SIZE = "25"
+      CATEGORY_WRITE_WORKERS    = "8"
+
+      # 같은 host/path prefix의 LLM 판정 재사용 + learned 룰 승격
+      CATEGORY_CACHE_TABLE            = var.category_cache_table_name
+      CATEGORY_CACHE_MIN_SAMPLES      = "3"
+      CATEGORY_CACHE_MIN_AGREEMENT    = "0.8"
+      CATEGORY_CACHE_MIN_CONFIDENCE   = "0.7"
+      CATEGORY_PROMOTE_MIN_SAMPLES    = "10"
+      CATEGORY_PROMOTE_MIN_AGREEMENT  = "0.95"
+      CATEGORY_PROMOTE_MIN_CONFIDENCE = "0.8"
+      CATEGORY_CACHE_VERIFY_RATE      = "0.1" # 캐시 판정 중 LLM에 다시 물어보는 비율 (승격/강등용 독립 표본)
+      CATEGORY_LEARNED_TTL_DAYS       = "30"  # learned 룰 유효 기간 (지나면 강등 후 새 LLM 표본으로 재승격)
+
+      # 호출 단위 EMF 지표 (lambda/common/python/metrics.py)
+      METRICS_ENABLED   = var.metrics_enabled
+      METRICS_NAMESPACE = var.project_name
     }
   }
 
@@ -143,3 +303,45 @@ resource "aws_lambda_function" "categorize" {
   })
 }
 
+# 인기 링크 edge 리다이렉트 맵 갱신(스케줄) + CloudFront 로그 → 클릭 큐(S3 이벤트)
+# cloudfront-keyvaluestore API는 SigV4A 서명 → zip에 awscrt 포함 (README 빌드 방법 참고)
+resource "aws_lambda_function" "hotlinks" {
+  filename      = var.hotlinks_zip_path
+  function_name = "${var.project_name}-hotlinks"
+  role          = var.lambda_role_arn
+  handler       = "handler.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 60
+  memory_size   = 256
+
+  source_code_hash = filebase64sha256(var.hotlinks_zip_path)
+
+  layers = [aws_lambda_layer_version.common.arn]
+
+  environment {
+    variables = {
+      URLS_TABLE    = var.urls_table_name
+      ROLLUPS_TABLE = var.click_rollups_table_name
+
+      # 최근 2일 일별 top-k 요약에서 최소 20회 이상 클릭된 상위 500개
+      HOTLINKS_STORE       = "kvs"
+      HOTLINKS_KVS_ARN     = var.hotlinks_kvs_arn
+      HOTLINKS_WINDOW_DAYS = "2"
+      HOTLINKS_TOP_N       = "500"
+      HOTLINKS_MIN_CLICKS  = "20"
+      TOPK_SHARDS          = "8"
+
+      # edge 응답분 클릭은 redirect와 같은 큐로
+      CLICK_SINK_BACKEND = "sqs"
+      CLICK_QUEUE_URL    = var.click_queue_url
+
+      # 호출 단위 EMF 지표 (lambda/common/python/metrics.py)
+      METRICS_ENABLED   = var.metrics_enabled
+      METRICS_NAMESPACE = var.project_name
+    }
+  }
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-hotlinks"
+  })
+}
@@ -66,3 +66,10 @@ output "categorize_function_arn" {
   value = aws_lambda_function.categorize.arn
 }
 
+output "hotlinks_function_name" {
+  value = aws_lambda_function.hotlinks.function_name
+}
+
+output "hotlinks_function_arn" {
+  value = aws_lambda_function.hotlinks.arn
+}
@@ -34,6 +34,41 @@ variable "trends_table_name" {
   description = "DynamoDB trends table name"
 }
 
+variable "click_rollups_table_name" {
+  type        = string
+  description = "DynamoDB click rollups table name"
+}
+
+variable "counters_table_name" {
+  type        = string
+  description = "DynamoDB counters table name (shortId block leasing)"
+}
+
+variable "url_hashes_table_name" {
+  type        = string
+  description = "DynamoDB url hashes table name (shorten dedup)"
+}
+
+variable "category_cache_table_name" {
+  type        = string
+  description = "DynamoDB category cache table name (categorize LLM result cache)"
+}
+
+variable "click_counters_table_name" {
+  type        = string
+  description = "DynamoDB sharded click counters table name (hot link clickCount)"
+}
+
+variable "click_queue_url" {
+  type        = string
+  description = "SQS queue URL for click events (redirect → click_consumer)"
+}
+
+variable "click_queue_arn" {
+  type        = string
+  description = "SQS queue ARN for click events"
+}
+
 variable "openai_api_key" {
   type        = string
   description = "OpenAI API key for analyze lambda"
@@ -51,6 +86,16 @@ variable "redirect_zip_path" {
   description = "Path to redirect lambda zip"
 }
 
+variable "common_layer_zip_path" {
+  type        = string
+  description = "Path to common lambda layer zip (click aggregation shared by analyze/stats/click_consumer)"
+}
+
+variable "click_consumer_zip_path" {
+  type        = string
+  description = "Path to click_consumer lambda zip"
+}
+
 variable "stats_zip_path" {
   type        = string
   description = "Path to stats lambda zip"
@@ -69,4 +114,20 @@ variable "trends_latest_zip_path" {
 variable "categorize_zip_path" {
   description = "Path to categorize lambda zip file"
   type        = string
-}
\ No newline at end of file
+}
+
+variable "hotlinks_zip_path" {
+  type        = string
+  description = "Path to hotlinks lambda zip"
+}
+
+variable "hotlinks_kvs_arn" {
+  type        = string
+  description = "ARN of CloudFront KeyValueStore holding the hot-link redirect map"
+}
+
+variable "metrics_enabled" {
+  type        = string
+  description = "Emit per-invocation CloudWatch Embedded Metric Format lines (\"true\" / \"false\")"
+  default     = "false"
+}
@@ -52,3 +52,32 @@ resource "aws_lambda_permission" "allow_eventbridge_categorize" {
   principal     = "events.amazonaws.com"
   source_arn    = aws_cloudwatch_event_rule.categorize_schedule.arn
 }
+
+# ---------------------------
+# Hotlinks (5 minutes)
+# ---------------------------
+resource "aws_cloudwatch_event_rule" "hotlinks_schedule" {
+  name                = "${var.project_name}-hotlinks-5m"
+  description         = "Publish hot-link redirect map every 5 minutes"
+  schedule_expression = "rate(5 minutes)"
+  tags                = var.tags
+}
+
+resource "aws_cloudwatch_event_target" "hotlinks" {
+  rule      = aws_cloudwatch_event_rule.hotlinks_schedule.name
+  target_id = "hotlinks"
+  arn       = var.hotlinks_lambda_function_arn
+
+  input = jsonencode({
+    trigger = "eventbridge",
+    job     = "publish"
+  })
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_hotlinks" {
+  statement_id  = "AllowExecutionFromEventBridgeHotlinks"
+  action        = "lambda:InvokeFunction"
+  function_name = var.hotlinks_lambda_function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.hotlinks_schedule.arn
+}
@@ -17,4 +17,11 @@ variable "categorize_lambda_function_name" {
     }
 variable "categorize_lambda_function_arn"  { 
     type = string 
-    }
\ No newline at end of file
+    }
+
+variable "hotlinks_lambda_function_name" { 
+    type = string 
+    }
+variable "hotlinks_lambda_function_arn"  { 
+    type = string 
+    }
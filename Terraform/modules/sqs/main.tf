@@ -0,0 +1,24 @@
+# redirect → click_consumer 클릭 이벤트 큐
+resource "aws_sqs_queue" "clicks_dlq" {
+  name                      = "${var.project_name}-clicks-dlq"
+  message_retention_seconds = 1209600
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-clicks-dlq"
+  })
+}
+
+resource "aws_sqs_queue" "clicks" {
+  name                       = "${var.project_name}-clicks"
+  visibility_timeout_seconds = var.visibility_timeout_seconds
+  message_retention_seconds  = 345600
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.clicks_dlq.arn
+    maxReceiveCount     = 5
+  })
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-clicks"
+  })
+}
@@ -0,0 +1,11 @@
+output "click_queue_url" {
+  value = aws_sqs_queue.clicks.url
+}
+
+output "click_queue_arn" {
+  value = aws_sqs_queue.clicks.arn
+}
+
+output "click_dlq_arn" {
+  value = aws_sqs_queue.clicks_dlq.arn
+}
@@ -0,0 +1,16 @@
+variable "project_name" {
+  type        = string
+  description = "Project name prefix for resource naming"
+}
+
+variable "tags" {
+  type        = map(string)
+  description = "Common tags"
+  default     = {}
+}
+
+variable "visibility_timeout_seconds" {
+  type        = number
+  description = "Must be >= click_consumer lambda timeout"
+  default     = 60
+}
@@ -0,0 +1,103 @@
+# bench/bench_click_agg.py
+"""
+클릭 집계 벤치마크 (기존 리스트 + datetime 파싱 vs click_agg 스트리밍)
+
+    python bench/bench_click_agg.py --clicks 1000000 --page 1000
+
+- 기존: scan 결과를 전부 리스트로 모은 뒤 datetime.fromisoformat으로 시간 버킷 계산
+- 신규: 페이지 generator를 ClickAggregator.consume으로 바로 집계 (timestamp는 문자열 슬라이싱)
+- 처리 속도(clicks/sec), tracemalloc 최대 메모리, 결과 일치 여부 출력
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lambda", "common", "python"))
+
+from click_agg import ClickAggregator, summarize_hours  # noqa: E402
+
+REFERERS = ["direct", "https://www.google.com/search?q=x", "https://t.co/abc", "https://m.facebook.com/",
+            "https://news.naver.com/main", "-", ""]
+
+
+def make_pages(count, page_size, seed):
+    """scan 페이지를 흉내내는 generator (클릭은 필요할 때마다 생성)"""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    page = []
+    for i in range(count):
+        dt = base + timedelta(seconds=rng.randrange(7 * 86400), microseconds=rng.randrange(1000000))
+        ts = dt.isoformat()
+        if i % 10 == 0:
+            ts = dt.replace(microsecond=0).isoformat() + "Z"
+        page.append({"shortId": f"s{rng.randrange(1000)}", "timestamp": ts, "referer": rng.choice(REFERERS)})
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def legacy_aggregate(pages):
+    items = []
+    for page in pages:
+        items.extend(page)
+
+    hours = {}
+    for c in items:
+        try:
+            dt = datetime.fromisoformat(c["timestamp"].replace("Z", "+00:00"))
+        except Exception:
+            continue
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        dt = dt.astimezone(timezone.utc)
+        bucket = hours.setdefault(f"{dt:%Y-%m-%dT%H}", {"t": 0, "r": {}})
+        bucket["t"] += 1
+        raw = (c.get("referer") or "").strip()
+        if not raw or raw in ("-", "null", "None"):
+            ref = "direct"
+        elif raw.startswith("http://") or raw.startswith("https://"):
+            ref = urlparse(raw).netloc or "direct"
+        else:
+            ref = raw
+        bucket["r"][ref] = bucket["r"].get(ref, 0) + 1
+    return hours
+
+
+def measure(fn, pages):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(pages)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clicks", type=int, default=200000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    legacy, legacy_t, legacy_mem = measure(legacy_aggregate, make_pages(args.clicks, args.page, args.seed))
+    stream, stream_t, stream_mem = measure(
+        lambda pages: ClickAggregator().consume(pages).hours, make_pages(args.clicks, args.page, args.seed)
+    )
+
+    same = summarize_hours(legacy) == summarize_hours(stream)
+    print(f"clicks={args.clicks} page={args.page}")
+    print(f"  legacy (list + datetime) : {args.clicks / legacy_t:10.0f} clicks/s  peak {legacy_mem / 1e6:7.1f} MB")
+    print(f"  ClickAggregator (stream) : {args.clicks / stream_t:10.0f} clicks/s  peak {stream_mem / 1e6:7.1f} MB")
+    print(f"  same result: {same}")
+
+
+if __name__ == "__main__":
+    main()
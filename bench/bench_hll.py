@@ -0,0 +1,78 @@
+# bench/bench_hll.py
+"""
+고유 방문자 HyperLogLog 정확도 / 크기 벤치마크
+
+    python bench/bench_hll.py --clicks 500000 --visitors 100000
+
+- exact : 방문자 해시 set (정답, 메모리는 방문자 수에 비례)
+- HLL   : precision별, 시간 버킷 sketch 168개(7일)를 직렬화 → merge 하는 운영 방식(click_consumer → analyze) 그대로 측정
+- 상대 오차, 최대 메모리(tracemalloc), 저장 크기(bytes), 처리 속도 출력
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lambda", "common", "python"))
+
+from hll import HyperLogLog, merge_sketches  # noqa: E402
+
+HOURS = 7 * 24
+
+
+def visitor_stream(count, visitors, seed):
+    """redirect hash_ip와 같은 형식(sha256 hex 앞 16자리)의 방문자 스트림 (재방문 포함)"""
+    rng = random.Random(seed)
+    ids = [hashlib.sha256(f"10.0.{i}".encode()).hexdigest()[:16] for i in range(visitors)]
+    # 절반은 상위 10% 단골 방문자의 재방문
+    regulars = ids[:max(1, visitors // 10)]
+    return [rng.choice(regulars) if rng.random() < 0.5 else rng.choice(ids) for _ in range(count)]
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_hll(stream, p):
+    # 시간 버킷별 sketch → bytes(저장 형태) → merge
+    size = (len(stream) + HOURS - 1) // HOURS
+    stored = []
+    for h in range(HOURS):
+        sketch = HyperLogLog(p)
+        for ip in stream[h * size:(h + 1) * size]:
+            sketch.add(ip)
+        stored.append(sketch.to_bytes())
+    return merge_sketches(stored).count(), sum(len(b) for b in stored)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clicks", type=int, default=200000)
+    parser.add_argument("--visitors", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    stream = visitor_stream(args.clicks, args.visitors, args.seed)
+    truth, t, mem = measure(lambda: len(set(stream)))
+    print(f"clicks={args.clicks} visitors={args.visitors} distinct={truth}")
+    print(f"  {'method':<20}{'estimate':>10}{'rel.err':>9}{'peak MB':>9}{'stored KB':>11}{'clicks/s':>12}")
+    print(f"  {'exact (set)':<20}{truth:>10}{0.0:>9.3f}{mem / 1e6:>9.2f}{truth * 16 / 1e3:>11.1f}{args.clicks / t:>12.0f}")
+
+    for p in (10, 12, 14):
+        (estimate, stored), t, mem = measure(lambda: run_hll(stream, p))
+        err = abs(estimate - truth) / max(1, truth)
+        label = f"HLL p={p} x{HOURS}h"
+        print(f"  {label:<20}{estimate:>10}{err:>9.3f}{mem / 1e6:>9.2f}{stored / 1e3:>11.1f}{args.clicks / t:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# bench/bench_llm_pool.py
+"""
+categorize LLM batch 동시 실행 벤치마크 (fake OpenAI 서버 사용, DynamoDB 접근 없음)
+
+    python bench/bench_llm_pool.py --urls 300 --batch 15 --latency 0.5 --rate-limit 0.1
+
+- 같은 URL 목록을 LLM_CONCURRENCY=1(기존 순차 실행과 동일) / --concurrency 로 각각 분류
+- 소요 시간, 요청 수, 429/500 응답 수, 최대 동시 요청 수, fallback(other) 결과 수 출력
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lambda", "categorize"))
+# llm_pool이 쓰는 metrics / runtime (공통 layer)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lambda", "common", "python"))
+
+from fake_openai import start_server  # noqa: E402
+
+
+def run(handler, llm_pool, urls, batch_size, concurrency, rate):
+    batches = [urls[i:i + batch_size] for i in range(0, len(urls), batch_size)]
+    executor = llm_pool.LLMBatchExecutor(
+        max_workers=concurrency,
+        bucket=llm_pool.TokenBucket(rate),
+        deadline=llm_pool.Deadline(),
+    )
+    start = time.perf_counter()
+    results, deferred = executor.run(
+        batches,
+        handler.llm_classify,
+        on_error=lambda b, e: handler._llm_fallback(b, 0.3, "llm_error"),
+    )
+    elapsed = time.perf_counter() - start
+
+    infos = [info for _, res in results for info in res.values()]
+    failed = sum(1 for info in infos if info["reason"].startswith(handler.LLM_FALLBACK_REASONS))
+    return elapsed, len(infos), failed, len(deferred)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=300)
+    parser.add_argument("--batch", type=int, default=15)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0, help="초당 요청 수 제한 (0이면 없음)")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rate-limit", type=float, default=0.1)
+    parser.add_argument("--server-error", type=float, default=0.02)
+    args = parser.parse_args()
+
+    srv, base_url = start_server(0, args.latency, args.rate_limit, args.server_error)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    import handler  # noqa: E402
+    import llm_pool  # noqa: E402
+
+    kinds = ["news", "shop", "video", "blog", "docs", "forum", "dev", "misc"]
+    urls = [
+        {"shortId": f"id{i}", "url": f"https://site{i}.example/{kinds[i % len(kinds)]}/{i}", "title": ""}
+        for i in range(args.urls)
+    ]
+
+    print(f"urls={args.urls} batch={args.batch} latency={args.latency}s "
+          f"429={args.rate_limit:.0%} 500={args.server_error:.0%}")
+    for concurrency in (1, args.concurrency):
+        srv.requests = srv.rate_limited = srv.server_errors = srv.max_in_flight = 0
+        elapsed, done, failed, deferred = run(handler, llm_pool, urls, args.batch, concurrency, args.rate)
+        print(f"  concurrency={concurrency:<3} {elapsed:6.2f}s  classified={done} failed={failed} "
+              f"deferred={deferred} requests={srv.requests} 429={srv.rate_limited} "
+              f"500={srv.server_errors} max_in_flight={srv.max_in_flight}")
+
+    srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# bench/bench_rule_classify.py
+"""
+rule_classify 마이크로 벤치마크 (기존 선형 루프 vs RuleMatcher)
+
+    python bench/bench_rule_classify.py --rules 5000 --urls 50000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lambda", "categorize"))
+
+from rule_matcher import RuleMatcher  # noqa: E402
+
+PATH_RULES = [
+    (["/blog", "/posts", "/post/"], "blog", 0.70, "path looks like blog"),
+    (["/docs", "/documentation", "/guide"], "docs", 0.70, "path looks like docs"),
+    (["/product", "/products", "/item", "/detail"], "shopping", 0.65, "path looks like product page"),
+]
+
+
+def legacy_classify(domain_rules, host, path):
+    """변경 전 rule_classify 로직"""
+    if host in domain_rules:
+        return domain_rules[host]
+    for d, r in domain_rules.items():
+        if host == d or host.endswith("." + d):
+            return r
+    if any(x in path for x in ["/blog", "/posts", "/post/"]):
+        return ("blog", 0.70, "path looks like blog")
+    if any(x in path for x in ["/docs", "/documentation", "/guide"]):
+        return ("docs", 0.70, "path looks like docs")
+    if any(x in path for x in ["/product", "/products", "/item", "/detail"]):
+        return ("shopping", 0.65, "path looks like product page")
+    return None
+
+
+def _word(rng, n=8):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(n))
+
+
+def make_rules(rng, count):
+    tlds = ["com", "net", "io", "co.kr", "org"]
+    return {f"{_word(rng)}.{rng.choice(tlds)}": ("other", 0.9, "synthetic") for _ in range(count)}
+
+
+def make_urls(rng, domains, count, hit_ratio):
+    paths = ["/", "/blog/1", "/docs/intro", "/item/42", "/a/b/c", "/post/x"]
+    out = []
+    for _ in range(count):
+        if rng.random() < hit_ratio:
+            host = rng.choice(domains)
+            if rng.random() < 0.5:
+                host = f"{_word(rng, 4)}.{host}"
+        else:
+            host = f"{_word(rng)}.{_word(rng, 3)}"
+        out.append((host, rng.choice(paths)))
+    return out
+
+
+def run(fn, urls):
+    start = time.perf_counter()
+    results = [fn(h, p) for h, p in urls]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--urls", type=int, default=50000)
+    parser.add_argument("--hit-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = make_rules(rng, args.rules)
+    urls = make_urls(rng, list(rules), args.urls, args.hit_ratio)
+
+    build_start = time.perf_counter()
+    matcher = RuleMatcher(rules, PATH_RULES)
+    build = time.perf_counter() - build_start
+
+    legacy_t, legacy_r = run(lambda h, p: legacy_classify(rules, h, p), urls)
+    new_t, new_r = run(matcher.classify, urls)
+
+    mismatches = sum(1 for a, b in zip(legacy_r, new_r) if a != b)
+
+    print(f"rules={args.rules} urls={args.urls} hit_ratio={args.hit_ratio}")
+    print(f"  legacy      : {legacy_t * 1e6 / args.urls:8.2f} us/url")
+    print(f"  RuleMatcher : {new_t * 1e6 / args.urls:8.2f} us/url (build {build * 1e3:.1f} ms)")
+    print(f"  speedup     : {legacy_t / new_t:.1f}x, mismatches={mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# bench/bench_startup.py
+"""
+handler별 cold start(init) 비용 벤치마크
+
+    python bench/bench_startup.py --repeat 5
+    python bench/bench_startup.py --repeat 5 --ref HEAD~1     # 이전 커밋의 lambda/ 와 비교
+
+- handler마다 새 python 프로세스에서 `import handler` (= Lambda init 단계) 시간을 측정 (repeat회 중앙값)
+- -X importtime 으로 boto3 / openai import 비용을 분리해서 출력
+- lazy: import 후 기본 호출 경로가 쓰는 runtime.Lazy 객체(FIRST_CALL: client / Table / OpenAI)를 만드는 시간
+  → init에서 첫 호출로 옮겨간 비용
+- vs base: import 차이 / (import + lazy) 차이
+- 네트워크 호출 없음 (client 생성까지만 측정)
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from loadtest import LAMBDA_ENV  # noqa: E402
+from local_dynamodb import table_env  # noqa: E402
+
+HANDLERS = ("shorten", "redirect", "click_consumer", "stats", "analyze", "trends_latest", "categorize", "hotlinks")
+PACKAGES = ("boto3", "openai")
+
+# handler별 기본 호출 경로에서 첫 호출 때 만들어지는 Lazy 객체 (handler 모듈 속성 경로)
+# 같은 resource를 쓰는 Table은 하나만 만들면 나머지는 비용이 거의 없음
+FIRST_CALL = {
+    "shorten": ["table"],
+    "redirect": ["ddb", "click_sink.backend.client"],
+    "click_consumer": ["clicks_table"],
+    "stats": ["urls_table"],
+    "analyze": ["urls_table", "client"],
+    "trends_latest": ["trends_table"],
+    "categorize": ["urls_table", "client"],
+    "hotlinks": ["rollups_table"],
+}
+
+# 자식 프로세스: handler import 시간 + Lazy 객체 생성 시간 (JSON 한 줄 출력)
+CHILD = r"""
+import functools, json, sys, time
+t0 = time.perf_counter()
+import handler
+t1 = time.perf_counter()
+lazy = 0.0
+runtime = sys.modules.get("runtime")
+if runtime is not None and hasattr(runtime, "Lazy"):
+    objs = [functools.reduce(getattr, path.split("."), handler) for path in sys.argv[1:]]
+    t2 = time.perf_counter()
+    for obj in objs:
+        if isinstance(obj, runtime.Lazy):
+            obj.resolve()
+    lazy = (time.perf_counter() - t2) * 1000
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "lazy_ms": lazy}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.update(LAMBDA_ENV)
+    env.update(table_env())
+    env.update({
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "OPENAI_API_KEY": "fake",
+        # 운영과 같은 싱크 (client 생성만 하고 전송은 하지 않음)
+        "CLICK_SINK_BACKEND": "sqs",
+        "CLICK_QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/000000000000/bench",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+
+def package_import_ms(stderr):
+    """-X importtime 출력 → {package: cumulative ms} (처음 import 된 위치 기준)"""
+    found = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2].strip()
+        if name in PACKAGES and name not in found:
+            try:
+                found[name] = int(parts[1].strip()) / 1000
+            except ValueError:
+                pass
+    return found
+
+
+def measure(lambda_dir, name, env):
+    path = os.path.join(lambda_dir, name)
+    run_env = {**env, "PYTHONPATH": os.pathsep.join([path, os.path.join(lambda_dir, "common", "python")])}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, *FIRST_CALL[name]],
+        cwd=path, env=run_env, capture_output=True, text=True, timeout=120,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name}: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result.update({f"{p}_ms": ms for p, ms in package_import_ms(proc.stderr).items()})
+    return result
+
+
+def run(lambda_dir, repeat, env):
+    rows = {}
+    for name in HANDLERS:
+        runs = [measure(lambda_dir, name, env) for _ in range(repeat)]
+        keys = {k for r in runs for k in r}
+        rows[name] = {k: statistics.median(r.get(k, 0.0) for r in runs) for k in keys}
+    return rows
+
+
+def export_ref(ref):
+    """git ref의 lambda/ 디렉터리를 임시 디렉터리에 풀어서 경로 반환"""
+    out = tempfile.mkdtemp(prefix="bench-startup-")
+    archive = subprocess.run(["git", "archive", ref, "lambda"], cwd=REPO_DIR, capture_output=True, check=True)
+    with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+        tar.extractall(out)
+    return os.path.join(out, "lambda")
+
+
+def print_rows(label, rows, base=None):
+    print(label)
+    print(f"  {'handler':<16}{'import ms':>11}{'boto3 ms':>10}{'openai ms':>11}{'lazy ms':>9}"
+          + (f"{'vs base':>20}" if base else ""))
+    for name, r in rows.items():
+        line = (f"  {name:<16}{r['import_ms']:>11.1f}{r.get('boto3_ms', 0):>10.1f}"
+                f"{r.get('openai_ms', 0):>11.1f}{r['lazy_ms']:>9.1f}")
+        if base and name in base:
+            b = base[name]
+            diff_import = r['import_ms'] - b['import_ms']
+            diff_total = r['import_ms'] + r['lazy_ms'] - b['import_ms'] - b['lazy_ms']
+            line += f"{diff_import:>+10.1f} / {diff_total:>+7.1f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ref", default="", help="비교할 git ref (예: HEAD~1)")
+    parser.add_argument("--json", default="", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    env = child_env()
+    base = None
+    if args.ref:
+        base = run(export_ref(args.ref), args.repeat, env)
+        print_rows(f"[{args.ref}] repeat={args.repeat}", base)
+
+    rows = run(os.path.join(REPO_DIR, "lambda"), args.repeat, env)
+    print_rows(f"[working tree] repeat={args.repeat}", rows, base)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"current": rows, "base": base}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
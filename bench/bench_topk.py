@@ -0,0 +1,104 @@
+# bench/bench_topk.py
+"""
+Top-K heavy hitters 정확도 / 메모리 벤치마크
+
+    python bench/bench_topk.py --clicks 500000 --ids 100000 --zipf 1.1
+
+- exact       : Counter 전체 + heap (정답)
+- SpaceSaving : capacity별, 하루치 요약 7개를 merge 하는 운영 방식(click_consumer → analyze) 그대로 측정
+- CountMinTopK: sketch 크기별
+- recall@k, top-k count 평균 상대 오차, 최대 메모리(tracemalloc), 처리 속도 출력
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lambda", "common", "python"))
+
+from topk import CountMinTopK, SpaceSaving, exact_top_k  # noqa: E402
+
+
+def zipf_stream(count, ids, s, seed):
+    """Zipf 분포 shortId 스트림 (id i의 가중치 1/i^s)"""
+    rng = random.Random(seed)
+    weights = [1.0 / (i ** s) for i in range(1, ids + 1)]
+    keys = [f"s{i}" for i in range(ids)]
+    return rng.choices(keys, weights=weights, k=count)
+
+
+def accuracy(truth, approx, k):
+    true_keys = {key for key, _ in truth[:k]}
+    recall = sum(1 for key, _ in approx[:k] if key in true_keys) / k
+    counts = dict(truth)
+    errors = [abs(n - counts.get(key, 0)) / max(1, counts.get(key, 0)) for key, n in approx[:k]]
+    return recall, sum(errors) / max(1, len(errors))
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_exact(stream, k):
+    return exact_top_k(Counter(stream), k)
+
+
+def run_space_saving(stream, k, capacity, days=7):
+    # 하루치씩 요약 → JSON 왕복(저장 형태) → merge
+    merged = None
+    size = (len(stream) + days - 1) // days
+    for d in range(days):
+        daily = SpaceSaving(capacity)
+        for key, n in Counter(stream[d * size:(d + 1) * size]).most_common():
+            daily.offer(key, n)
+        daily = SpaceSaving.from_json(daily.to_json())
+        merged = daily if merged is None else merged.merge(daily)
+    return [(key, n) for key, n, _ in merged.top(k)]
+
+
+def run_count_min(stream, k, width, depth=4):
+    cm = CountMinTopK(k=k, width=width, depth=depth)
+    for key in stream:
+        cm.add(key)
+    return cm.top(k)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clicks", type=int, default=200000)
+    parser.add_argument("--ids", type=int, default=50000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    stream = zipf_stream(args.clicks, args.ids, args.zipf, args.seed)
+    truth, t, mem = measure(lambda: run_exact(stream, len(stream)))
+    print(f"clicks={args.clicks} ids={args.ids} zipf={args.zipf} k={args.k}")
+    print(f"  {'method':<26}{'recall@k':>9}{'rel.err':>9}{'peak MB':>9}{'clicks/s':>12}")
+    print(f"  {'exact (Counter + heap)':<26}{1.0:>9.2f}{0.0:>9.3f}{mem / 1e6:>9.2f}{args.clicks / t:>12.0f}")
+
+    for capacity in (50, 200, 1000):
+        approx, t, mem = measure(lambda: run_space_saving(stream, args.k, capacity))
+        recall, err = accuracy(truth, approx, args.k)
+        label = f"SpaceSaving c={capacity} x7d"
+        print(f"  {label:<26}{recall:>9.2f}{err:>9.3f}{mem / 1e6:>9.2f}{args.clicks / t:>12.0f}")
+
+    for width in (256, 2048):
+        approx, t, mem = measure(lambda: run_count_min(stream, args.k, width))
+        recall, err = accuracy(truth, approx, args.k)
+        label = f"CountMin w={width} d=4"
+        print(f"  {label:<26}{recall:>9.2f}{err:>9.3f}{mem / 1e6:>9.2f}{args.clicks / t:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+# bench/edge_harness.py
+"""
+인기 링크 edge 리다이렉트 로컬 테스트 (배포 없이 in-process + node)
+
+    python bench/edge_harness.py --urls 1000 --clicks 20000 --requests 2000
+
+1) click_consumer로 클릭 적재 → 일별 top-k 요약(TOPK#날짜) 생성 (moto DynamoDB)
+2) hotlinks publish (file 저장소) → 맵 생성, 한 번 더 실행해서 변경이 없으면 put/delete 0건인지 확인
+3) Zipf 인기도 요청을 edge function(Terraform/modules/edge/redirect.js)에 통과
+   - node가 있으면 실제 JS를 실행 ('cloudfront' 모듈은 맵 파일을 읽는 shim), 없으면 같은 규칙의 Python 조회
+   - 맵에 있으면 edge 응답 (Location / 상태 코드 / Cache-Control이 redirect Lambda와 같은지 확인), 없으면 redirect Lambda 호출
+   - 링크 일부에 리다이렉트 정책(302 + max-age / 307 + preciseClicks)을 넣어서 정책 반영과
+     preciseClicks 링크가 맵에서 빠지는지 확인
+4) edge 응답분으로 CloudFront 표준 로그(gzip)를 만들어 moto S3에 올리고 hotlinks ingest 실행
+   → moto SQS 클릭 큐에 들어온 이벤트가 edge 응답 수 / shortId별 수와 같은지, click_consumer가 처리하는지 확인
+   → 같은 로그로 ingest를 한 번 더 실행(S3 재시도)해도 clickCount가 다시 증가하지 않는지 확인
+확인 실패 시 exit 1
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from urllib.parse import quote
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from loadtest import LAMBDA_ENV, LambdaContext, REFERERS, Workload, load_handler, sqs_events  # noqa: E402
+from local_dynamodb import create_tables, table_env  # noqa: E402
+from click_counter import read_click_count  # noqa: E402
+from redirect_policy import cache_control, normalize  # noqa: E402
+
+EDGE_FUNCTION = os.path.join(REPO_DIR, "Terraform", "modules", "edge", "redirect.js")
+
+# url index % 4 → urls.redirectPolicy (없으면 기본 정책)
+POLICIES = {
+    1: {"status": 302, "maxAge": 300, "preciseClicks": False},
+    2: {"status": 307, "maxAge": 0, "preciseClicks": True},
+}
+
+LOG_FIELDS = (
+    "date time x-edge-location sc-bytes c-ip cs-method cs(Host) cs-uri-stem sc-status cs(Referer) "
+    "cs(User-Agent) cs-uri-query cs(Cookie) x-edge-result-type x-edge-request-id x-host-header cs-protocol "
+    "cs-bytes time-taken x-forwarded-for ssl-protocol ssl-cipher x-edge-response-result-type "
+    "cs-protocol-version fle-status fle-encrypted-fields c-port time-to-first-byte "
+    "x-edge-detailed-result-type sc-content-type sc-content-len sc-range-start sc-range-end"
+).split()
+
+# node 실행용: 'cloudfront' 모듈 shim (kvs().get 은 키가 없으면 reject, CloudFront와 같음)
+CLOUDFRONT_SHIM = """
+import fs from 'node:fs';
+const map = JSON.parse(fs.readFileSync(process.env.HOTLINKS_FILE, 'utf8'));
+export default {
+    kvs() {
+        return {
+            async get(key) {
+                if (!Object.prototype.hasOwnProperty.call(map, key)) {
+                    throw new Error(`key not found: ${key}`);
+                }
+                return map[key];
+            },
+        };
+    },
+};
+"""
+
+# stdin: viewer request 이벤트 JSON 배열 → stdout: handler 결과 JSON 배열
+NODE_RUNNER = """
+import { handler } from './redirect.mjs';
+let raw = '';
+for await (const chunk of process.stdin) raw += chunk;
+const out = [];
+for (const event of JSON.parse(raw)) out.push(await handler(event));
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def viewer_event(short_id, ip):
+    return {
+        "version": "1.0",
+        "context": {"eventType": "viewer-request"},
+        "viewer": {"ip": ip},
+        "request": {"method": "GET", "uri": f"/{short_id}", "querystring": {}, "headers": {}, "cookies": {}},
+    }
+
+
+def run_edge_node(events, map_file):
+    """실제 edge function을 node로 실행 (node가 없으면 None)"""
+    node = shutil.which("node")
+    if node is None:
+        return None
+
+    work = tempfile.mkdtemp(prefix="edge-harness-")
+    shim_dir = os.path.join(work, "node_modules", "cloudfront")
+    os.makedirs(shim_dir)
+    with open(os.path.join(shim_dir, "package.json"), "w") as f:
+        json.dump({"name": "cloudfront", "type": "module", "main": "index.js"}, f)
+    with open(os.path.join(shim_dir, "index.js"), "w") as f:
+        f.write(CLOUDFRONT_SHIM)
+    with open(EDGE_FUNCTION, encoding="utf-8") as src, open(os.path.join(work, "redirect.mjs"), "w") as f:
+        f.write(src.read() + "\nexport { handler };\n")
+    with open(os.path.join(work, "run.mjs"), "w") as f:
+        f.write(NODE_RUNNER)
+
+    proc = subprocess.run(
+        [node, "run.mjs"], cwd=work, input=json.dumps(events), capture_output=True, text=True,
+        env={**os.environ, "HOTLINKS_FILE": map_file}, timeout=120,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"edge function failed: {proc.stderr.strip()}")
+    return json.loads(proc.stdout)
+
+
+def run_edge_python(events, map_file, short_id_re):
+    """node가 없을 때: redirect.js와 같은 규칙 (GET + shortId 형식 + 맵 조회 → "<status> <maxAge> <url>")"""
+    with open(map_file, encoding="utf-8") as f:
+        redirect_map = json.load(f)
+    out = []
+    for event in events:
+        request = event["request"]
+        short_id = request["uri"][1:]
+        value = redirect_map.get(short_id) if short_id_re.match(short_id) else None
+        if request["method"] != "GET" or value is None:
+            out.append(request)
+            continue
+        status, max_age, location = value.split(" ", 2)
+        policy = {"status": int(status), "maxAge": int(max_age), "preciseClicks": False}
+        out.append({"statusCode": policy["status"], "headers": {
+            "location": {"value": location}, "cache-control": {"value": cache_control(policy)},
+        }})
+    return out
+
+
+def log_line(now, short_id, ip, referer, request_id, result_type, status):
+    values = {
+        "date": now.strftime("%Y-%m-%d"),
+        "time": now.strftime("%H:%M:%S"),
+        "x-edge-location": "ICN54-P1",
+        "sc-bytes": "420",
+        "c-ip": ip,
+        "cs-method": "GET",
+        "cs(Host)": "d111111abcdef8.cloudfront.net",
+        "cs-uri-stem": f"/{short_id}",
+        "sc-status": str(status),
+        "cs(Referer)": referer or "-",
+        # CloudFront는 공백 등을 인코딩해서 기록
+        "cs(User-Agent)": quote("Mozilla/5.0 (edge harness)", safe=""),
+        "x-edge-result-type": result_type,
+        "x-edge-request-id": request_id,
+        "x-host-header": "s.example.com",
+        "cs-protocol": "https",
+        "cs-bytes": "180",
+        "time-taken": "0.001",
+        "ssl-protocol": "TLSv1.3",
+        "ssl-cipher": "TLS_AES_128_GCM_SHA256",
+        "x-edge-response-result-type": result_type,
+        "cs-protocol-version": "HTTP/2.0",
+        "c-port": "443",
+        "time-to-first-byte": "0.001",
+        "x-edge-detailed-result-type": result_type,
+    }
+    return "\t".join(values.get(name, "-") for name in LOG_FIELDS)
+
+
+def quiet(fn, verbose):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(sys.stdout if verbose else out):
+        return fn()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=1000)
+    parser.add_argument("--clicks", type=int, default=20000)
+    parser.add_argument("--visitors", type=int, default=5000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--requests", type=int, default=2000, help="edge로 보낼 리다이렉트 요청 수")
+    parser.add_argument("--top-n", type=int, default=500)
+    parser.add_argument("--min-clicks", type=int, default=20)
+    parser.add_argument("--window-days", type=int, default=2)
+    parser.add_argument("--python-edge", action="store_true", help="node 대신 Python 조회로 edge 흉내")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="handler 로그 출력")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="edge-harness-")
+    map_file = os.path.join(work, "hotlinks.json")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.update(LAMBDA_ENV)
+    os.environ.update(table_env())
+    os.environ.update({
+        "HOTLINKS_STORE": "file",
+        "HOTLINKS_FILE": map_file,
+        "HOTLINKS_TOP_N": str(args.top_n),
+        "HOTLINKS_MIN_CLICKS": str(args.min_clicks),
+        "HOTLINKS_WINDOW_DAYS": str(args.window_days),
+        # redirect(edge miss) 클릭은 파일로, hotlinks ingest는 아래에서 SQS로 바꿔서 실행
+        "CLICK_SINK_BACKEND": "file",
+        "CLICK_SINK_FILE": os.path.join(work, "clicks.ndjson"),
+    })
+
+    from moto import mock_aws
+    mock = mock_aws()
+    mock.start()
+
+    import boto3
+    boto3.setup_default_session()
+    dynamodb = boto3.resource("dynamodb")
+    create_tables(dynamodb)
+
+    workload = Workload(args.urls, args.clicks, args.visitors, args.zipf, args.seed)
+    # shortId → (Location, 상태 코드, Cache-Control) 기대값
+    expected = {}
+    precise_ids = set()
+    with dynamodb.Table("urls").batch_writer() as batch:
+        for i, item in enumerate(workload.url_items()):
+            policy = POLICIES.get(i % 4)
+            if policy:
+                item["redirectPolicy"] = policy
+            effective = normalize(policy)
+            expected[item["shortId"]] = (item["originalUrl"], effective["status"], cache_control(effective))
+            if effective["preciseClicks"]:
+                precise_ids.add(item["shortId"])
+            batch.put_item(Item=item)
+
+    handlers = {name: load_handler(name) for name in ("click_consumer", "redirect", "hotlinks")}
+    failures = []
+
+    # 1) 클릭 적재 → TOPK#날짜 요약
+    events_per_record = 10
+    for event in sqs_events(workload, max(1, args.clicks // (100 * events_per_record)), 100, events_per_record):
+        quiet(lambda: handlers["click_consumer"].lambda_handler(event, LambdaContext(30)), args.verbose)
+
+    # 2) publish 두 번 (두 번째는 변경 없음)
+    t0 = time.perf_counter()
+    first = quiet(lambda: handlers["hotlinks"].lambda_handler({"job": "publish"}, LambdaContext(60)), args.verbose)
+    publish_ms = (time.perf_counter() - t0) * 1000
+    second = quiet(lambda: handlers["hotlinks"].lambda_handler({"job": "publish"}, LambdaContext(60)), args.verbose)
+    if second["puts"] or second["deletes"]:
+        failures.append(f"republish not idempotent: {second}")
+
+    with open(map_file, encoding="utf-8") as f:
+        redirect_map = json.load(f)
+    for short_id, value in redirect_map.items():
+        status, _, location = value.split(" ", 2)
+        if short_id in precise_ids:
+            failures.append(f"preciseClicks link published to edge map: {short_id}")
+        elif expected.get(short_id, (None, None))[:2] != (location, int(status)):
+            failures.append(f"map entry mismatch: {short_id}")
+
+    # 3) edge → (miss) redirect Lambda
+    requests = []
+    for i in range(args.requests):
+        # 일부는 없는 shortId / 형식이 다른 경로
+        short_id = workload.popular_id() if i % 50 else ("zz" + str(i) if i % 100 else "favicon.ico")
+        requests.append((short_id, f"10.3.{workload.rng.randrange(256)}.{workload.rng.randrange(256)}",
+                         workload.rng.choice(REFERERS)))
+
+    edge_events = [viewer_event(short_id, ip) for short_id, ip, _ in requests]
+    runner = "python"
+    t0 = time.perf_counter()
+    responses = None if args.python_edge else run_edge_node(edge_events, map_file)
+    if responses is None:
+        responses = run_edge_python(edge_events, map_file, handlers["hotlinks"].SHORT_ID_RE)
+    else:
+        runner = "node"
+    edge_ms = (time.perf_counter() - t0) * 1000
+
+    hits = []
+    edge_status = Counter()
+    lambda_ms = []
+    lambda_status = Counter()
+    for (short_id, ip, referer), resp in zip(requests, responses):
+        if resp.get("statusCode") is not None:
+            headers = resp["headers"]
+            got = (headers["location"]["value"], resp["statusCode"], headers["cache-control"]["value"])
+            if got != expected.get(short_id):
+                failures.append(f"edge response mismatch: {short_id} {got}")
+            edge_status[resp["statusCode"]] += 1
+            hits.append((short_id, ip, referer, resp["statusCode"]))
+            continue
+
+        event = {
+            "pathParameters": {"shortId": short_id},
+            "headers": {"User-Agent": "edge-harness", "Referer": referer},
+            "requestContext": {"identity": {"sourceIp": ip}},
+        }
+        t0 = time.perf_counter()
+        result = quiet(lambda: handlers["redirect"].lambda_handler(event, LambdaContext(10)), args.verbose)
+        lambda_ms.append((time.perf_counter() - t0) * 1000)
+        lambda_status[result["statusCode"]] += 1
+        if result["statusCode"] < 400:
+            got = (result["headers"]["Location"], result["statusCode"], result["headers"]["Cache-Control"])
+            if got != expected.get(short_id):
+                failures.append(f"lambda response mismatch: {short_id} {got}")
+
+    # 4) CloudFront 로그 → hotlinks ingest → SQS
+    now = datetime.utcnow()
+    lines = ["#Version: 1.0", "#Fields: " + " ".join(LOG_FIELDS)]
+    for n, (short_id, ip, referer, status) in enumerate(hits):
+        lines.append(log_line(now, short_id, ip, referer, f"req{n:08d}", "FunctionGeneratedResponse", status))
+    # origin(redirect Lambda)이 응답한 요청은 ingest 대상이 아님
+    for n in range(len(requests) - len(hits)):
+        lines.append(log_line(now, "zz0000", "10.9.9.9", "", f"miss{n:08d}", "Miss", 301))
+
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="edge-logs")
+    key = f"E2EXAMPLE.{now.strftime('%Y-%m-%d-%H')}.abcd1234.gz"
+    s3.put_object(Bucket="edge-logs", Key=key, Body=gzip.compress("\n".join(lines).encode("utf-8")))
+
+    sqs = boto3.client("sqs")
+    queue_url = sqs.create_queue(QueueName="clicks")["QueueUrl"]
+    os.environ.update({"CLICK_SINK_BACKEND": "sqs", "CLICK_QUEUE_URL": queue_url})
+    s3_event = {"Records": [{"s3": {"bucket": {"name": "edge-logs"}, "object": {"key": quote(key)}}}]}
+    ingest = quiet(lambda: handlers["hotlinks"].lambda_handler(s3_event, LambdaContext(60)), args.verbose)
+
+    def drain_queue():
+        drained = []
+        while True:
+            resp = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10)
+            if not resp.get("Messages"):
+                return drained
+            for m in resp["Messages"]:
+                drained.append({"messageId": m["MessageId"], "body": m["Body"]})
+                sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=m["ReceiptHandle"])
+
+    def total_clicks(short_ids):
+        consumer = handlers["click_consumer"]
+        items = (consumer.urls_table.get_item(Key={"shortId": s}).get("Item") or {} for s in short_ids)
+        return sum(read_click_count(item, consumer.click_counter.shards_table) for item in items)
+
+    records = drain_queue()
+    queued = [e for r in records for e in json.loads(r["body"])["events"]]
+
+    if Counter(e["shortId"] for e in queued) != Counter(hit[0] for hit in hits):
+        failures.append(f"ingested clicks {len(queued)} != edge hits {len(hits)}")
+    if len({(e["shortId"], e["timestamp"]) for e in queued}) != len(queued):
+        failures.append("ingested clicks share (shortId, timestamp) keys")
+    consumed = quiet(lambda: handlers["click_consumer"].lambda_handler({"Records": records}, LambdaContext(30)),
+                     args.verbose)
+    if consumed.get("batchItemFailures"):
+        failures.append(f"click_consumer failures: {consumed['batchItemFailures']}")
+
+    # S3 재시도로 같은 로그를 다시 보내도 clickCount는 한 번만 증가해야 함
+    hit_ids = {hit[0] for hit in hits}
+    before = total_clicks(hit_ids)
+    quiet(lambda: handlers["hotlinks"].lambda_handler(s3_event, LambdaContext(60)), args.verbose)
+    resent = drain_queue()
+    quiet(lambda: handlers["click_consumer"].lambda_handler({"Records": resent}, LambdaContext(30)), args.verbose)
+    if total_clicks(hit_ids) != before:
+        failures.append(f"resent log double counted: {before} -> {total_clicks(hit_ids)}")
+
+    mock.stop()
+
+    # -------------------------
+    # Report
+    # -------------------------
+    map_bytes = sum(len(k.encode()) + len(v.encode()) for k, v in redirect_map.items())
+    lambda_ms.sort()
+    p50 = lambda_ms[len(lambda_ms) // 2] if lambda_ms else 0.0
+    print(f"urls={args.urls} clicks={args.clicks} zipf={args.zipf} requests={args.requests} edge={runner}")
+    print(f"publish: candidates={first['candidates']} published={first['published']} puts={first['puts']} "
+          f"deletes={first['deletes']} ({publish_ms:.1f} ms), republish puts={second['puts']} "
+          f"deletes={second['deletes']}")
+    print(f"map: {len(redirect_map)} entries, {map_bytes} bytes")
+    print(f"edge hits: {len(hits)}/{len(requests)} ({100.0 * len(hits) / max(1, len(requests)):.1f}%), "
+          f"status {dict(edge_status)}, edge run {edge_ms:.1f} ms total")
+    print(f"redirect Lambda invocations: {len(requests) - len(hits)} (avoided {len(hits)}), "
+          f"status {dict(lambda_status)}, p50 {p50:.2f} ms")
+    print(f"ingest: files={ingest['files']} clicks={ingest['clicks']} queued={len(queued)} "
+          f"messages={len(records)}, resent messages={len(resent)}")
+
+    if failures:
+        print("FAILED")
+        for f in failures[:20]:
+            print(f"  {f}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# bench/fake_openai.py
+"""
+로컬 fake OpenAI 서버 (chat.completions 만 지원)
+- categorize 요청({"task": "categorize_urls", "items": [...]})에 URL 키워드 기반으로 응답
+- 그 외 요청(analyze 인사이트 프롬프트)에는 {"admin": [...], "user": [...]} 고정 응답
+- 응답 지연 / 429 / 5xx 비율을 지정해서 재시도·동시 실행 동작 확인용
+
+    python bench/fake_openai.py --port 8911 --latency 0.5 --rate-limit 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8911/v1 OPENAI_API_KEY=fake ...
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KEYWORDS = [
+    ("news", "news"), ("shop", "shopping"), ("video", "video"), ("blog", "blog"),
+    ("docs", "docs"), ("forum", "community"), ("dev", "dev"),
+]
+
+
+def guess_category(url):
+    for keyword, category in KEYWORDS:
+        if keyword in url:
+            return category
+    return "other"
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenAI/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        srv = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        with srv.lock:
+            srv.requests += 1
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+        try:
+            time.sleep(srv.latency)
+
+            roll = random.random()
+            if roll < srv.rate_limit:
+                with srv.lock:
+                    srv.rate_limited += 1
+                self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}}, {"Retry-After": "0.1"})
+                return
+            if roll < srv.rate_limit + srv.server_error:
+                with srv.lock:
+                    srv.server_errors += 1
+                self._send(500, {"error": {"message": "internal error", "type": "server_error"}})
+                return
+
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}})
+                return
+
+            try:
+                user = json.loads(payload["messages"][-1]["content"])
+            except Exception:
+                user = None
+
+            if isinstance(user, dict) and "items" in user:
+                content = json.dumps({"items": [
+                    {"shortId": it.get("shortId"), "category": guess_category(it.get("url", "")),
+                     "confidence": 0.85, "reason": "fake keyword match"}
+                    for it in user.get("items", [])
+                ]})
+            else:
+                content = json.dumps({"admin": ["fake admin insight"], "user": ["fake user insight"]},
+                                     ensure_ascii=False)
+            self._send(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+        finally:
+            with srv.lock:
+                srv.in_flight -= 1
+
+
+def start_server(port=0, latency=0.0, rate_limit=0.0, server_error=0.0):
+    """백그라운드 스레드로 서버 시작 → (server, base_url)"""
+    srv = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenAIHandler)
+    srv.daemon_threads = True
+    srv.latency = latency
+    srv.rate_limit = rate_limit
+    srv.server_error = server_error
+    srv.lock = threading.Lock()
+    srv.requests = srv.rate_limited = srv.server_errors = 0
+    srv.in_flight = srv.max_in_flight = 0
+
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8911)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 응답 비율")
+    parser.add_argument("--server-error", type=float, default=0.0, help="500 응답 비율")
+    args = parser.parse_args()
+
+    srv, base_url = start_server(args.port, args.latency, args.rate_limit, args.server_error)
+    print(f"fake OpenAI listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+# bench/loadtest.py
+"""
+Lambda handler 오프라인 벤치마크 / 부하 테스트 (배포 없이 in-process 실행)
+
+    python bench/loadtest.py --urls 2000 --clicks 50000 --requests 500
+    python bench/loadtest.py --json result.json                         # 결과 저장
+    python bench/loadtest.py --baseline result.json                     # 이전 결과 대비 회귀 시 exit 1
+
+- DynamoDB: 기본은 moto(in-process), --endpoint http://localhost:8000 이면 DynamoDB Local
+- OpenAI: bench/fake_openai.py 서버 (categorize / analyze 인사이트)
+- 데이터: urls N개, clicks M건 (shortId 인기도는 Zipf 분포, 최근 7일에 분산)
+- 각 handler의 lambda_handler를 순차 호출 (Lambda 컨테이너 1개 기준)하며
+  처리량, p50/p95/p99 지연, 호출당 DynamoDB operation 수, 소비 RCU/WCU 를 측정
+  (moto는 소비 용량을 일부 operation만 돌려주므로 RCU/WCU는 DynamoDB Local 기준이 정확함)
+
+시나리오 순서: click_consumer(클릭 적재) → shorten → redirect → stats → analyze(full/incremental/rollup)
+            → trends_latest → categorize
+"""
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DIR = os.path.join(BENCH_DIR, "..", "lambda")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(LAMBDA_DIR, "common", "python"))
+
+from fake_openai import start_server  # noqa: E402
+from local_dynamodb import DynamoDBMeter, create_tables, table_env  # noqa: E402
+
+DOMAINS = [
+    "news.example.com", "shop.example.com", "video.example.com", "blog.example.com",
+    "docs.example.com", "forum.example.com", "dev.example.com", "www.example.org",
+]
+REFERERS = ["direct", "https://www.google.com/search?q=x", "https://t.co/abc", "https://m.facebook.com/",
+            "https://news.naver.com/main", ""]
+PERIODS = ["1h", "24h", "7d", "7d", "30d"]
+
+# Terraform(modules/lambda) 환경변수와 같은 값 (함수별로 겹치는 키는 값이 같음)
+LAMBDA_ENV = {
+    "BASE_URL": "https://bench.local",
+    "SHORT_ID_STRATEGY": "counter",
+    "SHORT_ID_LENGTH": "7",
+    "SHORT_ID_BLOCK_SIZE": "1000",
+    "DEDUP_URLS": "true",
+    "URL_CACHE_SIZE": "1000",
+    "URL_CACHE_TTL": "60",
+    "URL_CACHE_NEGATIVE_TTL": "30",
+    "TOPK_CAPACITY": "200",
+    "HLL_PRECISION": "12",
+    "MAX_CLICK_PAGES": "20",
+    "ANALYZE_MODE": "incremental",
+    "SCAN_SEGMENTS": "4",
+    "TOP_URLS_SOURCE": "sketch",
+    "TRENDS_PAYLOAD_COMPRESS": "true",
+    "PERIOD": "1h",
+    "DEFAULT_PERIOD": "1h",
+    "WATERMARK_LAG_SECONDS": "0",
+    "CATEGORIZE_LIMIT": "50",
+    "LLM_BATCH_SIZE": "15",
+    "LLM_CONCURRENCY": "4",
+}
+
+
+class LambdaContext:
+    def __init__(self, timeout_seconds):
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def load_handler(name):
+    """lambda/<name>/handler.py 를 <name>_handler 모듈로 import (같은 디렉터리 모듈도 import 가능하게)"""
+    path = os.path.join(LAMBDA_DIR, name)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    spec = importlib.util.spec_from_file_location(f"{name}_handler", os.path.join(path, "handler.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# -------------------------
+# Workload
+# -------------------------
+class Workload:
+    def __init__(self, urls, clicks, visitors, zipf, seed):
+        self.rng = random.Random(seed)
+        self.short_ids = [f"b{i:06d}" for i in range(urls)]
+        weights = [1.0 / ((i + 1) ** zipf) for i in range(urls)]
+        total = 0.0
+        self.cum_weights = []
+        for w in weights:
+            total += w
+            self.cum_weights.append(total)
+        self.clicks = clicks
+        self.visitors = [hashlib.sha256(f"10.1.{i}".encode()).hexdigest()[:16] for i in range(visitors)]
+
+    def popular_id(self):
+        return self.rng.choices(self.short_ids, cum_weights=self.cum_weights)[0]
+
+    def url_for(self, i):
+        return f"https://{DOMAINS[i % len(DOMAINS)]}/post/{i}"
+
+    def url_items(self):
+        now = datetime.utcnow()
+        for i, short_id in enumerate(self.short_ids):
+            item = {
+                "shortId": short_id,
+                "originalUrl": self.url_for(i),
+                "title": "",
+                "createdAt": (now - timedelta(seconds=i)).isoformat(),
+                "clickCount": 0,
+            }
+            # 절반은 categorize 대기
+            if i % 2 == 0:
+                item["categoryStatus"] = "pending"
+            yield item
+
+    def click_events(self, count=None):
+        now = datetime.utcnow()
+        for _ in range(count if count is not None else self.clicks):
+            yield {
+                "shortId": self.popular_id(),
+                "timestamp": (now - timedelta(seconds=self.rng.uniform(60, 7 * 86400))).isoformat(),
+                "ip": self.rng.choice(self.visitors),
+                "userAgent": "bench",
+                "referer": self.rng.choice(REFERERS),
+            }
+
+
+# -------------------------
+# Measurement
+# -------------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def run_scenario(name, meter, invocations, fn, verbose=False):
+    """invocations: 이벤트 iterable, fn(event) → 응답 dict"""
+    latencies = []
+    errors = 0
+    calls0, rcu0, wcu0 = meter.snapshot()
+    start = time.perf_counter()
+
+    for event in invocations:
+        t0 = time.perf_counter()
+        try:
+            out = io.StringIO()
+            with contextlib.redirect_stdout(sys.stdout if verbose else out):
+                resp = fn(event)
+            if isinstance(resp, dict) and int(resp.get("statusCode", 200)) >= 500:
+                errors += 1
+            if isinstance(resp, dict) and resp.get("batchItemFailures"):
+                errors += 1
+        except Exception as e:
+            errors += 1
+            print(f"  [{name}] error: {e}")
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    elapsed = time.perf_counter() - start
+    calls1, rcu1, wcu1 = meter.snapshot()
+    n = max(1, len(latencies))
+    calls = calls1 - calls0
+    latencies.sort()
+
+    return {
+        "n": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "ddbCallsPerInv": sum(calls.values()) / n,
+        "rcuPerInv": (rcu1 - rcu0) / n,
+        "wcuPerInv": (wcu1 - wcu0) / n,
+        "ops": {op: round(c / n, 2) for op, c in calls.most_common()},
+    }
+
+
+def print_results(results):
+    print(f"{'scenario':<24}{'n':>6}{'err':>5}{'inv/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'ddb/inv':>9}{'RCU/inv':>9}{'WCU/inv':>9}  ops/inv")
+    for name, r in results.items():
+        ops = ", ".join(f"{op}={c}" for op, c in list(r["ops"].items())[:4])
+        print(f"{name:<24}{r['n']:>6}{r['errors']:>5}{r['throughput']:>9.1f}{r['p50']:>9.2f}{r['p95']:>9.2f}"
+              f"{r['p99']:>9.2f}{r['ddbCallsPerInv']:>9.2f}{r['rcuPerInv']:>9.2f}{r['wcuPerInv']:>9.2f}  {ops}")
+
+
+def compare_baseline(results, baseline, tolerance, latency_tolerance):
+    """
+    호출당 DynamoDB 호출 수 / 소비 용량이 tolerance, p95 지연이 latency_tolerance 이상 늘면 회귀
+    (지연은 실행 환경 잡음이 커서 기준을 따로 둠, 같은 --urls/--clicks/--requests 로 비교해야 의미 있음)
+    """
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ("p95", "ddbCallsPerInv", "rcuPerInv", "wcuPerInv"):
+            # 아주 작은 값은 측정 잡음이 커서 절대 여유값을 둠
+            tol, slack = (latency_tolerance, 1.0) if key == "p95" else (tolerance, 0.05)
+            if r[key] > base[key] * (1 + tol) + slack:
+                regressions.append(f"{name}.{key}: {base[key]:.2f} -> {r[key]:.2f}")
+        if r["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}.errors: {base.get('errors', 0)} -> {r['errors']}")
+    return regressions
+
+
+# -------------------------
+# Scenarios
+# -------------------------
+def sqs_events(workload, batches, records_per_batch, events_per_record):
+    """click_consumer SQS 트리거 이벤트 (redirect click_sink가 보내는 메시지 형태)"""
+    stream = workload.click_events(batches * records_per_batch * events_per_record)
+    for b in range(batches):
+        records = []
+        for r in range(records_per_batch):
+            events = [next(stream) for _ in range(events_per_record)]
+            records.append({"messageId": f"m{b}-{r}", "body": json.dumps(events)})
+        yield {"Records": records}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=1000)
+    parser.add_argument("--clicks", type=int, default=20000)
+    parser.add_argument("--visitors", type=int, default=5000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--requests", type=int, default=300, help="redirect / stats / shorten / trends_latest 호출 수")
+    parser.add_argument("--analyze-runs", type=int, default=2)
+    parser.add_argument("--categorize-runs", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--endpoint", default="", help="DynamoDB Local endpoint (없으면 moto)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", default="", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", default="", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="DynamoDB 호출 수 / 소비 용량 허용 증가율")
+    parser.add_argument("--latency-tolerance", type=float, default=0.5, help="p95 지연 허용 증가율")
+    parser.add_argument("--verbose", action="store_true", help="handler 로그 출력")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.update(LAMBDA_ENV)
+    os.environ.update(table_env())
+
+    srv, base_url = start_server(0, args.llm_latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "fake"
+
+    click_file = os.path.join(tempfile.mkdtemp(), "clicks.ndjson")
+    os.environ["CLICK_SINK_BACKEND"] = "file"
+    os.environ["CLICK_SINK_FILE"] = click_file
+
+    mock = None
+    if args.endpoint:
+        os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = args.endpoint
+    else:
+        from moto import mock_aws
+        mock = mock_aws()
+        mock.start()
+
+    import boto3
+    boto3.setup_default_session()
+    meter = DynamoDBMeter()
+    meter.install(boto3.DEFAULT_SESSION)
+
+    dynamodb = boto3.resource("dynamodb")
+    create_tables(dynamodb)
+
+    workload = Workload(args.urls, args.clicks, args.visitors, args.zipf, args.seed)
+    with dynamodb.Table("urls").batch_writer() as batch:
+        for item in workload.url_items():
+            batch.put_item(Item=item)
+
+    handlers = {name: load_handler(name) for name in (
+        "click_consumer", "shorten", "redirect", "stats", "analyze", "trends_latest", "categorize",
+    )}
+    results = {}
+    print(f"urls={args.urls} clicks={args.clicks} zipf={args.zipf} requests={args.requests} "
+          f"backend={'dynamodb-local' if args.endpoint else 'moto'}")
+
+    # 1) 클릭 적재 (SQS 배치 100 records × 메시지당 이벤트 수)
+    events_per_record = 10
+    batches = max(1, args.clicks // (100 * events_per_record))
+    results["click_consumer"] = run_scenario(
+        "click_consumer", meter, sqs_events(workload, batches, 100, events_per_record),
+        lambda e: handlers["click_consumer"].lambda_handler(e, LambdaContext(30)), args.verbose)
+
+    # 2) shorten (20%는 같은 URL 재요청 → dedup)
+    def shorten_events():
+        for i in range(args.requests):
+            url = f"https://{DOMAINS[i % len(DOMAINS)]}/new/{i if i % 5 else i // 5}"
+            yield {"body": json.dumps({"url": url})}
+    results["shorten"] = run_scenario(
+        "shorten", meter, shorten_events(),
+        lambda e: handlers["shorten"].lambda_handler(e, LambdaContext(30)), args.verbose)
+
+    # 3) redirect (Zipf 인기도, 클릭은 file 싱크로)
+    def redirect_events():
+        for _ in range(args.requests):
+            yield {
+                "pathParameters": {"shortId": workload.popular_id()},
+                "headers": {"User-Agent": "bench", "Referer": workload.rng.choice(REFERERS)},
+                "requestContext": {"identity": {"sourceIp": f"10.2.{workload.rng.randrange(5000)}"}},
+            }
+    results["redirect"] = run_scenario(
+        "redirect", meter, redirect_events(),
+        lambda e: handlers["redirect"].lambda_handler(e, LambdaContext(10)), args.verbose)
+
+    # 4) stats
+    def stats_events():
+        for _ in range(args.requests):
+            yield {
+                "pathParameters": {"shortId": workload.popular_id()},
+                "queryStringParameters": {"period": workload.rng.choice(PERIODS)},
+            }
+    results["stats"] = run_scenario(
+        "stats", meter, stats_events(),
+        lambda e: handlers["stats"].lambda_handler(e, LambdaContext(30)), args.verbose)
+
+    # 5) analyze (첫 full 실행이 체크포인트를 만들고, 이후 incremental / rollup)
+    for mode in ("full", "incremental", "rollup"):
+        results[f"analyze.{mode}"] = run_scenario(
+            f"analyze.{mode}", meter, ({"mode": mode} for _ in range(args.analyze_runs)),
+            lambda e: handlers["analyze"].lambda_handler(e, LambdaContext(60)), args.verbose)
+
+    # 6) trends_latest (절반은 If-None-Match 재요청)
+    first = handlers["trends_latest"].lambda_handler({"queryStringParameters": {"view": "user"}}, None)
+    etag = (first.get("headers") or {}).get("ETag", "")
+
+    def trends_events():
+        for i in range(args.requests):
+            headers = {"accept-encoding": "gzip"}
+            if i % 2:
+                headers["if-none-match"] = etag
+            yield {"queryStringParameters": {"view": "user" if i % 3 else "admin"}, "headers": headers}
+    results["trends_latest"] = run_scenario(
+        "trends_latest", meter, trends_events(),
+        lambda e: handlers["trends_latest"].lambda_handler(e, None), args.verbose)
+
+    # 7) categorize (룰 / 캐시 / fake LLM)
+    results["categorize"] = run_scenario(
+        "categorize", meter, ({} for _ in range(args.categorize_runs)),
+        lambda e: handlers["categorize"].lambda_handler(e, LambdaContext(120)), args.verbose)
+
+    print_results(results)
+    print(f"fake OpenAI requests={srv.requests}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_baseline(results, json.load(f), args.tolerance, args.latency_tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print("  " + line)
+            status = 1
+        else:
+            print(f"no regressions (tolerance {args.tolerance:.0%}, latency {args.latency_tolerance:.0%})")
+
+    srv.shutdown()
+    if mock is not None:
+        mock.stop()
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
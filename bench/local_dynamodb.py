@@ -0,0 +1,168 @@
+# bench/local_dynamodb.py
+"""
+벤치마크용 로컬 DynamoDB
+- create_tables: Terraform(modules/dynamodb)과 같은 키/GSI 구성으로 테이블 생성 (moto 또는 DynamoDB Local)
+- DynamoDBMeter: boto3 기본 세션 이벤트에 훅을 걸어 operation별 호출 수 / 소비 용량(RCU, WCU) 집계
+  (모든 요청에 ReturnConsumedCapacity=TOTAL 추가 → handler 코드는 수정하지 않음)
+
+DynamoDB Local 사용 시: AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000
+"""
+import threading
+from collections import Counter
+
+# 이름은 Lambda 환경변수 값과 같게 사용
+TABLES = {
+    "urls": {
+        "KeySchema": [{"AttributeName": "shortId", "KeyType": "HASH"}],
+        "AttributeDefinitions": [
+            {"AttributeName": "shortId", "AttributeType": "S"},
+            {"AttributeName": "categoryStatus", "AttributeType": "S"},
+            {"AttributeName": "createdAt", "AttributeType": "S"},
+        ],
+        "GlobalSecondaryIndexes": [{
+            "IndexName": "byCategoryStatus",
+            "KeySchema": [
+                {"AttributeName": "categoryStatus", "KeyType": "HASH"},
+                {"AttributeName": "createdAt", "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": ["originalUrl", "title"]},
+        }],
+    },
+    "clicks": {
+        "KeySchema": [
+            {"AttributeName": "shortId", "KeyType": "HASH"},
+            {"AttributeName": "timestamp", "KeyType": "RANGE"},
+        ],
+        "AttributeDefinitions": [
+            {"AttributeName": "shortId", "AttributeType": "S"},
+            {"AttributeName": "timestamp", "AttributeType": "S"},
+            {"AttributeName": "hourBucket", "AttributeType": "S"},
+        ],
+        "GlobalSecondaryIndexes": [{
+            "IndexName": "byHour",
+            "KeySchema": [
+                {"AttributeName": "hourBucket", "KeyType": "HASH"},
+                {"AttributeName": "timestamp", "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": ["referer"]},
+        }],
+    },
+    "trends": {
+        "KeySchema": [
+            {"AttributeName": "period", "KeyType": "HASH"},
+            {"AttributeName": "generatedAt", "KeyType": "RANGE"},
+        ],
+        "AttributeDefinitions": [
+            {"AttributeName": "period", "AttributeType": "S"},
+            {"AttributeName": "generatedAt", "AttributeType": "S"},
+        ],
+    },
+    "click_rollups": {
+        "KeySchema": [{"AttributeName": "bucket", "KeyType": "HASH"}],
+        "AttributeDefinitions": [{"AttributeName": "bucket", "AttributeType": "S"}],
+    },
+    "counters": {
+        "KeySchema": [{"AttributeName": "name", "KeyType": "HASH"}],
+        "AttributeDefinitions": [{"AttributeName": "name", "AttributeType": "S"}],
+    },
+    "url_hashes": {
+        "KeySchema": [{"AttributeName": "urlHash", "KeyType": "HASH"}],
+        "AttributeDefinitions": [{"AttributeName": "urlHash", "AttributeType": "S"}],
+    },
+    "category_cache": {
+        "KeySchema": [{"AttributeName": "pattern", "KeyType": "HASH"}],
+        "AttributeDefinitions": [
+            {"AttributeName": "pattern", "AttributeType": "S"},
+            {"AttributeName": "learned", "AttributeType": "S"},
+        ],
+        "GlobalSecondaryIndexes": [{
+            "IndexName": "byLearned",
+            "KeySchema": [{"AttributeName": "learned", "KeyType": "HASH"}],
+            "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": ["learnedCategory", "learnedConfidence", "learnedAt"]},
+        }],
+    },
+    "click_counters": {
+        "KeySchema": [
+            {"AttributeName": "shortId", "KeyType": "HASH"},
+            {"AttributeName": "shard", "KeyType": "RANGE"},
+        ],
+        "AttributeDefinitions": [
+            {"AttributeName": "shortId", "AttributeType": "S"},
+            {"AttributeName": "shard", "AttributeType": "N"},
+        ],
+    },
+}
+
+# Lambda 환경변수 → 테이블 이름
+TABLE_ENV = {
+    "URLS_TABLE": "urls",
+    "CLICKS_TABLE": "clicks",
+    "TRENDS_TABLE": "trends",
+    "ROLLUPS_TABLE": "click_rollups",
+    "COUNTERS_TABLE": "counters",
+    "URL_HASHES_TABLE": "url_hashes",
+    "CATEGORY_CACHE_TABLE": "category_cache",
+    "CLICK_COUNTERS_TABLE": "click_counters",
+}
+
+
+def create_tables(dynamodb, prefix=""):
+    """dynamodb: boto3 resource, 이미 있는 테이블은 지우고 새로 만듦"""
+    existing = set(dynamodb.meta.client.list_tables().get("TableNames", []))
+    for name, spec in TABLES.items():
+        full = prefix + name
+        if full in existing:
+            dynamodb.Table(full).delete()
+            dynamodb.meta.client.get_waiter("table_not_exists").wait(TableName=full)
+        dynamodb.create_table(TableName=full, BillingMode="PAY_PER_REQUEST", **spec)
+        dynamodb.meta.client.get_waiter("table_exists").wait(TableName=full)
+
+
+def table_env(prefix=""):
+    return {env: prefix + name for env, name in TABLE_ENV.items()}
+
+
+_CAPACITY_OPS = {
+    "GetItem", "PutItem", "UpdateItem", "DeleteItem", "Query", "Scan",
+    "BatchGetItem", "BatchWriteItem", "TransactGetItems", "TransactWriteItems",
+}
+_READ_OPS = {"GetItem", "Query", "Scan", "BatchGetItem", "TransactGetItems"}
+
+
+class DynamoDBMeter:
+    """
+    install(boto3.Session) 이후 만들어진 client/resource의 DynamoDB 호출을 집계
+    - handler 모듈이 import 시점에 boto3.resource()를 만들기 때문에 import 전에 설치해야 함
+    - analyze 병렬 scan 등 스레드에서 호출되므로 lock 사용
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = Counter()
+        self.rcu = 0.0
+        self.wcu = 0.0
+
+    def install(self, session):
+        session.events.register("provide-client-params.dynamodb.*", self._add_capacity_param)
+        session.events.register("after-call.dynamodb.*", self._record)
+
+    def _add_capacity_param(self, params, model, **kwargs):
+        if model.name in _CAPACITY_OPS:
+            params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+    def _record(self, parsed, model, **kwargs):
+        consumed = parsed.get("ConsumedCapacity") if isinstance(parsed, dict) else None
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        units = sum(float(c.get("CapacityUnits", 0) or 0) for c in consumed or [])
+
+        with self._lock:
+            self.calls[model.name] += 1
+            if model.name in _READ_OPS:
+                self.rcu += units
+            else:
+                self.wcu += units
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.calls), self.rcu, self.wcu
@@ -1,5 +1,6 @@
 import type {
   ShortenResponse,
+  StatsPeriod,
   StatsResponse,
   TrendsResponse,
   TrendPeriod,
@@ -82,8 +83,9 @@ export async function shortenUrl(originalUrl: string, title?: string): Promise<S
 
 
 /** Get statistics for a short URL */
-export async function getStats(shortId: string): Promise<StatsResponse> {
-  return request<StatsResponse>(`/stats/${shortId}`);
+export async function getStats(shortId: string, period?: StatsPeriod): Promise<StatsResponse> {
+  const query = period ? `?period=${period}` : "";
+  return request<StatsResponse>(`/stats/${shortId}${query}`);
 }
 
 /** Get trend data for a given period */
@@ -4,18 +4,25 @@ export interface ShortenResponse {
   shortUrl: string;
 }
 
+/** Period accepted by GET /stats/{shortId}?period= */
+export type StatsPeriod = "1h" | "24h" | "7d" | "30d";
+
 /** Response from GET /stats/{shortId} */
 export interface StatsResponse {
   shortId: string;
   originalUrl: string;
   title: string;
   totalClicks: number;
+  period?: StatsPeriod;
+  truncated?: boolean; // 페이지 제한으로 일부 클릭만 집계된 경우
   stats: {
+    totalClicks?: number; // 선택한 period 내 클릭 수 (최상위 totalClicks는 누적)
     clicksByHour: Record<string, number>;
     clicksByDay: Record<string, number>;
     clicksByReferer: Record<string, number>;
     peakHour: number | string;   // 백엔드에서 "16"처럼 string일 수도 있어 안전하게
     topReferer: string | null;
+    uniqueVisitors?: number | null; // 기간 내 고유 방문자 (HyperLogLog 근사, 집계 불가 시 null)
   };
 }
 
@@ -64,6 +71,7 @@ export interface TrendsResponse {
       clicksByReferer?: Record<string, number>;
       peakHour?: string | number | null;
       topReferer?: string | null;
+      uniqueVisitors?: number | null; // 최근 7일 고유 방문자 (HyperLogLog 근사)
     };
     insights?: TrendInsights; // string -> 유니온으로 변경, optional 처리
   };
@@ -1,20 +1,76 @@
 # lambda/analyze/handler.py
 import json
-import boto3
+import heapq
 import os
+import queue
+import threading
 from datetime import datetime, timedelta, timezone
 from collections import Counter, defaultdict
-from openai import OpenAI
-
-dynamodb = boto3.resource("dynamodb")
-urls_table = dynamodb.Table(os.environ.get("URLS_TABLE", "urls"))
-clicks_table = dynamodb.Table(os.environ.get("CLICKS_TABLE", "clicks"))
-trends_table = dynamodb.Table(os.environ.get("TRENDS_TABLE", "trends"))
+from boto3.dynamodb.conditions import Key
+
+# 공통 layer (lambda/common/python)
+import metrics
+import runtime
+from click_agg import (
+    OTHER_REFERER, ClickAggregator, click_referer, click_ts, click_visitor, expire_hours, summarize_hours,
+    to_click_ts,
+)
+from click_counter import read_click_count, shards_table_from_env
+from hll import HyperLogLog, merge_sketches
+from topk import SpaceSaving, exact_top_k, merge_summaries, summary_buckets
+from trend_payload import build_payload_items
+
+# resource / client는 첫 DynamoDB 호출 때 생성
+dynamodb = runtime.lazy_resource("dynamodb")
+urls_table = runtime.table(os.environ.get("URLS_TABLE", "urls"))
+clicks_table = runtime.table(os.environ.get("CLICKS_TABLE", "clicks"))
+trends_table = runtime.table(os.environ.get("TRENDS_TABLE", "trends"))
+
+# click_consumer가 갱신하는 시간/일 버킷 집계 테이블
+ROLLUPS_TABLE = os.environ.get("ROLLUPS_TABLE", "")
+rollups_table = runtime.table(ROLLUPS_TABLE) if ROLLUPS_TABLE else None
+# 샤딩된 clickCount (click_counters 테이블)
+counter_shards_table = shards_table_from_env()
 
 PERIOD = os.environ.get("PERIOD", "1h")  # 실행 주기 라벨
-MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# 클릭 집계 방식
+# - incremental: trends 테이블의 체크포인트 이후 클릭만 반영 (체크포인트 없으면 full)
+# - full       : clicks 전체 scan (체크포인트 새로 저장)
+# - rollup     : click_rollups 시간 버킷 조회
+ANALYZE_MODE = os.environ.get("ANALYZE_MODE", "incremental")
+CHECKPOINT_PERIOD = f"{PERIOD}#checkpoint"
+# 클릭은 click_consumer를 거쳐 늦게 저장되므로 워터마크를 현재보다 조금 뒤로 둠
+WATERMARK_LAG_SECONDS = int(os.environ.get("WATERMARK_LAG_SECONDS", "300"))
+# 원래 timestamp로 늦게 저장되는 클릭(edge 클릭은 CloudFront 로그 전달 지연만큼 늦음)을 위해
+# 체크포인트에는 이 시간보다 오래된 클릭만 넣고, 그 이후 구간은 실행마다 다시 읽음
+LATE_ARRIVAL_SECONDS = int(os.environ.get("LATE_ARRIVAL_SECONDS", "7200"))
+# clicks 테이블 GSI (hourBucket + timestamp)
+CLICKS_TIME_INDEX = os.environ.get("CLICKS_TIME_INDEX", "byHour")
+MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+# topUrls 계산 방식
+# - sketch  : click_consumer가 갱신하는 일별 SpaceSaving 요약(TOPK#날짜[#샤드]) merge (근사, 최근 7일)
+# - exact   : 요약 merge 결과를 후보로, shortId별 일 카운터(S#shortId#날짜) 합산 후 heap (정확, 최근 7일)
+# - lifetime: urls scan 중 누적 clickCount 기준 (기존 방식)
+TOP_URLS_SOURCE = os.environ.get("TOP_URLS_SOURCE", "sketch" if rollups_table is not None else "lifetime")
+TOP_URLS_LIMIT = 10
+# backfill 시 만드는 일별 요약 크기 / 시간 버킷 referer 상한 / 버킷 TTL (click_consumer와 같게)
+TOPK_CAPACITY = int(os.environ.get("TOPK_CAPACITY", "200"))
+TOPK_SHARDS = int(os.environ.get("TOPK_SHARDS", "8"))
+ROLLUP_MAX_REFERERS = int(os.environ.get("ROLLUP_MAX_REFERERS", "100"))
+ROLLUP_TTL_DAYS = int(os.environ.get("ROLLUP_TTL_DAYS", "40"))
+# trends_latest용 view별 응답 payload를 gzip으로 저장할지
+TRENDS_PAYLOAD_COMPRESS = os.environ.get("TRENDS_PAYLOAD_COMPRESS", "false").lower() == "true"
+
+# full scan 병렬 세그먼트 수 (1이면 순차 scan)
+SCAN_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", "4"))
+
+# scan 시 필요한 속성만 전송 (timestamp/source 등 예약어라 이름 치환)
+URL_SCAN_ATTRS = ["shortId", "clickCount", "counterShards", "originalUrl", "category", "cat"]
+CLICK_SCAN_ATTRS = ["shortId", "timestamp", "referer", "referrer", "source", "ip"]
+
+# openai import / client 생성은 첫 AI 분석 때 (backfill 등 LLM을 안 쓰는 경로는 비용 없음)
+client = runtime.lazy_openai(api_key=os.environ.get("OPENAI_API_KEY"))
 
 # -------------------------
 # Helpers
@@ -39,24 +95,91 @@ def extract_domain(url: str) -> str:
     except Exception:
         return "unknown"
 
-def _normalize_referer(raw: str) -> str:
-    if not raw:
-        return "direct"
-    raw = str(raw).strip()
-    if raw in ("-", "null", "None"):
-        return "direct"
-    if raw.startswith("http://") or raw.startswith("https://"):
-        return extract_domain(raw) or "direct"
-    return raw
-
-def _scan_all(table):
-    """DynamoDB scan pagination 처리"""
+def _projection(attrs):
+    names = {f"#p{i}": a for i, a in enumerate(attrs)}
+    return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+
+def _put_until_stopped(out, item, stop):
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _scan_segment(table, kwargs, out, stop):
+    """세그먼트 하나를 끝까지 scan 하면서 페이지를 out 큐에 넣음 (스레드에서 실행)"""
+    # 스레드에서 호출되므로 resource 대신 thread-safe한 client 사용 (타입 변환은 resource와 동일)
+    client = table.meta.client
+    kwargs = dict(kwargs)
+    try:
+        while True:
+            resp = client.scan(TableName=table.name, **kwargs)
+            if not _put_until_stopped(out, resp.get("Items", []), stop):
+                return
+            if "LastEvaluatedKey" not in resp:
+                break
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+    except Exception as e:
+        _put_until_stopped(out, e, stop)
+    finally:
+        _put_until_stopped(out, None, stop)
+
+def _scan_pages(table, attrs=None, segments=None):
+    """
+    DynamoDB scan 페이지 단위 generator (전체를 리스트로 모으지 않음)
+    - segments > 1 이면 Segment/TotalSegments 병렬 scan, 페이지는 도착 순서대로 yield
+      (큐 크기 제한 → 소비가 늦으면 scan 스레드가 기다리므로 메모리는 일정)
+    - attrs: ProjectionExpression으로 받을 속성
+    """
+    segments = max(1, segments or SCAN_SEGMENTS)
+    kwargs = _projection(attrs) if attrs else {}
+
+    if segments == 1:
+        while True:
+            resp = table.scan(**kwargs)
+            yield resp.get("Items", [])
+            if "LastEvaluatedKey" not in resp:
+                return
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    out = queue.Queue(maxsize=segments * 2)
+    # 소비 쪽이 중간에 멈추면(예외/close) scan 스레드도 정리
+    stop = threading.Event()
+    for i in range(segments):
+        threading.Thread(
+            target=_scan_segment,
+            args=(table, {**kwargs, "Segment": i, "TotalSegments": segments}, out, stop),
+            daemon=True,
+        ).start()
+
+    try:
+        remaining = segments
+        while remaining:
+            page = out.get()
+            if page is None:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        stop.set()
+
+def _scan_items(table, attrs=None):
+    for page in _scan_pages(table, attrs):
+        yield from page
+
+def _batch_get(table, keys, attrs=None):
+    """BatchGetItem (100개 단위 + UnprocessedKeys 재시도)"""
     items = []
-    resp = table.scan()
-    items.extend(resp.get("Items", []))
-    while "LastEvaluatedKey" in resp:
-        resp = table.scan(ExclusiveStartKey=resp["LastEvaluatedKey"])
-        items.extend(resp.get("Items", []))
+    for i in range(0, len(keys), 100):
+        request = {table.name: {"Keys": keys[i:i + 100], **(_projection(attrs) if attrs else {})}}
+        while request:
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(resp.get("Responses", {}).get(table.name, []))
+            request = resp.get("UnprocessedKeys") or None
     return items
 
 def _safe_int(v, default=0):
@@ -74,13 +197,29 @@ def _safe_json_loads(s: str):
 # -------------------------
 # Main
 # -------------------------
+@metrics.handler("analyze")
 def lambda_handler(event, context):
     """주기적으로 실행되어 트렌드 분석 (EventBridge 트리거)"""
+    event = event or {}
     try:
-        stats = collect_weekly_stats()
+        if event.get("job") == "backfill_rollups":
+            result = backfill_rollups(days=_safe_int(event.get("days", 7), 7))
+            return {"statusCode": 200, "body": json.dumps(result, ensure_ascii=False)}
+
+        mode = event.get("mode") or ANALYZE_MODE
+        now = _utcnow()
+        with metrics.timer("collect_stats"):
+            stats = collect_weekly_stats(mode=mode, now=now)
+
+        # 검증: 같은 시점 기준 full scan 결과와 비교 (체크포인트는 덮어쓰지 않음)
+        verification = None
+        if event.get("verify"):
+            verification = verify_click_stats(stats, now)
+            print("verify:", json.dumps(verification, ensure_ascii=False))
+
         insights = analyze_with_ai(stats)  # dict: {"admin":[...], "user":[...]}
 
-        generated_at = _utcnow().replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        generated_at = now.replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
         item = {
             "period": PERIOD,
@@ -92,97 +231,440 @@ def lambda_handler(event, context):
             "totalUrls": _safe_int(stats.get("totalUrls", 0)),
         }
 
-        trends_table.put_item(Item=item)
+        with metrics.timer("save"):
+            trends_table.put_item(Item=item)
+            _save_payloads(item)
+
+        body = {"period": PERIOD, "generatedAt": generated_at, "mode": mode, "stats": stats, "insights": insights}
+        if verification is not None:
+            body["verification"] = verification
 
         return {
             "statusCode": 200,
-            "body": json.dumps(
-                {"period": PERIOD, "generatedAt": generated_at, "stats": stats, "insights": insights},
-                ensure_ascii=False,
-            ),
+            "body": json.dumps(body, ensure_ascii=False),
         }
 
     except Exception as e:
         print(f"Error: {str(e)}")
         return {"statusCode": 500, "body": json.dumps({"error": str(e)}, ensure_ascii=False)}
 
-def collect_weekly_stats():
+def _save_payloads(item):
+    """
+    trends_latest가 GetItem 1회로 그대로 응답하도록 view별 body를 미리 직렬화해서 저장
+    - view 2개뿐이라 put_item (trends 테이블 권한은 GetItem / PutItem / Query)
+    - 실패해도 trends_latest는 payload의 trendGeneratedAt이 최신 trend와 다르면
+      최신 trend item을 직접 읽는 방식으로 동작하므로 로그만
+    """
+    try:
+        for payload in build_payload_items(item, PERIOD, compress=TRENDS_PAYLOAD_COMPRESS):
+            trends_table.put_item(Item=payload)
+    except Exception as e:
+        print(f"Failed to save trend payloads: {str(e)}")
+
+def collect_weekly_stats(mode=None, now=None):
     """
     주간 통계 수집 (전체 서비스 기준)
     - urls_table: totalUrls, topUrls, topDomains, categoryCounts
-    - clicks_table: clicksByHour, clicksByDay, clicksByReferer, peakHour, topReferer (+ totalClicks 계산)
+    - clicks(mode별 집계): clicksByHour, clicksByDay, clicksByReferer, peakHour, topReferer, uniqueVisitors (+ totalClicks 계산)
     """
-    since = _utcnow() - timedelta(days=7)
-
-    # 1) URL 데이터
-    urls = _scan_all(urls_table)
-    total_urls = len(urls)
-
-    # Top URLs: clickCount 기준
-    top_urls = sorted(urls, key=lambda x: _safe_int(x.get("clickCount", 0)), reverse=True)[:10]
+    mode = mode or ANALYZE_MODE
+    now = now or _utcnow()
 
-    # destination domain 집계 (urls 기준)
-    domains = [extract_domain(u.get("originalUrl", "")) for u in urls]
-    domain_counts = Counter(domains).most_common(10)
+    top_source = TOP_URLS_SOURCE if rollups_table is not None else "lifetime"
 
-    # 카테고리 집계 (urls_table에 category가 있다고 가정, 없으면 unknown)
-    categories = [(u.get("category") or u.get("cat") or "unknown") for u in urls]
-    category_counts = Counter(categories).most_common(10)
+    # 1) URL 데이터 (한 번 훑으면서 전부 집계, 목록은 보관하지 않음)
+    total_urls = 0
+    top_heap = []  # (lifetime) clickCount 상위 10개 (min-heap)
+    domain_counter = Counter()
+    category_counter = Counter()
 
-    # 2) Click 데이터 (7일치만)
-    clicks = _scan_all(clicks_table)
+    for u in _scan_items(urls_table, URL_SCAN_ATTRS):
+        total_urls += 1
 
-    clicks_by_hour = defaultdict(int)
-    clicks_by_day = defaultdict(int)
-    clicks_by_referer = defaultdict(int)
+        # Top URLs: 누적 clickCount 기준 (lifetime 모드, 샤딩된 링크는 샤드 합계 포함)
+        if top_source == "lifetime":
+            entry = (read_click_count(u, counter_shards_table), -total_urls, u.get("shortId"))
+            if len(top_heap) < TOP_URLS_LIMIT:
+                heapq.heappush(top_heap, entry)
+            elif entry > top_heap[0]:
+                heapq.heapreplace(top_heap, entry)
 
-    total_clicks_7d = 0
+        # destination domain 집계 (urls 기준)
+        domain_counter[extract_domain(u.get("originalUrl", ""))] += 1
 
-    for c in clicks:
-        ts = c.get("timestamp")
-        dt = _parse_iso(ts) if isinstance(ts, str) else None
-        if not dt:
-            continue
-
-        # naive면 UTC로 간주
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-
-        if dt < since:
-            continue
+        # 카테고리 집계 (urls_table에 category가 있다고 가정, 없으면 unknown)
+        category_counter[u.get("category") or u.get("cat") or "unknown"] += 1
 
-        total_clicks_7d += 1
-        clicks_by_hour[str(dt.hour)] += 1
-        clicks_by_day[dt.date().isoformat()] += 1
+    if top_source == "lifetime":
+        top_urls = [{"shortId": sid, "clicks": clicks} for clicks, _, sid in sorted(top_heap, reverse=True)]
+    else:
+        top_urls = top_urls_from_rollups(now, exact=(top_source == "exact"))
+    domain_counts = domain_counter.most_common(10)
+    category_counts = category_counter.most_common(10)
 
-        ref = _normalize_referer(c.get("referer") or c.get("referrer") or c.get("source"))
-        clicks_by_referer[ref] += 1
+    metrics.put("urls.scanned", total_urls)
 
-    peak_hour = None
-    if clicks_by_hour:
-        peak_hour = max(clicks_by_hour.items(), key=lambda kv: kv[1])[0]
-
-    top_referer = None
-    if clicks_by_referer:
-        top_referer = max(clicks_by_referer.items(), key=lambda kv: kv[1])[0]
+    # 2) Click 데이터 (최근 7×24 시간 버킷)
+    click_stats = collect_click_stats(mode, now)
 
     return {
         "totalUrls": total_urls,
-        "totalClicks": total_clicks_7d,  # 최근 7일 클릭 합
-        "topUrls": [{"shortId": u.get("shortId"), "clicks": _safe_int(u.get("clickCount", 0))} for u in top_urls],
+        "totalClicks": click_stats["totalClicks"],  # 최근 7일 클릭 합
+        "topUrls": top_urls,  # sketch/exact: 최근 7일 클릭, lifetime: 누적 클릭
         "topDomains": [{"domain": d, "count": c} for d, c in domain_counts],
 
         # 사용자용 UI(카테고리 카드) 지원
         "categoryCounts": [{"category": k, "count": v} for k, v in category_counts],
 
         # 트래픽 패턴 / 유입 분석
-        "clicksByHour": dict(clicks_by_hour),
-        "clicksByDay": dict(clicks_by_day),
-        "clicksByReferer": dict(clicks_by_referer),
-        "peakHour": peak_hour,
-        "topReferer": top_referer,
+        "clicksByHour": click_stats["clicksByHour"],
+        "clicksByDay": click_stats["clicksByDay"],
+        "clicksByReferer": click_stats["clicksByReferer"],
+        "peakHour": click_stats["peakHour"],
+        "topReferer": click_stats["topReferer"],
+        "uniqueVisitors": click_stats["uniqueVisitors"],  # 최근 7일 고유 방문자 (HyperLogLog 근사)
     }
 
+# -------------------------
+# Click aggregation (시간 버킷 단위 부분 집계)
+# -------------------------
+# hours: {"YYYY-MM-DDTHH": {"t": 클릭 수, "r": {referer: 클릭 수}}}
+# 시간 버킷 단위로 들고 있어야 가장 오래된 1시간을 빼고 새 클릭만 더할 수 있음
+WINDOW_HOURS = 7 * 24
+
+def _hour_key(dt):
+    return f"{dt:%Y-%m-%dT%H}"
+
+def _window_start(now):
+    """집계 창의 첫 시간 버킷 (현재 시간 버킷 포함 WINDOW_HOURS개)"""
+    end = now.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return end - timedelta(hours=WINDOW_HOURS - 1)
+
+def _watermark_end(now):
+    return now - timedelta(seconds=WATERMARK_LAG_SECONDS)
+
+def _settled_end(now, end, watermark=None):
+    """
+    체크포인트에 확정할 구간의 끝 (늦게 들어오는 클릭을 기다리는 구간 앞)
+    - 이전 체크포인트가 이보다 앞서 있으면(LATE_ARRIVAL_SECONDS 도입 전 저장분) 그 워터마크부터
+    """
+    settled = min(now - timedelta(seconds=LATE_ARRIVAL_SECONDS), end)
+    if watermark is not None and watermark > settled:
+        return watermark
+    return settled
+
+def _split_clicks(pages, settled, recent):
+    """페이지를 한 번 훑으면서 확정 구간 클릭은 settled, 그 이후 클릭은 recent에 누적"""
+    for page in pages:
+        for click in page:
+            if settled.add(click) is None:
+                recent.add(click)
+
+def _merge_hours(hours, extra):
+    """hours 복사본에 extra 시간 버킷을 더함 (체크포인트 hours는 그대로)"""
+    merged = {k: {"t": v["t"], "r": dict(v["r"])} for k, v in hours.items()}
+    for key, bucket in extra.items():
+        target = merged.setdefault(key, {"t": 0, "r": {}})
+        target["t"] += bucket["t"]
+        for ref, n in bucket["r"].items():
+            target["r"][ref] = target["r"].get(ref, 0) + n
+    return merged
+
+@metrics.timed("click_stats")
+def collect_click_stats(mode, now):
+    """
+    uniqueVisitors: rollups 테이블이 있으면 시간 버킷 sketch(V#.hll) merge,
+    없으면 full scan 중 바로 계산 (incremental은 체크포인트에 sketch가 없어서 None)
+    """
+    visitors = None
+    if mode == "rollup" and rollups_table is not None:
+        sketches = []
+        hours = _hours_from_rollups(now, sketches)
+        visitors = merge_sketches(sketches) or HyperLogLog()
+    elif mode == "incremental":
+        hours = _hours_incremental(now)
+    else:
+        if rollups_table is None:
+            visitors = HyperLogLog()
+        hours = _hours_full(now, visitors=visitors)
+
+    if visitors is None and rollups_table is not None:
+        visitors = _visitors_from_rollups(now)
+
+    stats = summarize_hours(hours)
+    stats["uniqueVisitors"] = visitors.count() if visitors is not None else None
+    return stats
+
+def _hours_full(now, save_checkpoint=True, visitors=None):
+    """clicks_table 전체 scan (워터마크까지), 페이지 단위로 바로 집계"""
+    start = _window_start(now)
+    end = _watermark_end(now)
+    settled_end = _settled_end(now, end)
+
+    settled = ClickAggregator(
+        after=to_click_ts(start), until=to_click_ts(settled_end), include_after=True, visitors=visitors
+    )
+    recent = ClickAggregator(after=to_click_ts(settled_end), until=to_click_ts(end), visitors=visitors)
+    _split_clicks(_scan_pages(clicks_table, CLICK_SCAN_ATTRS), settled, recent)
+
+    if save_checkpoint:
+        _save_checkpoint(settled_end, settled.hours)
+    return _merge_hours(settled.hours, recent.hours)
+
+def _hours_incremental(now):
+    """
+    체크포인트 + 워터마크 이후 클릭만 반영, 창을 벗어난 시간 버킷은 제거
+    - 체크포인트는 LATE_ARRIVAL_SECONDS 이전까지만 전진, 그 이후 클릭은 매번 다시 읽어서 결과에만 더함
+    """
+    checkpoint = _load_checkpoint()
+    if not checkpoint:
+        print("No checkpoint, falling back to full scan")
+        return _hours_full(now)
+
+    watermark, hours = checkpoint
+    start = _window_start(now)
+    end = _watermark_end(now)
+
+    # 체크포인트가 창보다 오래됐으면 이어 붙일 의미가 없으므로 full
+    if watermark < start:
+        return _hours_full(now)
+
+    settled_end = _settled_end(now, end, watermark)
+    settled = ClickAggregator(hours, after=to_click_ts(watermark), until=to_click_ts(settled_end))
+    recent = ClickAggregator(after=to_click_ts(settled_end), until=to_click_ts(end))
+    _split_clicks(_query_click_pages_after(watermark, end), settled, recent)
+
+    hours = expire_hours(settled.hours, _hour_key(start))
+    _save_checkpoint(settled_end, hours)
+    print(f"incremental: settled_clicks={settled.count} recent_clicks={recent.count} "
+          f"watermark={to_click_ts(settled_end)}")
+    return _merge_hours(hours, recent.hours)
+
+def _query_click_pages_after(watermark, end):
+    """clicks GSI(hourBucket, timestamp)로 워터마크 이후 시간 버킷만 페이지 단위로 조회"""
+    hour = watermark.replace(minute=0, second=0, microsecond=0)
+    after = to_click_ts(watermark)
+
+    while hour <= end:
+        kwargs = {
+            "IndexName": CLICKS_TIME_INDEX,
+            "KeyConditionExpression": Key("hourBucket").eq(_hour_key(hour)) & Key("timestamp").gt(after),
+        }
+        while True:
+            resp = clicks_table.query(**kwargs)
+            yield resp.get("Items", [])
+            if "LastEvaluatedKey" not in resp:
+                break
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        hour += timedelta(hours=1)
+
+def _load_checkpoint():
+    resp = trends_table.get_item(Key={"period": CHECKPOINT_PERIOD, "generatedAt": "checkpoint"})
+    item = resp.get("Item")
+    if not item:
+        return None
+
+    watermark = _parse_iso(item.get("watermark") or "")
+    hours = _safe_json_loads(item.get("hours") or "")
+    if not watermark or not isinstance(hours, dict):
+        return None
+    if watermark.tzinfo is None:
+        watermark = watermark.replace(tzinfo=timezone.utc)
+    return watermark, hours
+
+def _cap_hour_referers(hours):
+    """체크포인트용 hours 복사본: 시간 버킷마다 referer를 rollup과 같은 상한(ROLLUP_MAX_REFERERS + other)으로 자름"""
+    capped = {}
+    for key, bucket in hours.items():
+        refs = sorted(bucket["r"].items(), key=lambda kv: kv[1], reverse=True)
+        kept = dict(refs[:ROLLUP_MAX_REFERERS])
+        rest = sum(n for _, n in refs[ROLLUP_MAX_REFERERS:])
+        if rest:
+            kept[OTHER_REFERER] = kept.get(OTHER_REFERER, 0) + rest
+        capped[key] = {"t": bucket["t"], "r": kept}
+    return capped
+
+def _save_checkpoint(watermark, hours):
+    """
+    부분 집계는 Decimal 변환 없이 JSON 문자열로 저장
+    - 저장 실패(item 400KB 초과 등)해도 이번 결과는 그대로 쓰고,
+      hours 없는 체크포인트로 덮어써서 다음 실행이 full scan으로 돌아가게 함
+    """
+    updated_at = _utcnow().replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    try:
+        trends_table.put_item(Item={
+            "period": CHECKPOINT_PERIOD,
+            "generatedAt": "checkpoint",
+            "watermark": watermark.isoformat().replace("+00:00", "Z"),
+            "hours": json.dumps(_cap_hour_referers(hours), ensure_ascii=False, separators=(",", ":")),
+            "updatedAt": updated_at,
+        })
+    except Exception as e:
+        print(f"Checkpoint save failed, next run will use full scan: {e}")
+        metrics.put("checkpoint.save_failed")
+        try:
+            trends_table.put_item(Item={
+                "period": CHECKPOINT_PERIOD, "generatedAt": "checkpoint", "updatedAt": updated_at,
+            })
+        except Exception as e2:
+            print(f"Checkpoint reset failed: {e2}")
+
+def verify_click_stats(stats, now):
+    """현재 결과를 full scan 결과와 비교 (다른 키만 반환)"""
+    expected = summarize_hours(_hours_full(now, save_checkpoint=False))
+
+    diffs = {}
+    for key, value in expected.items():
+        if stats.get(key) != value:
+            diffs[key] = {"expected": value, "actual": stats.get(key)}
+
+    return {"ok": not diffs, "diffs": diffs}
+
+# -------------------------
+# Rollups
+# -------------------------
+# click_consumer가 갱신하는 버킷 (UTC)
+#   H#YYYY-MM-DDTHH        : total, r#<referer> 카운터 (referer는 버킷당 ROLLUP_MAX_REFERERS개 + other)
+#   V#YYYY-MM-DDTHH        : 고유 방문자 HyperLogLog sketch (hll)
+#   S#<shortId>#YYYY-MM-DD : shortId별 일 클릭 수 (clicks)
+def _window_hour_keys(now, prefix="H#"):
+    start = _window_start(now)
+    return [{"bucket": prefix + _hour_key(start + timedelta(hours=i))} for i in range(WINDOW_HOURS)]
+
+def _hours_from_rollups(now, sketches=None):
+    """최근 7×24개 시간 버킷만 읽어서 hours 형태로 변환 (sketches가 있으면 V# sketch도 모음)"""
+    hours = {}
+    for row in _batch_get(rollups_table, _window_hour_keys(now)):
+        referers = {attr[2:]: _safe_int(v) for attr, v in row.items() if attr.startswith("r#")}
+        hours[row["bucket"][2:]] = {"t": _safe_int(row.get("total", 0)), "r": referers}
+    if sketches is not None:
+        sketches.extend(row["hll"] for row in _batch_get(rollups_table, _window_hour_keys(now, "V#"), attrs=["hll"])
+                        if row.get("hll") is not None)
+    return hours
+
+def _visitors_from_rollups(now):
+    """시간 버킷 sketch만 읽어서 merge"""
+    rows = _batch_get(rollups_table, _window_hour_keys(now, "V#"), attrs=["hll"])
+    return merge_sketches(row.get("hll") for row in rows) or HyperLogLog()
+
+def _window_days(now):
+    """집계 창(7×24시간)이 걸치는 날짜들 (첫날은 일부만 창에 포함되지만 일 단위로 근사)"""
+    start = _window_start(now).date()
+    end = now.astimezone(timezone.utc).date()
+    return [f"{start + timedelta(days=i):%Y-%m-%d}" for i in range((end - start).days + 1)]
+
+@metrics.timed("top_urls")
+def top_urls_from_rollups(now, exact=False, k=TOP_URLS_LIMIT):
+    """
+    최근 7일 top shortId
+    - exact=False: 일별 SpaceSaving 요약(샤드 포함) merge → 요약 크기(TOPK_CAPACITY × 샤드 수)만큼만 읽음
+    - exact=True : merge 결과의 후보 shortId만 일 카운터(S#)를 읽어서 정확한 클릭 수로 다시 정렬
+                   (실제 빈도가 전체/capacity 보다 큰 링크는 반드시 후보에 있음)
+    """
+    days = _window_days(now)
+
+    keys = [{"bucket": b} for d in days for b in summary_buckets(d, TOPK_SHARDS)]
+    merged = merge_summaries(row.get("summary") for row in _batch_get(rollups_table, keys))
+    if merged is None:
+        return []
+
+    if exact:
+        keys = [{"bucket": f"S#{sid}#{d}"} for sid in merged.entries for d in days]
+        totals = Counter()
+        for row in _batch_get(rollups_table, keys, attrs=["bucket", "clicks"]):
+            totals[row["bucket"][2:].rsplit("#", 1)[0]] += _safe_int(row.get("clicks", 0))
+        return [{"shortId": sid, "clicks": n} for sid, n in exact_top_k(totals, k)]
+
+    return [{"shortId": sid, "clicks": n} for sid, n, _ in merged.top(k)]
+
+def _cap_referers(counters):
+    """click_consumer와 같은 상한: 클릭 수 상위 ROLLUP_MAX_REFERERS개만 남기고 나머지는 other로 합산"""
+    referers = sorted((a for a in counters if a.startswith("r#")), key=lambda a: counters[a], reverse=True)
+    for attr in referers[ROLLUP_MAX_REFERERS:]:
+        counters["r#" + OTHER_REFERER] += counters.pop(attr)
+
+def backfill_rollups(days=7):
+    """
+    clicks_table scan으로 최근 days일 버킷을 다시 계산해서 덮어씀 (rollup 도입 직후 1회 실행용)
+    - 실행 중 들어온 클릭은 click_consumer가 다시 ADD 하므로 트래픽이 적을 때 실행 권장
+    - 시작은 정시로 맞춰서 시간 버킷은 항상 한 시간 전체를 다시 계산
+    - 첫날은 일부만 scan하므로, 이미 click_consumer가 만든 일 버킷(TOPK#)이 있으면
+      그날의 S# / U# / TOPK# 는 덮어쓰지 않음 (부분 집계로 덮어써서 줄어드는 것 방지)
+    """
+    if rollups_table is None:
+        return {"error": "ROLLUPS_TABLE is not set"}
+
+    start = (_utcnow() - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+    since = to_click_ts(start)
+    first_day = since[:10]
+    # H#시간 카운터
+    buckets = defaultdict(Counter)
+    # 날짜 → shortId별 클릭 수 (S# 카운터 / TOPK# 요약)
+    by_day = defaultdict(Counter)
+    # V#시간 / U#shortId#날짜 고유 방문자 sketch
+    sketches = defaultdict(HyperLogLog)
+
+    for c in _scan_items(clicks_table, CLICK_SCAN_ATTRS):
+        ts = click_ts(c.get("timestamp"))
+        if not ts or ts < since:
+            continue
+
+        counters = buckets["H#" + ts[:13]]
+        counters["total"] += 1
+        counters["r#" + click_referer(c)] += 1
+        by_day[ts[:10]][c.get("shortId", "")] += 1
+
+        visitor = click_visitor(c)
+        if visitor:
+            sketches["V#" + ts[:13]].add(visitor)
+            sketches[f"U#{c.get('shortId', '')}#{ts[:10]}"].add(visitor)
+
+    skipped_day = None
+    live = start.hour and _batch_get(
+        rollups_table, [{"bucket": b} for b in summary_buckets(first_day, TOPK_SHARDS)], attrs=["bucket"]
+    )
+    if live:
+        skipped_day = first_day
+        by_day.pop(first_day, None)
+        for bucket in [b for b in sketches if b.startswith("U#") and b.endswith("#" + first_day)]:
+            del sketches[bucket]
+        print(f"backfill: {first_day} is partial and already has rollups, day buckets kept")
+
+    expires_at = int(_utcnow().timestamp()) + ROLLUP_TTL_DAYS * 86400
+    # top-k 요약과 같은 이유로 hllVersion도 새 값으로 바꿈
+    version = int(_utcnow().timestamp())
+    with rollups_table.batch_writer() as batch:
+        for bucket, sketch in sketches.items():
+            batch.put_item(Item={
+                "bucket": bucket,
+                "hll": sketch.to_bytes(),
+                "hllVersion": version,
+                "expiresAt": expires_at,
+            })
+
+        for bucket, counters in buckets.items():
+            _cap_referers(counters)
+            batch.put_item(Item={"bucket": bucket, "expiresAt": expires_at, **counters})
+
+        for day, counts in by_day.items():
+            for short_id, n in counts.items():
+                batch.put_item(Item={"bucket": f"S#{short_id}#{day}", "clicks": n, "expiresAt": expires_at})
+
+            # 일별 shortId 카운터로 top-k 요약도 다시 만듦 (샤드 0에 전부, 나머지 샤드는 빈 요약)
+            # (version을 새 값으로 바꿔서 동시에 읽은 click_consumer의 조건부 put은 다시 읽게 함)
+            summary = SpaceSaving(TOPK_CAPACITY)
+            for short_id, n in counts.most_common():
+                summary.offer(short_id, n)
+            for i, bucket in enumerate(summary_buckets(day, TOPK_SHARDS)):
+                batch.put_item(Item={
+                    "bucket": bucket,
+                    "summary": (summary if i == 0 else SpaceSaving(TOPK_CAPACITY)).to_json(),
+                    "version": version,
+                    "expiresAt": expires_at,
+                })
+
+    return {"buckets": len(buckets), "days": days, "skippedDay": skipped_day}
+
 def analyze_with_ai(stats):
     """
     AI로 트렌드 분석
@@ -200,6 +682,7 @@ def analyze_with_ai(stats):
         "clicksByReferer": stats.get("clicksByReferer", {}),
         "peakHour": stats.get("peakHour"),
         "topReferer": stats.get("topReferer"),
+        "uniqueVisitors": stats.get("uniqueVisitors"),
     }
 
     prompt = f"""
@@ -224,12 +707,16 @@ stats:
 """.strip()
 
     try:
-        resp = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500,
-            temperature=0.4,
-        )
+        with metrics.timer("openai"):
+            resp = client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=500,
+                temperature=0.4,
+            )
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            metrics.put("openai.tokens", getattr(usage, "total_tokens", 0) or 0)
         text = (resp.choices[0].message.content or "").strip()
 
         data = _safe_json_loads(text)
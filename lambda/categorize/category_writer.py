@@ -0,0 +1,55 @@
+# lambda/categorize/category_writer.py
+"""
+urls 카테고리 결과 write-behind 버퍼
+- add()는 버퍼에 넣기만 하고, flush_size건이 쌓이면 스레드 풀에 update를 넘기고 바로 리턴
+  → 분류(룰/캐시/LLM)와 DynamoDB 쓰기가 겹쳐서 진행
+- update마다 REMOVE categoryStatus 가 있어 BatchWriteItem(Put 전용)은 못 쓰고,
+  트랜잭션은 1건 실패 시 묶음 전체가 실패하므로 건별 update_item을 병렬로 실행
+- close()에서 남은 버퍼까지 반영하고 source별 성공 수 / 실패 shortId를 돌려줌
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CategoryWriter:
+    def __init__(self, write_fn, max_workers=8, flush_size=25):
+        """
+        write_fn(short_id, category, confidence, source, reason) -> bool (스레드에서 호출됨)
+        """
+        self.write_fn = write_fn
+        self.flush_size = max(1, int(flush_size))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+        self._buffer = []
+        self._futures = []
+
+    def add(self, short_id, category, confidence, source, reason):
+        self._buffer.append((short_id, category, confidence, source, reason))
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        for args in self._buffer:
+            self._futures.append((args[0], args[3], self._pool.submit(self._write, args)))
+        self._buffer = []
+
+    def _write(self, args):
+        try:
+            return bool(self.write_fn(*args))
+        except Exception as e:
+            print("category write error:", str(e))
+            return False
+
+    def close(self):
+        """
+        return: ({source: 성공 수}, [실패 shortId])
+        """
+        self.flush()
+        written = {}
+        failed = []
+        for short_id, source, fut in self._futures:
+            if fut.result():
+                written[source] = written.get(source, 0) + 1
+            else:
+                failed.append(short_id)
+        self._futures = []
+        self._pool.shutdown(wait=True)
+        return written, failed
@@ -0,0 +1,329 @@
+# lambda/categorize/classify_cache.py
+"""
+LLM 분류 결과 캐시 (category_cache 테이블 + 컨테이너 메모리)
+- 키(pattern): "host/첫 path 세그먼트" 와 "host" 두 단계 → 구체적인 것부터 조회
+- 항목에는 카테고리별 득표 수(n#{category})와 confidence 합(c#{category})을 ADD로 누적
+- 표본 수 / 최다 카테고리 비율 / 평균 confidence 가 기준을 넘으면 LLM 대신 캐시 판정 사용
+  캐시 판정이 쓰인 횟수는 hits 로 모아서 실행 끝에 한 번에 ADD (기록용, 승격에는 안 씀)
+  캐시 판정 / learned 룰 판정 중 verify_rate 비율은 LLM에 다시 물어서 독립된 LLM 표본을 계속 모음
+- host 단위 판정이 승격 기준(비율/confidence + LLM 판정 수)까지 넘으면 learned="rule" 로 표시
+  → 다음 컨테이너부터 host 룰(서브도메인 제외)로 로드 (sparse GSI byLearned 로 승격된 항목만 조회)
+- learned 룰은 learned_ttl_seconds가 지나거나 이후 LLM 판정이 기준에서 벗어나면 강등
+  → 강등 시점의 total을 baseTotal로 남겨서, 그 뒤 LLM 판정이 다시 승격 표본 수만큼 쌓여야 재승격
+
+CATEGORY_CACHE_TABLE (비어 있으면 비활성), CATEGORY_CACHE_* 기준값
+"""
+import random
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+LEARNED_INDEX = "byLearned"
+LEARNED_STATUS = "rule"
+
+# BatchGetItem 1회 최대 키 수
+BATCH_GET_LIMIT = 100
+
+
+def patterns_for(host: str, path: str):
+    """캐시 키 목록 (구체적인 것부터)"""
+    if not host:
+        return []
+    segment = (path or "").strip("/").split("/", 1)[0]
+    if segment:
+        return [f"{host}/{segment}", host]
+    return [host]
+
+
+def parse_stats(item):
+    """캐시 항목 → (total, {category: count}, {category: confidence 합})"""
+    if not item:
+        return 0, {}, {}
+    counts = {k[2:]: int(v) for k, v in item.items() if k.startswith("n#")}
+    conf_sums = {k[2:]: float(v) for k, v in item.items() if k.startswith("c#")}
+    return int(item.get("total", 0)), counts, conf_sums
+
+
+def dominant_verdict(item, min_samples, min_agreement, min_confidence):
+    """
+    최다 카테고리가 기준을 만족하면 (category, 평균 confidence, 비율, total) 반환, 아니면 None
+    """
+    total, counts, conf_sums = parse_stats(item)
+    if total < min_samples or not counts:
+        return None
+
+    category = max(counts, key=counts.get)
+    count = counts[category]
+    share = count / total
+    avg_conf = conf_sums.get(category, 0.0) / count
+    if share < min_agreement or avg_conf < min_confidence:
+        return None
+    return category, round(avg_conf, 3), share, total
+
+
+class ClassificationCache:
+    def __init__(
+        self,
+        table,
+        min_samples=3,
+        min_agreement=0.8,
+        min_confidence=0.7,
+        promote_samples=10,
+        promote_agreement=0.95,
+        promote_confidence=0.8,
+        memory_ttl_seconds=300.0,
+        verify_rate=0.1,
+        learned_ttl_seconds=30 * 86400,
+    ):
+        self.table = table
+        self.min_samples = min_samples
+        self.min_agreement = min_agreement
+        self.min_confidence = min_confidence
+        self.promote_samples = promote_samples
+        self.promote_agreement = promote_agreement
+        self.promote_confidence = promote_confidence
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self.verify_rate = verify_rate
+        self.learned_ttl_seconds = learned_ttl_seconds
+
+        # pattern -> (expires_at, item or None). None도 캐시해서 없는 키를 반복 조회하지 않음
+        self._memory = {}
+        # pattern -> 아직 테이블에 반영하지 않은 캐시 사용 횟수
+        self._pending_hits = {}
+        self.hits = 0
+        self.misses = 0
+        self.verifications = 0
+        # 이 컨테이너에서 강등된 host (호출 측 RuleMatcher에서 제거용)
+        self.demoted = set()
+
+    # ---------- 조회 ----------
+    def _fresh(self, pattern):
+        entry = self._memory.get(pattern)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    def _remember(self, pattern, item):
+        self._memory[pattern] = (time.monotonic() + self.memory_ttl_seconds, item)
+
+    def prefetch(self, patterns):
+        """메모리에 없는 키만 BatchGetItem으로 한 번에 로드"""
+        missing = []
+        seen = set()
+        for p in patterns:
+            if p in seen or self._fresh(p)[0]:
+                continue
+            seen.add(p)
+            missing.append(p)
+
+        for i in range(0, len(missing), BATCH_GET_LIMIT):
+            chunk = missing[i:i + BATCH_GET_LIMIT]
+            found = {}
+            request = {self.table.name: {"Keys": [{"pattern": p} for p in chunk]}}
+            try:
+                while request:
+                    res = self.table.meta.client.batch_get_item(RequestItems=request)
+                    for it in res.get("Responses", {}).get(self.table.name, []):
+                        found[it["pattern"]] = it
+                    request = res.get("UnprocessedKeys") or None
+            except ClientError as e:
+                print("category cache prefetch error:", str(e))
+                continue
+
+            for p in chunk:
+                self._remember(p, found.get(p))
+
+    def lookup(self, host: str, path: str):
+        """재사용 가능한 판정이 있으면 (category, confidence, reason), 없으면 None"""
+        patterns = patterns_for(host, path)
+        self.prefetch(patterns)
+
+        for p in patterns:
+            verdict = dominant_verdict(
+                self._fresh(p)[1], self.min_samples, self.min_agreement, self.min_confidence
+            )
+            if verdict:
+                if self.should_verify():
+                    # 캐시 판정 대신 LLM 결과를 record → 캐시 자신의 판정이 아닌 독립 표본
+                    self.misses += 1
+                    return None
+
+                category, conf, share, total = verdict
+                self.hits += 1
+                self._count_hit(p)
+                # host 판정도 같은 카테고리면 host 승격에 반영
+                if p != host:
+                    host_verdict = dominant_verdict(
+                        self._fresh(host)[1], self.min_samples, self.min_agreement, self.min_confidence
+                    )
+                    if host_verdict and host_verdict[0] == category:
+                        self._count_hit(host)
+                return category, conf, f"cache:{p} ({share:.0%} of {total})"
+
+        self.misses += 1
+        return None
+
+    def should_verify(self):
+        """verify_rate 비율로 True → 캐시 / learned 룰 판정 대신 LLM에 보냄"""
+        if self.verify_rate > 0 and random.random() < self.verify_rate:
+            self.verifications += 1
+            return True
+        return False
+
+    def _count_hit(self, pattern):
+        self._pending_hits[pattern] = self._pending_hits.get(pattern, 0) + 1
+
+    # ---------- 기록 / 승격 ----------
+    def record(self, host: str, path: str, category: str, confidence: float):
+        """
+        LLM 판정을 모든 단계의 키에 누적
+        return: 이번 기록으로 새로 승격된 learned 룰 {host: (category, confidence, reason)}
+        """
+        promoted = {}
+        now = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+        for p in patterns_for(host, path):
+            try:
+                res = self.table.update_item(
+                    Key={"pattern": p},
+                    UpdateExpression="ADD #total :one, #n :one, #c :conf SET updatedAt=:t",
+                    ExpressionAttributeNames={"#total": "total", "#n": f"n#{category}", "#c": f"c#{category}"},
+                    ExpressionAttributeValues={
+                        ":one": 1,
+                        ":conf": Decimal(str(round(float(confidence), 3))),
+                        ":t": now,
+                    },
+                    ReturnValues="ALL_NEW",
+                )
+            except ClientError as e:
+                print("category cache record error:", str(e))
+                continue
+
+            item = res.get("Attributes") or {}
+            self._remember(p, item)
+
+            # learned 룰은 host 단위(RuleMatcher host 룰)로만 사용 → host 키만 승격 / 강등
+            if p != host:
+                continue
+            if item.get("learned") == LEARNED_STATUS:
+                self._maybe_demote(host, item)
+            else:
+                rule = self._maybe_promote(host, item)
+                if rule:
+                    promoted[host] = rule
+
+        return promoted
+
+    def flush_hits(self):
+        """모아둔 캐시 사용 횟수를 pattern별 update 1회로 반영 (캐시 자신의 재사용이라 승격에는 반영 안 함)"""
+        pending = self._pending_hits
+        self._pending_hits = {}
+
+        for p, n in pending.items():
+            try:
+                res = self.table.update_item(
+                    Key={"pattern": p},
+                    UpdateExpression="ADD hits :n",
+                    ConditionExpression="attribute_exists(#p)",
+                    ExpressionAttributeNames={"#p": "pattern"},
+                    ExpressionAttributeValues={":n": n},
+                    ReturnValues="ALL_NEW",
+                )
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                    print("category cache hits error:", str(e))
+                continue
+
+            self._remember(p, res.get("Attributes") or {})
+
+    def _maybe_promote(self, host, item):
+        # 승격 표본은 LLM 판정 수만 (마지막 강등 이후 baseTotal을 넘은 만큼)
+        verdict = dominant_verdict(item, self.min_samples, self.promote_agreement, self.promote_confidence)
+        if not verdict:
+            return None
+        if verdict[3] - int(item.get("baseTotal", 0)) < self.promote_samples:
+            return None
+
+        category, conf, share, total = verdict
+        try:
+            self.table.update_item(
+                Key={"pattern": host},
+                UpdateExpression="SET learned=:l, learnedCategory=:c, learnedConfidence=:cc, learnedAt=:at",
+                ConditionExpression="attribute_not_exists(learned)",
+                ExpressionAttributeValues={
+                    ":l": LEARNED_STATUS,
+                    ":c": category,
+                    ":cc": Decimal(str(conf)),
+                    ":at": int(time.time()),
+                },
+            )
+        except ClientError as e:
+            # 다른 컨테이너가 먼저 승격한 경우도 여기로 옴
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                print("category cache promote error:", str(e))
+            return None
+
+        print(f"promoted learned rule: {host} -> {category} ({share:.0%} of {total})")
+        return category, conf, f"learned:{host}"
+
+    def _maybe_demote(self, host, item):
+        """learned host에 새 LLM 판정이 들어왔을 때 승격 기준에서 벗어났으면 강등"""
+        verdict = dominant_verdict(item, self.min_samples, self.promote_agreement, self.promote_confidence)
+        if verdict and verdict[0] == item.get("learnedCategory"):
+            return
+        self._demote(host, "llm_disagreement")
+
+    def _demote(self, host, reason):
+        """learned 표시 제거 (sparse GSI에서 빠짐), 현재 total을 baseTotal로 남김"""
+        try:
+            self.table.update_item(
+                Key={"pattern": host},
+                UpdateExpression="REMOVE learned, learnedCategory, learnedConfidence, learnedAt SET baseTotal=#total",
+                ConditionExpression="learned = :l",
+                ExpressionAttributeNames={"#total": "total"},
+                ExpressionAttributeValues={":l": LEARNED_STATUS},
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                print("category cache demote error:", str(e))
+            return
+        self._memory.pop(host, None)
+        self.demoted.add(host)
+        print(f"demoted learned rule: {host} ({reason})")
+
+    def load_learned_rules(self):
+        """
+        승격된 host 룰 전체 → {host: (category, confidence, reason)}
+        learned_ttl_seconds가 지난 룰(learnedAt이 없는 이전 승격분 포함)은 강등하고 제외
+        """
+        rules = {}
+        expired = []
+        oldest = int(time.time()) - self.learned_ttl_seconds
+        last_key = None
+        try:
+            while True:
+                kwargs = {"IndexName": LEARNED_INDEX, "KeyConditionExpression": Key("learned").eq(LEARNED_STATUS)}
+                if last_key:
+                    kwargs["ExclusiveStartKey"] = last_key
+                res = self.table.query(**kwargs)
+                for it in res.get("Items", []):
+                    if int(it.get("learnedAt", 0)) < oldest:
+                        expired.append(it["pattern"])
+                        continue
+                    rules[it["pattern"]] = (
+                        it.get("learnedCategory", "other"),
+                        float(it.get("learnedConfidence", 0.8)),
+                        f"learned:{it['pattern']}",
+                    )
+                last_key = res.get("LastEvaluatedKey")
+                if not last_key:
+                    break
+        except ClientError as e:
+            print("learned rules load error:", str(e))
+
+        for host in expired:
+            self._demote(host, "expired")
+        return rules
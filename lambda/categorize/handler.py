@@ -1,24 +1,55 @@
 import json
 import os
 import re
-import boto3
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 from decimal import Decimal, ROUND_HALF_UP
 
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
-from openai import OpenAI
+
+# 공통 layer (lambda/common/python)
+import metrics
+import runtime
+from category_writer import CategoryWriter
+from classify_cache import ClassificationCache, patterns_for
+from llm_pool import Deadline, LLMBatchExecutor, RetryLater, TokenBucket, call_with_retry
+from rule_matcher import RuleMatcher, load_rules_file
 
 # -------------------------
 # Config / Clients
 # -------------------------
-dynamodb = boto3.resource("dynamodb")
-urls_table = dynamodb.Table(os.environ.get("URLS_TABLE", "urls"))
+# resource / client는 첫 DynamoDB 호출 때 생성
+urls_table = runtime.table(os.environ.get("URLS_TABLE", "urls"))
+
+# shorten이 새 URL에 categoryStatus="pending"을 붙이고, 분류 성공 시 제거 → sparse GSI
+PENDING_INDEX = os.environ.get("PENDING_INDEX", "byCategoryStatus")
+PENDING_STATUS = "pending"
 
 MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
-client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+# OPENAI_BASE_URL: 로컬 fake 서버 등으로 교체 가능. 재시도는 llm_pool에서 직접 하므로 SDK 재시도는 끔
+# openai import / client 생성은 첫 LLM 호출 때 (룰 / 캐시로 끝나는 실행은 비용 없음)
+# 요청별 timeout은 LLM_REQUEST_TIMEOUT과 Lambda 남은 시간(LLM_DEADLINE_RESERVE_MS 제외) 중 작은 값
+LLM_REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", "30"))
+client = runtime.lazy_openai(
+    api_key=OPENAI_API_KEY,
+    base_url=os.environ.get("OPENAI_BASE_URL") or None,
+    timeout=LLM_REQUEST_TIMEOUT,
+    max_retries=0,
+) if OPENAI_API_KEY else None
+
+# LLM batch 동시 실행 / 요청 속도 제한 / 재시도 / 마감 여유
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", "4"))
+LLM_RATE_PER_SEC = float(os.environ.get("LLM_RATE_PER_SEC", "5"))
+LLM_RATE_BURST = float(os.environ.get("LLM_RATE_BURST", "0")) or None
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+LLM_DEADLINE_RESERVE_MS = int(os.environ.get("LLM_DEADLINE_RESERVE_MS", "15000"))
+llm_bucket = TokenBucket(LLM_RATE_PER_SEC, LLM_RATE_BURST)
+
+# 카테고리 결과 쓰기: CATEGORY_WRITE_FLUSH_SIZE건씩 모아서 CATEGORY_WRITE_WORKERS개 스레드로 병렬 update
+CATEGORY_WRITE_WORKERS = int(os.environ.get("CATEGORY_WRITE_WORKERS", "8"))
+CATEGORY_WRITE_FLUSH_SIZE = int(os.environ.get("CATEGORY_WRITE_FLUSH_SIZE", "25"))
 
 # 카테고리 확장: search 추가 (naver/google 같은 검색/포털을 룰로 처리)
 CATEGORIES = {
@@ -66,6 +97,63 @@ DOMAIN_RULES = {
     "medium.com": ("blog", 0.85, "domain=medium.com"),
 }
 
+# path 휴리스틱 (위에서부터 먼저 매칭되는 룰 사용)
+PATH_RULES = [
+    (["/blog", "/posts", "/post/"], "blog", 0.70, "path looks like blog"),
+    (["/docs", "/documentation", "/guide"], "docs", 0.70, "path looks like docs"),
+    (["/product", "/products", "/item", "/detail"], "shopping", 0.65, "path looks like product page"),
+]
+
+def _build_rule_matcher():
+    """기본 룰 + (있으면) 외부 룰 파일. 파일의 도메인 룰이 같은 도메인의 기본 룰을 덮어씀"""
+    domain_rules = dict(DOMAIN_RULES)
+    path_rules = list(PATH_RULES)
+
+    rules_file = os.environ.get("CATEGORY_RULES_FILE", "")
+    if rules_file:
+        if not os.path.isabs(rules_file):
+            rules_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), rules_file)
+        try:
+            extra_domains, extra_paths = load_rules_file(rules_file)
+            domain_rules.update(extra_domains)
+            path_rules.extend(extra_paths)
+        except Exception as e:
+            print("rules file load error:", str(e))
+
+    return RuleMatcher(domain_rules, path_rules)
+
+rule_matcher = _build_rule_matcher()
+
+# LLM 결과 캐시 (host / host+path prefix). 테이블이 없으면 비활성
+CATEGORY_CACHE_TABLE = os.environ.get("CATEGORY_CACHE_TABLE", "")
+classify_cache = ClassificationCache(
+    runtime.table(CATEGORY_CACHE_TABLE),
+    min_samples=int(os.environ.get("CATEGORY_CACHE_MIN_SAMPLES", "3")),
+    min_agreement=float(os.environ.get("CATEGORY_CACHE_MIN_AGREEMENT", "0.8")),
+    min_confidence=float(os.environ.get("CATEGORY_CACHE_MIN_CONFIDENCE", "0.7")),
+    promote_samples=int(os.environ.get("CATEGORY_PROMOTE_MIN_SAMPLES", "10")),
+    promote_agreement=float(os.environ.get("CATEGORY_PROMOTE_MIN_AGREEMENT", "0.95")),
+    promote_confidence=float(os.environ.get("CATEGORY_PROMOTE_MIN_CONFIDENCE", "0.8")),
+    memory_ttl_seconds=float(os.environ.get("CATEGORY_CACHE_MEMORY_TTL", "300")),
+    verify_rate=float(os.environ.get("CATEGORY_CACHE_VERIFY_RATE", "0.1")),
+    learned_ttl_seconds=int(os.environ.get("CATEGORY_LEARNED_TTL_DAYS", "30")) * 86400,
+) if CATEGORY_CACHE_TABLE else None
+_learned_rules_loaded = False
+
+# 이 reason으로 끝난 LLM 결과는 실제 판정이 아니므로 캐시에 누적하지 않음
+LLM_FALLBACK_REASONS = ("no_openai_key", "llm_error", "llm_json_parse_failed", "llm_no_result")
+
+def _ensure_learned_rules():
+    """컨테이너당 1회: 승격된 learned 룰을 RuleMatcher host 룰로 추가 (같은 host의 명시 룰이 우선)"""
+    global _learned_rules_loaded
+    if _learned_rules_loaded or classify_cache is None:
+        return
+    learned = classify_cache.load_learned_rules()
+    rule_matcher.add_host_rules(learned)
+    _learned_rules_loaded = True
+    if learned:
+        print(f"loaded learned rules: {len(learned)}")
+
 # -------------------------
 # Helpers
 # -------------------------
@@ -82,6 +170,13 @@ def _parse_host(url: str) -> str:
     except Exception:
         return ""
 
+def _host_path(url: str):
+    try:
+        p = urlparse(url)
+        return _norm_host(p.netloc), (p.path or "").lower()
+    except Exception:
+        return "", ""
+
 def _safe_category(cat: str) -> str:
     return cat if cat in CATEGORIES else "other"
 
@@ -118,50 +213,62 @@ def rule_classify(url: str):
     룰 기반 분류. 매칭 시 (category, confidence(float), reason) 반환, 실패 시 None
     """
     try:
-        p = urlparse(url)
-        host = _norm_host(p.netloc)
-        path = (p.path or "").lower()
-
-        # exact match
-        if host in DOMAIN_RULES:
-            return DOMAIN_RULES[host]
-
-        # suffix match (subdomains)
-        for d, r in DOMAIN_RULES.items():
-            if host == d or host.endswith("." + d):
-                return r
-
-        # path heuristics
-        if any(x in path for x in ["/blog", "/posts", "/post/"]):
-            return ("blog", 0.70, "path looks like blog")
-        if any(x in path for x in ["/docs", "/documentation", "/guide"]):
-            return ("docs", 0.70, "path looks like docs")
-        if any(x in path for x in ["/product", "/products", "/item", "/detail"]):
-            return ("shopping", 0.65, "path looks like product page")
+        host, path = _host_path(url)
 
-        return None
+        # 도메인(정확/서브도메인) + learned host → path 휴리스틱 순
+        return rule_matcher.classify(host, path)
     except Exception:
         return None
 
+def cache_classify(url: str):
+    """
+    이전 LLM 판정 캐시로 분류. 기준을 만족하는 판정이 있으면 (category, confidence, reason), 없으면 None
+    """
+    if classify_cache is None:
+        return None
+    host, path = _host_path(url)
+    return classify_cache.lookup(host, path)
+
+def needs_llm_verification(rule) -> bool:
+    """learned 룰 판정 중 verify_rate 비율은 LLM에 보내서 강등 판단용 표본을 모음"""
+    return (
+        classify_cache is not None
+        and (rule[2] or "").startswith("learned:")
+        and classify_cache.should_verify()
+    )
+
+def remember_llm_result(url: str, info: dict):
+    """LLM 판정을 캐시에 누적, 새로 승격된 host는 바로 룰로 사용하고 강등된 host는 룰에서 제거"""
+    if classify_cache is None or (info.get("reason") or "").startswith(LLM_FALLBACK_REASONS):
+        return
+    host, path = _host_path(url)
+    promoted = classify_cache.record(host, path, _safe_category(info["category"]), info["confidence"])
+    if promoted:
+        rule_matcher.add_host_rules(promoted)
+    if classify_cache.demoted:
+        rule_matcher.remove_host_rules(classify_cache.demoted)
+        classify_cache.demoted.clear()
+
 # -------------------------
 # DynamoDB
 # -------------------------
 def fetch_uncategorized_urls(limit: int = 50):
     """
-    category 필드가 없는 urls만 scan으로 조회 (MVP)
+    분류 대기 urls 조회 (sparse GSI query → 전체 테이블이 아니라 대기 건수만큼만 읽음)
     """
     items = []
     last_key = None
 
     while len(items) < limit:
         kwargs = {
-            "FilterExpression": Attr("category").not_exists(),
+            "IndexName": PENDING_INDEX,
+            "KeyConditionExpression": Key("categoryStatus").eq(PENDING_STATUS),
             "Limit": min(100, limit - len(items)),
         }
         if last_key:
             kwargs["ExclusiveStartKey"] = last_key
 
-        res = urls_table.scan(**kwargs)
+        res = urls_table.query(**kwargs)
         items.extend(res.get("Items", []))
         last_key = res.get("LastEvaluatedKey")
         if not last_key:
@@ -177,16 +284,55 @@ def fetch_uncategorized_urls(limit: int = 50):
             })
     return out
 
+def mark_legacy_pending(max_items: int = 10000):
+    """
+    GSI 도입 전 URL 중 category 없는 항목에 대기 표시 (도입 후 1회 실행용, 전체 scan)
+    """
+    marked = 0
+    last_key = None
+
+    while marked < max_items:
+        kwargs = {
+            "FilterExpression": Attr("category").not_exists() & Attr("categoryStatus").not_exists(),
+            "ProjectionExpression": "shortId",
+        }
+        if last_key:
+            kwargs["ExclusiveStartKey"] = last_key
+
+        res = urls_table.scan(**kwargs)
+        for it in res.get("Items", []):
+            try:
+                urls_table.update_item(
+                    Key={"shortId": it["shortId"]},
+                    UpdateExpression="SET categoryStatus=:p",
+                    ConditionExpression="attribute_exists(shortId)",
+                    ExpressionAttributeValues={":p": PENDING_STATUS},
+                )
+                marked += 1
+            except ClientError as e:
+                print("mark pending error:", str(e))
+
+        last_key = res.get("LastEvaluatedKey")
+        if not last_key:
+            break
+
+    return {"marked": marked}
+
 def update_url_category(short_id: str, category: str, confidence, source: str, reason: str):
     category = _safe_category(category)
     conf_dec = _to_decimal_conf(confidence)
 
     try:
-        urls_table.update_item(
+        # CategoryWriter 스레드에서 호출되므로 resource 대신 thread-safe한 client 사용
+        urls_table.meta.client.update_item(
+            TableName=urls_table.name,
             Key={"shortId": short_id},
             UpdateExpression=(
-                "SET #cat=:c, categoryConfidence=:cc, categorizedAt=:t, categorySource=:s, categoryReason=:r"
+                "SET #cat=:c, categoryConfidence=:cc, categorizedAt=:t, categorySource=:s, categoryReason=:r "
+                "REMOVE categoryStatus"
             ),
+            # 분류 중에 삭제된 URL은 다시 만들지 않음
+            ConditionExpression="attribute_exists(shortId)",
             ExpressionAttributeNames={"#cat": "category"},
             ExpressionAttributeValues={
                 ":c": category,
@@ -204,18 +350,29 @@ def update_url_category(short_id: str, category: str, confidence, source: str, r
 # -------------------------
 # LLM Classifier
 # -------------------------
-def llm_classify(batch):
-    """
-    룰에 안 걸린 URL들을 LLM으로 분류.
-    batch: [{shortId, url, title}]
-    return: shortId -> {category, confidence(float), reason}
-    """
-    if not batch:
-        return {}
+def _llm_fallback(batch, confidence, reason):
+    return {it["shortId"]: {"category": "other", "confidence": confidence, "reason": reason} for it in batch}
 
-    if not OPENAI_API_KEY or client is None:
-        return {it["shortId"]: {"category": "other", "confidence": 0.4, "reason": "no_openai_key"} for it in batch}
+def _is_retryable(e) -> bool:
+    # 429 / 5xx / 네트워크 오류만 재시도 (4xx 나머지는 다시 보내도 같은 결과)
+    # LLM 호출 이후에만 불리므로 openai는 이미 import 되어 있음
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+    if isinstance(e, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(e, APIStatusError):
+        return e.status_code == 429 or e.status_code >= 500
+    return False
+
+def _retry_after(e):
+    try:
+        value = e.response.headers.get("retry-after")
+        return min(30.0, float(value)) if value else None
+    except Exception:
+        return None
 
+def _llm_request(batch, deadline=None):
+    """LLM 1회 호출 → 응답 텍스트 (오류는 그대로 raise, 요청 timeout은 deadline 남은 시간까지)"""
     system = (
         "You are a URL categorization engine. "
         "Return JSON only (no markdown). "
@@ -224,8 +381,12 @@ def llm_classify(batch):
     )
     user = {"task": "categorize_urls", "items": batch}
 
-    try:
-        resp = client.chat.completions.create(
+    # 첫 호출의 openai import / client 생성 시간까지 뺀 남은 시간으로 timeout 계산
+    completions = client.chat.completions
+    timeout = deadline.cap_timeout(LLM_REQUEST_TIMEOUT) if deadline is not None else LLM_REQUEST_TIMEOUT
+
+    with metrics.timer("openai"):
+        resp = completions.create(
             model=MODEL,
             messages=[
                 {"role": "system", "content": system},
@@ -233,10 +394,38 @@ def llm_classify(batch):
             ],
             max_tokens=700,
             temperature=0.2,
+            timeout=timeout,
         )
-        raw = (resp.choices[0].message.content or "").strip()
+    usage = getattr(resp, "usage", None)
+    if usage is not None:
+        metrics.put("openai.tokens", getattr(usage, "total_tokens", 0) or 0)
+    return (resp.choices[0].message.content or "").strip()
+
+def llm_classify(batch, deadline=None):
+    """
+    룰에 안 걸린 URL들을 LLM으로 분류.
+    batch: [{shortId, url, title}]
+    return: shortId -> {category, confidence(float), reason}
+    """
+    if not batch:
+        return {}
+
+    if not OPENAI_API_KEY or client is None:
+        return _llm_fallback(batch, 0.4, "no_openai_key")
+
+    try:
+        raw = call_with_retry(
+            lambda: _llm_request(batch, deadline),
+            _is_retryable,
+            max_retries=LLM_MAX_RETRIES,
+            deadline=deadline,
+            retry_after=_retry_after,
+        )
+    except RetryLater:
+        # 마감 / 일시적 오류 → executor가 batch를 deferred로 돌림 (categoryStatus 유지)
+        raise
     except Exception as e:
-        return {it["shortId"]: {"category": "other", "confidence": 0.3, "reason": f"llm_error:{str(e)[:120]}"} for it in batch}
+        return _llm_fallback(batch, 0.3, f"llm_error:{str(e)[:120]}")
 
     json_text = _extract_json_object(raw)
 
@@ -245,7 +434,7 @@ def llm_classify(batch):
     except json.JSONDecodeError:
         # 디버깅용 원문 일부 로깅 (민감정보 없게 일부만)
         print("LLM raw response (head):", raw[:300])
-        return {it["shortId"]: {"category": "other", "confidence": 0.3, "reason": "llm_json_parse_failed"} for it in batch}
+        return _llm_fallback(batch, 0.3, "llm_json_parse_failed")
 
     out = {}
     for item in data.get("items", []):
@@ -275,50 +464,125 @@ def llm_classify(batch):
 # -------------------------
 # Orchestration
 # -------------------------
-def categorize_urls(limit: int, llm_batch_size: int):
+def categorize_urls(limit: int, llm_batch_size: int, context=None):
     targets = fetch_uncategorized_urls(limit=limit)
     if not targets:
-        return {"updated": 0, "rule": 0, "llm": 0, "skipped": 0}
+        return {"updated": 0, "rule": 0, "cache": 0, "llm": 0, "deferred": 0, "skipped": 0}
+
+    _ensure_learned_rules()
 
-    updated = 0
-    rule_cnt = 0
-    llm_cnt = 0
+    deferred_cnt = 0
     need_llm = []
+    verify_llm = set()  # learned 룰 검증용으로 캐시를 건너뛰고 LLM에 보낼 shortId
+
+    # 결과는 write-behind로 모아서 병렬 저장 (성공/실패 집계는 마지막에)
+    writer = CategoryWriter(
+        update_url_category, max_workers=CATEGORY_WRITE_WORKERS, flush_size=CATEGORY_WRITE_FLUSH_SIZE
+    )
 
     # 1) 룰 분류
     for it in targets:
         r = rule_classify(it["url"])
-        if r:
+        if r and needs_llm_verification(r):
+            verify_llm.add(it["shortId"])
+            need_llm.append(it)
+        elif r:
             cat, conf, reason = r
-            if update_url_category(it["shortId"], cat, conf, "rule", reason):
-                updated += 1
-                rule_cnt += 1
+            writer.add(it["shortId"], cat, conf, "rule", reason)
         else:
             need_llm.append(it)
 
-    # 2) LLM 분류 (batch)
-    for i in range(0, len(need_llm), llm_batch_size):
-        batch = need_llm[i:i + llm_batch_size]
-        res = llm_classify(batch)
+    if classify_cache is not None:
+        classify_cache.prefetch([
+            p for it in need_llm for p in patterns_for(*_host_path(it["url"]))
+        ])
+
+    # 2) 캐시 → LLM 분류
+    # batch를 LLM_CONCURRENCY개씩 묶은 wave 단위로 동시 실행
+    # 앞 wave의 LLM 결과가 캐시에 누적되므로 wave마다 다시 캐시를 확인
+    deadline = Deadline(context, reserve_ms=LLM_DEADLINE_RESERVE_MS)
+    executor = LLMBatchExecutor(max_workers=LLM_CONCURRENCY, bucket=llm_bucket, deadline=deadline)
+    wave_size = llm_batch_size * executor.max_workers
+
+    pending = need_llm
+    while pending:
+        wave = []
+        rest = []
+        for it in pending:
+            if len(wave) >= wave_size:
+                rest.append(it)
+                continue
+            if it["shortId"] in verify_llm:
+                wave.append(it)
+                continue
+            r = cache_classify(it["url"])
+            metrics.cache_lookup("classify_cache", bool(r))
+            if r:
+                cat, conf, reason = r
+                writer.add(it["shortId"], cat, conf, "cache", reason)
+            else:
+                wave.append(it)
+        pending = rest
+
+        if not wave:
+            continue
+
+        batches = [wave[i:i + llm_batch_size] for i in range(0, len(wave), llm_batch_size)]
+        results, deferred = executor.run(
+            batches,
+            lambda b: llm_classify(b, deadline),
+            on_error=lambda b, e: _llm_fallback(b, 0.3, f"llm_error:{str(e)[:120]}"),
+        )
 
-        for it in batch:
-            sid = it["shortId"]
-            info = res.get(sid) or {"category": "other", "confidence": 0.4, "reason": "llm_no_result"}
-            if update_url_category(sid, info["category"], info["confidence"], "llm", info.get("reason", "")):
-                updated += 1
-                llm_cnt += 1
+        for batch, res in results:
+            for it in batch:
+                sid = it["shortId"]
+                info = res.get(sid) or {"category": "other", "confidence": 0.4, "reason": "llm_no_result"}
+                remember_llm_result(it["url"], info)
+                writer.add(sid, info["category"], info["confidence"], "llm", info.get("reason", ""))
+
+        # 마감 / 일시적 오류로 미룬 항목은 pending 상태로 두고 다음 실행에서 처리
+        deferred_cnt += sum(len(b) for b in deferred)
+        if deadline.expired():
+            deferred_cnt += len(pending)
+            print(f"deadline reached: {deferred_cnt} urls deferred")
+            break
 
-    skipped = len(targets) - updated
-    return {"updated": updated, "rule": rule_cnt, "llm": llm_cnt, "skipped": skipped}
+    if classify_cache is not None:
+        classify_cache.flush_hits()
+
+    written, failed = writer.close()
+    if failed:
+        print(f"category write failed: {len(failed)} (e.g. {failed[:5]})")
+
+    updated = sum(written.values())
+    skipped = len(targets) - updated - deferred_cnt
+    metrics.put("urls.fetched", len(targets))
+    metrics.put("urls.llm", written.get("llm", 0))
+    metrics.put("urls.deferred", deferred_cnt)
+    return {
+        "updated": updated,
+        "rule": written.get("rule", 0),
+        "cache": written.get("cache", 0),
+        "llm": written.get("llm", 0),
+        "deferred": deferred_cnt,
+        "skipped": skipped,
+    }
 
 # -------------------------
 # Lambda Entrypoint
 # -------------------------
+@metrics.handler("categorize")
 def lambda_handler(event, context):
+    if (event or {}).get("job") == "mark_legacy_pending":
+        result = mark_legacy_pending()
+        print("mark_legacy_pending result:", result)
+        return {"statusCode": 200, "body": json.dumps(result, ensure_ascii=False)}
+
     limit = int(os.environ.get("CATEGORIZE_LIMIT", "50"))
     llm_batch_size = int(os.environ.get("LLM_BATCH_SIZE", "15"))
 
-    result = categorize_urls(limit=limit, llm_batch_size=llm_batch_size)
+    result = categorize_urls(limit=limit, llm_batch_size=llm_batch_size, context=context)
     print("categorize result:", result)
 
     return {"statusCode": 200, "body": json.dumps(result, ensure_ascii=False)}
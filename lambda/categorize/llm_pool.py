@@ -0,0 +1,153 @@
+# lambda/categorize/llm_pool.py
+"""
+LLM batch 동시 실행기
+- 스레드 풀로 batch 여러 개를 동시에 호출 (LLM_CONCURRENCY)
+- 토큰 버킷으로 초당 요청 수 제한 (LLM_RATE_PER_SEC, LLM_RATE_BURST)
+- 429 / 5xx / 연결 오류는 지수 백오프(+jitter)로 재시도, Retry-After 헤더가 있으면 우선
+- Lambda 남은 시간이 LLM_DEADLINE_RESERVE_MS 아래로 떨어지면 새 batch를 시작하지 않음
+  → 시작 못 한 batch / 재시도할 시간이 없는 batch / 재시도를 다 써도 실패한 batch는
+    deferred 로 돌려줘서 다음 실행에서 처리
+"""
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class RetryLater(Exception):
+    """일시적 오류로 이번 실행에서는 처리 못 함 → batch를 deferred로"""
+
+
+class DeadlineExceeded(RetryLater):
+    pass
+
+
+class Deadline:
+    """context.get_remaining_time_in_millis 기반 남은 시간 계산 (context 없으면 무제한)"""
+
+    def __init__(self, context=None, reserve_ms=15000):
+        self.reserve_ms = reserve_ms
+        self._remaining = getattr(context, "get_remaining_time_in_millis", None)
+
+    def remaining_ms(self):
+        if self._remaining is None:
+            return float("inf")
+        return self._remaining() - self.reserve_ms
+
+    def expired(self):
+        return self.remaining_ms() <= 0
+
+    def cap_timeout(self, timeout_s, min_s=1.0):
+        """
+        요청 1회 timeout을 남은 시간(reserve 제외)까지로 제한
+        → 요청이 timeout까지 걸려도 reserve 안에서 결과 쓰기를 마칠 수 있음
+        min_s보다 적게 남았으면 요청하지 않고 DeadlineExceeded
+        """
+        remaining_s = self.remaining_ms() / 1000
+        if remaining_s < min_s:
+            raise DeadlineExceeded("no time left for request")
+        return min(timeout_s, remaining_s)
+
+
+class TokenBucket:
+    """rate개/초로 채워지고 최대 capacity개까지 쌓이는 버킷 (rate<=0 이면 제한 없음)"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_s = (1 - self._tokens) / self.rate
+
+            if deadline is not None and deadline.remaining_ms() < wait_s * 1000:
+                raise DeadlineExceeded("rate limit wait exceeds deadline")
+            time.sleep(wait_s)
+
+
+def call_with_retry(fn, is_retryable, max_retries=3, base_delay=0.5, max_delay=8.0, deadline=None, retry_after=None):
+    """
+    fn() 실행, is_retryable(e)인 오류는 백오프 후 재시도
+    retry_after(e): 서버가 알려준 대기 시간(초) 또는 None
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if attempt >= max_retries:
+                raise RetryLater(f"retries exhausted: {str(e)[:120]}") from e
+
+            delay = (retry_after(e) if retry_after else None)
+            if delay is None:
+                delay = min(max_delay, base_delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+            if deadline is not None and deadline.remaining_ms() < delay * 1000:
+                # 재시도할 시간이 없음 → 호출한 쪽에서 batch를 미룰 수 있게 구분
+                raise DeadlineExceeded(f"no time left to retry: {str(e)[:120]}") from e
+
+            attempt += 1
+            time.sleep(delay)
+
+
+class LLMBatchExecutor:
+    """
+    run(batches, fn) → (results, deferred)
+    - results : [(batch, fn(batch))] 완료 순서대로
+    - deferred: 마감 때문에 시작하지 않았거나 RetryLater로 끝난 batch 목록
+    fn 에서 난 예외는 on_error(batch, e) 결과로 대체
+    """
+
+    def __init__(self, max_workers=4, bucket=None, deadline=None):
+        self.max_workers = max(1, int(max_workers))
+        self.bucket = bucket
+        self.deadline = deadline or Deadline()
+
+    def _run_one(self, fn, batch):
+        if self.bucket is not None:
+            self.bucket.acquire(self.deadline)
+        return fn(batch)
+
+    def run(self, batches, fn, on_error):
+        results = []
+        deferred = []
+        queue = list(batches)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while queue or running:
+                while queue and len(running) < self.max_workers:
+                    if self.deadline.expired():
+                        deferred.extend(queue)
+                        queue = []
+                        break
+                    batch = queue.pop(0)
+                    running[pool.submit(self._run_one, fn, batch)] = batch
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    batch = running.pop(fut)
+                    try:
+                        results.append((batch, fut.result()))
+                    except RetryLater:
+                        deferred.append(batch)
+                    except Exception as e:
+                        results.append((batch, on_error(batch, e)))
+
+        return results, deferred
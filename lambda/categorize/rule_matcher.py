@@ -0,0 +1,86 @@
+# lambda/categorize/rule_matcher.py
+"""
+룰 분류기 (컴파일된 형태)
+- 도메인: host를 라벨 단위 suffix로 잘라 dict 조회 → 룰 개수와 무관하게 O(라벨 수)
+          여러 suffix가 맞으면 가장 긴(구체적인) 도메인 우선
+- host  : learned 룰처럼 그 host에만 맞는 룰 (서브도메인에는 적용 안 함), 같은 host의 도메인 룰 다음 순위
+- path  : 룰마다 패턴들을 정규식 하나로 합쳐서 순서대로 검사
+- 외부 룰 파일(JSON)로 룰 추가 가능 (CATEGORY_RULES_FILE)
+
+룰 파일 형식
+{
+  "domains": {"example.com": ["blog", 0.9, "domain=example.com"]},
+  "paths": [{"patterns": ["/wiki/"], "category": "docs", "confidence": 0.7, "reason": "path looks like wiki"}]
+}
+"""
+import json
+import re
+
+
+class RuleMatcher:
+    def __init__(self, domain_rules, path_rules):
+        """
+        domain_rules: {domain: (category, confidence, reason)}
+        path_rules  : [(patterns, category, confidence, reason)] (앞에 있을수록 우선)
+        """
+        self.domains = {d.lower(): tuple(r) for d, r in domain_rules.items()}
+        self.hosts = {}
+        self.paths = [
+            (re.compile("|".join(re.escape(p) for p in patterns)), (category, confidence, reason))
+            for patterns, category, confidence, reason in path_rules
+            if patterns
+        ]
+
+    def add_domain_rules(self, domain_rules, override=False):
+        """실행 중 룰 추가 (learned 룰 등). 기본은 기존 룰을 덮어쓰지 않음"""
+        for d, r in domain_rules.items():
+            d = d.lower()
+            if override or d not in self.domains:
+                self.domains[d] = tuple(r)
+
+    def add_host_rules(self, host_rules):
+        """host 정확히 일치할 때만 쓰는 룰 추가 (learned 룰)"""
+        for h, r in host_rules.items():
+            self.hosts[h.lower()] = tuple(r)
+
+    def remove_host_rules(self, hosts):
+        for h in hosts:
+            self.hosts.pop(h.lower(), None)
+
+    def match_domain(self, host: str):
+        # a.b.example.com → a.b.example.com(도메인 룰, host 룰), b.example.com, example.com, com
+        rule = self.domains.get(host) or self.hosts.get(host)
+        if rule:
+            return rule
+        idx = host.find(".") + 1
+        if idx == 0:
+            return None
+        while True:
+            rule = self.domains.get(host[idx:])
+            if rule:
+                return rule
+            idx = host.find(".", idx) + 1
+            if idx == 0:
+                return None
+
+    def match_path(self, path: str):
+        for pattern, rule in self.paths:
+            if pattern.search(path):
+                return rule
+        return None
+
+    def classify(self, host: str, path: str):
+        return self.match_domain(host) or self.match_path(path)
+
+
+def load_rules_file(path):
+    """룰 파일 → (domain_rules, path_rules)"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    domain_rules = {d: tuple(r) for d, r in (data.get("domains") or {}).items()}
+    path_rules = [
+        (r.get("patterns") or [], r["category"], r.get("confidence", 0.6), r.get("reason", "path rule"))
+        for r in (data.get("paths") or [])
+    ]
+    return domain_rules, path_rules
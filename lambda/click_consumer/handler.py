@@ -0,0 +1,586 @@
+# lambda/click_consumer/handler.py
+import json
+import os
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+
+# 공통 layer (lambda/common/python)
+import metrics
+import runtime
+from click_agg import OTHER_REFERER, click_ts, click_visitor, normalize_referer
+from click_counter import counter_from_env
+from click_sink import encode_events
+from hll import HyperLogLog
+from topk import SpaceSaving, summary_buckets
+
+# resource / client는 첫 DynamoDB 호출 때 생성
+dynamodb = runtime.lazy_resource('dynamodb')
+urls_table = runtime.table(os.environ.get('URLS_TABLE', 'urls'))
+clicks_table = runtime.table(os.environ.get('CLICKS_TABLE', 'clicks'))
+
+# clickCount 증가 (쓰기가 몰리는 링크는 click_counters 샤드로 분산)
+click_counter = counter_from_env(urls_table)
+
+# 시간/일 단위 클릭 집계 테이블 (없으면 rollup 갱신 생략)
+ROLLUPS_TABLE = os.environ.get('ROLLUPS_TABLE', '')
+rollups_table = runtime.table(ROLLUPS_TABLE) if ROLLUPS_TABLE else None
+ROLLUP_TTL_DAYS = int(os.environ.get('ROLLUP_TTL_DAYS', '40'))
+
+# update_item 1회에 넣을 카운터 수 (UpdateExpression 4KB 제한)
+ROLLUP_ATTRS_PER_UPDATE = 50
+# 시간 버킷당 referer 카운터 수 상한 (넘치면 other)
+ROLLUP_MAX_REFERERS = int(os.environ.get('ROLLUP_MAX_REFERERS', '100'))
+# 시간 버킷 → 이미 카운터가 있는 referer (컨테이너 메모리)
+_known_referers = {}
+
+# 일 단위 top shortId 요약 (SpaceSaving, 0이면 비활성)
+TOPK_CAPACITY = int(os.environ.get('TOPK_CAPACITY', '200'))
+# 일별 요약을 나눠 저장할 item 수 (consumer 동시 실행 시 한 item에 조건부 put이 몰리지 않게)
+TOPK_SHARDS = int(os.environ.get('TOPK_SHARDS', '8'))
+TOPK_MAX_RETRIES = 5
+
+# 고유 방문자 HyperLogLog (p=12: 레지스터 4096개, 오차 ≈ 1.6%, 0이면 비활성)
+HLL_PRECISION = int(os.environ.get('HLL_PRECISION', '12'))
+HLL_MAX_RETRIES = 5
+
+# 일부 shortId만 반영된 채 실패한 메시지의 반영 표시 (rollups 테이블 A#<메시지 키>, 클릭 큐 보존 기간 4일)
+APPLIED_MARKER_TTL_SECONDS = 4 * 86400
+
+
+@metrics.handler('click_consumer')
+def lambda_handler(event, context):
+    """
+    redirect가 보낸 클릭 이벤트를 일괄 저장 (SQS 트리거)
+    - 로컬 테스트: {"clickFile": "/tmp/clicks.ndjson"} 로 호출하면 file 백엔드 내용을 처리
+    """
+    if event.get('clickFile'):
+        result = drain_click_file(event['clickFile'])
+        print("click_consumer result:", result)
+        return result
+
+    messages = []
+
+    for record in event.get('Records', []):
+        batch_id, events = parse_message(record.get('body', ''))
+        if events is None:
+            # 잘못된 메시지는 재시도해도 실패하므로 로그만 남기고 버림
+            print("Invalid click message:", (record.get('body') or '')[:200])
+            continue
+        messages.append({
+            'id': record.get('messageId'),
+            # batchId가 있으면(hotlinks가 다시 보낼 수 있는 메시지) 메시지가 달라도 같은 반영 표시
+            'key': batch_id or record.get('messageId'),
+            'events': events,
+            # 다시 받은 메시지만 이전 시도의 반영 표시를 확인
+            'retried': receive_count(record) > 1,
+            'batched': batch_id is not None,
+        })
+
+    failures = [{'itemIdentifier': m['id']} for m in apply_messages(messages)]
+
+    print(f"click_consumer: messages={len(messages)} failed={len(failures)}")
+    return {'batchItemFailures': failures}
+
+
+def receive_count(record):
+    try:
+        return int((record.get('attributes') or {}).get('ApproximateReceiveCount', 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def parse_message(body):
+    """
+    메시지 body → (batchId, 이벤트 리스트)
+    - 배열/단건 이벤트, click_sink가 batch_id와 함께 보낸 {"batchId", "events"} 객체 허용
+    - 잘못된 body면 (None, None)
+    """
+    try:
+        data = json.loads(body)
+    except Exception:
+        return None, None
+
+    batch_id = None
+    if isinstance(data, dict) and isinstance(data.get('events'), list):
+        batch_id = str(data['batchId']) if data.get('batchId') else None
+        data = data['events']
+    elif isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return None, None
+
+    return batch_id, [e for e in data if isinstance(e, dict) and e.get('shortId') and e.get('timestamp')]
+
+
+def with_hour_bucket(e):
+    """analyze 증분 집계용 GSI(hourBucket + timestamp) 키 추가"""
+    ts = click_ts(e.get('timestamp'))
+    if not ts:
+        return e
+    return {**e, 'hourBucket': ts[:13]}
+
+
+def write_clicks(events):
+    """
+    clicks는 batch_writer로 25건씩 저장, clickCount는 shortId별로 합쳐서 1회씩 증가
+    (샤딩 모드로 승격된 링크는 click_counters 샤드 하나에 증가)
+    return: 저장/증가에 실패한 shortId 집합
+    """
+    if not events:
+        return set()
+
+    failed = set()
+    metrics.put('events', len(events))
+
+    try:
+        # 같은 (shortId, timestamp)가 한 배치에 있으면 BatchWriteItem이 거부하므로 덮어쓰기로 처리
+        with metrics.timer('put_clicks'), \
+                clicks_table.batch_writer(overwrite_by_pkeys=['shortId', 'timestamp']) as batch:
+            for e in events:
+                batch.put_item(Item=with_hour_bucket(e))
+    except Exception as e:
+        print(f"Failed to write clicks: {str(e)}")
+        return {ev.get('shortId') for ev in events}
+
+    counts = Counter(e['shortId'] for e in events)
+    with metrics.timer('click_counts'):
+        for short_id, n in counts.items():
+            try:
+                click_counter.increment(short_id, n)
+            except Exception as e:
+                print(f"Failed to increment clickCount ({short_id}): {str(e)}")
+                failed.add(short_id)
+
+    # 재시도될 이벤트는 rollup에서 제외 (중복 집계 방지)
+    ok_events = [e for e in events if e['shortId'] not in failed]
+    update_rollups(ok_events)
+    update_topk(ok_events)
+    update_visitors(ok_events)
+
+    return failed
+
+
+# -------------------------
+# Applied markers (메시지 재시도 시 이중 집계 방지)
+# -------------------------
+# bucket 키
+#   A#<메시지 키> : 이미 clickCount / rollup까지 반영된 shortId 집합 (shortIds, TTL expiresAt)
+#                  메시지 키는 messageId, batchId가 있는 메시지는 batchId
+# rollups 테이블이 없으면 표시 없이 실패한 shortId가 든 메시지 전체를 재시도 (기존 동작)
+def apply_messages(messages):
+    """
+    messages: [{'id': messageId, 'key': 반영 표시 키, 'events': [...], 'retried': bool, 'batched': bool}]
+    return: 다시 처리해야 할 메시지 리스트
+    - clickCount는 배치 전체에서 shortId별로 합쳐 증가하므로 한 shortId가 실패하면 그 shortId가 든 메시지만 실패
+    - 실패한 메시지 안의 다른 shortId는 이미 반영됐으므로 표시를 남기고, 재시도 때 그 이벤트는 건너뜀
+    - batchId 메시지는 새 메시지로 다시 올 수 있으므로 항상 표시를 확인하고, 성공해도 표시를 남김
+    """
+    failed = []
+    check = [m for m in messages if m['retried'] or m.get('batched')]
+    try:
+        applied = load_applied_markers([m['key'] for m in check])
+    except Exception as e:
+        # 표시를 확인할 수 없으면 해당 메시지는 처리하지 않고 다시 재시도
+        print(f"Failed to load applied markers: {str(e)}")
+        failed = check
+        messages = [m for m in messages if not (m['retried'] or m.get('batched'))]
+        applied = {}
+
+    pending = []  # (message, 이번에 반영할 이벤트)
+    skipped = 0
+    seen = set()
+    for m in messages:
+        done = applied.get(m['key'], set())
+        if m.get('batched') and m['key'] in seen:
+            # 원래 메시지와 다시 보낸 메시지가 같은 배치로 들어온 경우 한 번만 반영
+            done = {e['shortId'] for e in m['events']}
+        seen.add(m['key'])
+        events = [e for e in m['events'] if e['shortId'] not in done]
+        skipped += len(m['events']) - len(events)
+        pending.append((m, events))
+    if skipped:
+        metrics.put('events.already_applied', skipped)
+
+    failed_ids = write_clicks([e for _, events in pending for e in events])
+
+    for m, events in pending:
+        short_ids = {e['shortId'] for e in events}
+        if short_ids & failed_ids:
+            failed.append(m)
+        elif not m.get('batched'):
+            continue
+
+        before = applied.get(m['key'], set())
+        done = before | (short_ids - failed_ids)
+        if done != before:
+            save_applied_marker(m['key'], done)
+
+    return failed
+
+
+def load_applied_markers(keys):
+    """BatchGetItem으로 {메시지 키: 반영된 shortId 집합} (표시가 없는 키는 빠짐)"""
+    if rollups_table is None or not keys:
+        return {}
+
+    # 같은 batchId 메시지가 한 배치에 여러 개일 수 있음 (BatchGetItem은 중복 키 거부)
+    keys = list(dict.fromkeys(keys))
+    found = {}
+    for i in range(0, len(keys), 100):
+        request = {rollups_table.name: {
+            'Keys': [{'bucket': f"A#{k}"} for k in keys[i:i + 100]],
+            'ProjectionExpression': '#b, shortIds',
+            'ExpressionAttributeNames': {'#b': 'bucket'},
+            'ConsistentRead': True,
+        }}
+        while request:
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            for row in resp.get('Responses', {}).get(rollups_table.name, []):
+                found[row['bucket'][2:]] = set(row.get('shortIds') or ())
+            request = resp.get('UnprocessedKeys') or None
+    return found
+
+
+def save_applied_marker(key, short_ids):
+    if rollups_table is None:
+        return
+    try:
+        rollups_table.put_item(Item={
+            'bucket': f"A#{key}",
+            'shortIds': set(short_ids),
+            'expiresAt': int(time.time()) + APPLIED_MARKER_TTL_SECONDS,
+        })
+    except Exception as e:
+        print(f"Failed to save applied marker ({key}), retry may double count: {str(e)}")
+
+
+# -------------------------
+# Rollups
+# -------------------------
+# bucket 키
+#   H#YYYY-MM-DDTHH        : 시간 버킷 (UTC) - total, r#<referer>
+#   S#<shortId>#YYYY-MM-DD : shortId별 일 클릭 수 (clicks)
+#                            → 링크 수가 늘어도 시간 버킷 item 크기 / 쓰기 비용은 그대로
+# 카운터 속성
+#   total           : 전체 클릭 수
+#   r#<referer>     : 유입 경로별 (click_agg.normalize_referer 규칙)
+#                     버킷당 ROLLUP_MAX_REFERERS개까지, 넘치는 새 referer는 r#other 로 합산
+def rollup_counters(events):
+    """이벤트 → {bucket: Counter(속성 → 증가량)}"""
+    buckets = defaultdict(Counter)
+
+    for e in events:
+        ts = click_ts(e.get('timestamp'))
+        if not ts:
+            continue
+
+        counters = buckets["H#" + ts[:13]]
+        counters['total'] += 1
+        counters['r#' + normalize_referer(e.get('referer'))] += 1
+        buckets[f"S#{e['shortId']}#{ts[:10]}"]['clicks'] += 1
+
+    return buckets
+
+
+def cap_referers(buckets):
+    """
+    시간 버킷의 r# 카운터 수를 ROLLUP_MAX_REFERERS개로 제한
+    - 버킷 item에 이미 있는 referer는 컨테이너 메모리에 기억 → 처음 보는 referer가 있는 버킷만 다시 읽음
+    - 여러 consumer가 동시에 새 referer를 넣으면 조금 넘을 수 있음 (근사 상한)
+    """
+    hour_buckets = [b for b in buckets if b.startswith("H#")]
+
+    if len(_known_referers) > 256:
+        for bucket in [b for b in _known_referers if b not in buckets]:
+            del _known_referers[bucket]
+
+    unknown = [
+        b for b in hour_buckets
+        if any(a.startswith('r#') and a[2:] not in _known_referers.get(b, ()) for a in buckets[b])
+    ]
+    for row in read_buckets(unknown):
+        _known_referers[row['bucket']] = {a[2:] for a in row if a.startswith('r#')}
+
+    for bucket in hour_buckets:
+        counters = buckets[bucket]
+        known = _known_referers.setdefault(bucket, set())
+        new = sorted((a for a in counters if a.startswith('r#') and a[2:] not in known),
+                     key=lambda a: counters[a], reverse=True)
+        for attr in new:
+            if len(known) < ROLLUP_MAX_REFERERS:
+                known.add(attr[2:])
+                continue
+            counters['r#' + OTHER_REFERER] += counters.pop(attr)
+            known.add(OTHER_REFERER)
+            metrics.put('rollups.referers_capped')
+
+
+def read_buckets(buckets):
+    """BatchGetItem으로 버킷 item 전체 (시간 버킷은 total + r# 카운터뿐이라 작음)"""
+    rows = []
+    for i in range(0, len(buckets), 100):
+        request = {rollups_table.name: {'Keys': [{'bucket': b} for b in buckets[i:i + 100]]}}
+        while request:
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            rows.extend(resp.get('Responses', {}).get(rollups_table.name, []))
+            request = resp.get('UnprocessedKeys') or None
+    return rows
+
+
+@metrics.timed('rollups')
+def update_rollups(events):
+    """
+    버킷별 카운터 ADD
+    - clicks/clickCount는 이미 반영된 상태라 실패해도 메시지를 재시도하지 않음 (로그 + rollups.errors)
+    """
+    if rollups_table is None or not events:
+        return
+
+    expires_at = int(time.time()) + ROLLUP_TTL_DAYS * 86400
+    buckets = rollup_counters(events)
+    try:
+        cap_referers(buckets)
+    except Exception as e:
+        # 상한 확인 실패 시 이번 배치의 새 referer는 모두 other로
+        print(f"Failed to read rollup referers: {str(e)}")
+        for bucket, counters in buckets.items():
+            known = _known_referers.get(bucket, ())
+            for attr in [a for a in counters if a.startswith('r#') and a[2:] not in known]:
+                counters['r#' + OTHER_REFERER] += counters.pop(attr)
+
+    for bucket, counters in buckets.items():
+        attrs = list(counters.items())
+        for i in range(0, len(attrs), ROLLUP_ATTRS_PER_UPDATE):
+            chunk = attrs[i:i + ROLLUP_ATTRS_PER_UPDATE]
+
+            names = {}
+            values = {}
+            parts = []
+            for j, (attr, n) in enumerate(chunk):
+                names[f"#a{j}"] = attr
+                values[f":v{j}"] = n
+                parts.append(f"#a{j} :v{j}")
+
+            values[':exp'] = expires_at
+            try:
+                rollups_table.update_item(
+                    Key={'bucket': bucket},
+                    UpdateExpression='ADD ' + ', '.join(parts) + ' SET expiresAt = :exp',
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues=values
+                )
+            except Exception as e:
+                print(f"Failed to update rollup ({bucket}): {str(e)}")
+                metrics.put('rollups.errors')
+
+
+# -------------------------
+# Top-K
+# -------------------------
+# bucket 키
+#   TOPK#YYYY-MM-DD[#n] : 일 단위 SpaceSaving 요약 샤드 (summary JSON + version, 샤드 0은 #n 없음)
+# analyze / hotlinks가 날짜별 샤드를 모두 merge 해서 사용 → urls 전체를 읽지 않음
+@metrics.timed('topk')
+def update_topk(events):
+    """
+    일별 요약 샤드 하나에 이번 배치의 shortId별 클릭 수를 반영
+    - 배치마다 임의의 샤드를 골라서 consumer 동시 실행 시에도 같은 item 경합이 적음
+    - 여러 consumer가 같은 샤드를 고를 수 있으므로 version 조건부 put (실패 시 다른 샤드로 재시도)
+    - rollup과 마찬가지로 실패해도 메시지를 재시도하지 않음 (지표 topk.dropped)
+    """
+    if rollups_table is None or TOPK_CAPACITY <= 0 or not events:
+        return
+
+    by_day = defaultdict(Counter)
+    for e in events:
+        ts = click_ts(e.get('timestamp'))
+        if ts:
+            by_day[ts[:10]][e['shortId']] += 1
+
+    expires_at = int(time.time()) + ROLLUP_TTL_DAYS * 86400
+
+    for day, counts in by_day.items():
+        shards = summary_buckets(day, TOPK_SHARDS)
+        for _ in range(TOPK_MAX_RETRIES):
+            bucket = random.choice(shards)
+            try:
+                item = rollups_table.get_item(Key={'bucket': bucket}, ConsistentRead=True).get('Item') or {}
+                version = int(item.get('version', 0))
+
+                summary = SpaceSaving.from_json(item.get('summary'), capacity=TOPK_CAPACITY)
+                # 큰 값부터 넣어야 작은 값이 밀려나도 오차가 작음
+                for short_id, n in counts.most_common():
+                    summary.offer(short_id, n)
+
+                rollups_table.put_item(
+                    Item={
+                        'bucket': bucket,
+                        'summary': summary.to_json(),
+                        'version': version + 1,
+                        'expiresAt': expires_at,
+                    },
+                    ConditionExpression='attribute_not_exists(#b) OR #ver = :v',
+                    ExpressionAttributeNames={'#b': 'bucket', '#ver': 'version'},
+                    ExpressionAttributeValues={':v': version},
+                )
+                break
+            except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+            except Exception as e:
+                print(f"Failed to update top-k ({bucket}): {str(e)}")
+                metrics.put('topk.dropped', sum(counts.values()))
+                break
+        else:
+            print(f"Failed to update top-k (TOPK#{day}): too many concurrent updates")
+            metrics.put('topk.dropped', sum(counts.values()))
+
+
+# -------------------------
+# Unique visitors (HyperLogLog)
+# -------------------------
+# bucket 키 (속성 hll + 조건부 갱신용 hllVersion)
+#   V#YYYY-MM-DDTHH        : 전체 서비스 시간 버킷 sketch (trends)
+#                            → H# 카운터와 다른 item이라 ADD 가 sketch 크기(4KB)만큼 과금되지 않음
+#   U#<shortId>#YYYY-MM-DD : shortId별 일 버킷 sketch (stats)
+# sketch는 레지스터별 max로 합쳐지므로 시간/일 버킷을 합쳐도 같은 방문자는 한 번만 셈
+def visitor_sketches(events):
+    """이벤트 → {bucket: HyperLogLog}"""
+    sketches = {}
+
+    for e in events:
+        ts = click_ts(e.get('timestamp'))
+        visitor = click_visitor(e)
+        if not ts or not visitor:
+            continue
+
+        for bucket in ("V#" + ts[:13], f"U#{e['shortId']}#{ts[:10]}"):
+            sketch = sketches.get(bucket)
+            if sketch is None:
+                sketch = sketches[bucket] = HyperLogLog(HLL_PRECISION)
+            sketch.add(visitor)
+
+    return sketches
+
+
+@metrics.timed('visitors')
+def update_visitors(events):
+    """
+    버킷별 sketch를 읽어서 merge 후 hllVersion 조건부 update
+    - 레지스터가 바뀌지 않으면(이미 본 방문자) 쓰지 않음
+    - 처음 읽기는 BatchGetItem으로 한 번에, 조건 실패한 버킷만 다시 읽음
+    """
+    if rollups_table is None or HLL_PRECISION <= 0 or not events:
+        return
+
+    sketches = visitor_sketches(events)
+    if not sketches:
+        return
+
+    expires_at = int(time.time()) + ROLLUP_TTL_DAYS * 86400
+    try:
+        current = read_sketches(list(sketches))
+    except Exception as e:
+        print(f"Failed to read visitor sketches: {str(e)}")
+        return
+
+    for bucket, sketch in sketches.items():
+        item = current.get(bucket)
+        for _ in range(HLL_MAX_RETRIES):
+            try:
+                if item is None:
+                    item = rollups_table.get_item(
+                        Key={'bucket': bucket},
+                        ProjectionExpression='hll, hllVersion',
+                        ConsistentRead=True
+                    ).get('Item') or {}
+
+                version = int(item.get('hllVersion', 0))
+                merged = HyperLogLog.from_bytes(item.get('hll'), p=HLL_PRECISION)
+                before = bytes(merged.registers)
+                merged.merge(sketch)
+                if version and bytes(merged.registers) == before:
+                    break
+
+                rollups_table.update_item(
+                    Key={'bucket': bucket},
+                    UpdateExpression='SET hll = :h, hllVersion = :next, expiresAt = :exp',
+                    ConditionExpression='attribute_not_exists(hllVersion) OR hllVersion = :v',
+                    ExpressionAttributeValues={
+                        ':h': merged.to_bytes(),
+                        ':next': version + 1,
+                        ':v': version,
+                        ':exp': expires_at,
+                    }
+                )
+                break
+            except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+                item = None
+                continue
+            except Exception as e:
+                print(f"Failed to update visitors ({bucket}): {str(e)}")
+                break
+        else:
+            print(f"Failed to update visitors ({bucket}): too many concurrent updates")
+
+
+def read_sketches(buckets):
+    """BatchGetItem으로 {bucket: {hll, hllVersion}} (없는 버킷은 빈 dict)"""
+    found = {bucket: {} for bucket in buckets}
+    for i in range(0, len(buckets), 100):
+        request = {rollups_table.name: {
+            'Keys': [{'bucket': b} for b in buckets[i:i + 100]],
+            'ProjectionExpression': '#b, hll, hllVersion',
+            'ExpressionAttributeNames': {'#b': 'bucket'},
+            'ConsistentRead': True,
+        }}
+        while request:
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            for row in resp.get('Responses', {}).get(rollups_table.name, []):
+                found[row['bucket']] = row
+            request = resp.get('UnprocessedKeys') or None
+    return found
+
+
+def drain_click_file(path):
+    """
+    file 백엔드(NDJSON) 처리 후 비움
+    - 실패한 메시지는 반영 표시 키를 batchId로 붙여 파일에 다시 기록
+      → 다음 drain에서 batchId 메시지로 처리되어 이미 반영된 shortId는 건너뜀
+    """
+    if not os.path.exists(path):
+        return {'processed': 0, 'failed': 0}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    open(path, 'w').close()
+
+    # batchId 없는 줄의 키는 drain마다 달라야 이전 drain의 표시와 섞이지 않음
+    drain_id = uuid.uuid4().hex[:12]
+    messages = []
+    for n, line in enumerate(lines):
+        batch_id, events = parse_message(line)
+        if events:
+            messages.append({
+                'id': n,
+                'key': batch_id or f"file:{drain_id}:{n}",
+                'events': events,
+                'retried': False,
+                'batched': batch_id is not None,
+            })
+
+    try:
+        failed_messages = apply_messages(messages)
+    except Exception as e:
+        print(f"Failed to apply click file: {str(e)}")
+        failed_messages = messages
+
+    if failed_messages:
+        with open(path, 'a', encoding='utf-8') as f:
+            for m in failed_messages:
+                f.write(encode_events(m['events'], m['key']) + '\n')
+
+    total = sum(len(m['events']) for m in messages)
+    failed = sum(len(m['events']) for m in failed_messages)
+    return {'processed': total - failed, 'failed': failed}
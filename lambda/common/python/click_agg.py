@@ -0,0 +1,181 @@
+# lambda/common/python/click_agg.py
+"""
+클릭 집계 공통 모듈 (Lambda layer: analyze / stats / click_consumer / redirect / hotlinks 공용)
+- clicks 페이지 iterator를 한 번만 훑으면서 시간 버킷 부분 집계(hours)에 누적
+  → 클릭 목록을 메모리에 쌓지 않음 (메모리는 시간 버킷 수 × referer 수 에 비례)
+- timestamp는 고정 형식 문자열 슬라이싱으로 처리, 형식이 다를 때만 datetime 파싱
+- referer 정규화 규칙은 여기 하나만 사용 (rollup r# 키 / analyze / stats 공통)
+- visitors(HyperLogLog)를 넘기면 구간 안 클릭의 ip(hash_ip 값)도 함께 sketch에 넣음
+
+hours: {"YYYY-MM-DDTHH": {"t": 클릭 수, "r": {referer: 클릭 수}}}
+layer 빌드: cd lambda/common && zip -r common_layer.zip python
+"""
+import hashlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+_UTC_SUFFIXES = ("Z", "+00:00")
+
+# rollup 시간 버킷의 referer 수 상한을 넘은 referer를 합산하는 이름
+OTHER_REFERER = "other"
+
+
+def click_ts(ts):
+    """
+    clicks.timestamp → UTC 기준 naive isoformat 문자열 ("YYYY-MM-DDTHH:MM:SS[.ffffff]"), 실패 시 None
+    - 같은 형식끼리는 문자열 비교 = 시간 비교, 앞 13자리 = 시간 버킷 키
+    - redirect가 저장하는 naive UTC isoformat / Z / +00:00 은 파싱 없이 처리
+    """
+    if not isinstance(ts, str):
+        return None
+
+    for suffix in _UTC_SUFFIXES:
+        if ts.endswith(suffix):
+            ts = ts[:-len(suffix)]
+            break
+
+    if (
+        len(ts) >= 19 and ts[4] == "-" and ts[7] == "-" and ts[10] == "T"
+        and ts[13] == ":" and ts[16] == ":" and "+" not in ts and "-" not in ts[19:]
+    ):
+        return ts
+
+    return _click_ts_slow(ts)
+
+
+def _click_ts_slow(ts):
+    try:
+        dt = datetime.fromisoformat(ts)
+    except Exception:
+        return None
+    # naive면 UTC로 간주
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat()
+
+
+def to_click_ts(dt):
+    """datetime → click_ts와 같은 형식 (집계 구간 경계값용)"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat()
+
+
+def normalize_referer(raw):
+    """빈 값/'-'/'null' → direct, URL → 도메인(netloc), 그 외(이미 도메인 등)는 그대로"""
+    if not raw:
+        return "direct"
+    raw = str(raw).strip()
+    if raw in ("-", "null", "None"):
+        return "direct"
+    if raw.startswith("http://") or raw.startswith("https://"):
+        try:
+            return urlparse(raw).netloc or "direct"
+        except Exception:
+            return "direct"
+    return raw
+
+
+def click_referer(click):
+    return normalize_referer(click.get("referer") or click.get("referrer") or click.get("source"))
+
+
+def hash_ip(ip):
+    """클릭 이벤트 ip 값 (IP 원문은 저장하지 않음, redirect / edge 로그 수집 공통)"""
+    if not ip:
+        return "unknown"
+    return hashlib.sha256(ip.encode()).hexdigest()[:16]
+
+
+def click_visitor(click):
+    """hash_ip 값 (sourceIp가 없어서 'unknown'이면 None → 방문자 집계 제외)"""
+    ip = click.get("ip")
+    if not ip or ip == "unknown":
+        return None
+    return ip
+
+
+class ClickAggregator:
+    """
+    hours에 클릭을 스트리밍으로 누적
+    - after / until: click_ts 형식 경계 (after는 include_after에 따라 포함/제외, until은 포함)
+    - visitors: 고유 방문자 sketch (hll.HyperLogLog, 없으면 집계 안 함)
+    """
+
+    def __init__(self, hours=None, after=None, until=None, include_after=False, visitors=None):
+        self.hours = hours if hours is not None else {}
+        self.after = after
+        self.until = until
+        self.include_after = include_after
+        self.visitors = visitors
+        self.count = 0
+
+    def add(self, click):
+        """구간 안의 클릭이면 누적하고 정규화된 timestamp 반환, 아니면 None"""
+        ts = click_ts(click.get("timestamp"))
+        if ts is None:
+            return None
+        if self.after is not None and (ts < self.after or (ts == self.after and not self.include_after)):
+            return None
+        if self.until is not None and ts > self.until:
+            return None
+
+        key = ts[:13]
+        bucket = self.hours.get(key)
+        if bucket is None:
+            bucket = self.hours[key] = {"t": 0, "r": {}}
+        bucket["t"] += 1
+        ref = click_referer(click)
+        bucket["r"][ref] = bucket["r"].get(ref, 0) + 1
+        if self.visitors is not None:
+            self.visitors.add(click_visitor(click))
+        self.count += 1
+        return ts
+
+    def consume(self, pages):
+        """pages: 클릭 리스트(페이지)의 iterator"""
+        for page in pages:
+            for click in page:
+                self.add(click)
+        return self
+
+    def summary(self, since_key=None):
+        return summarize_hours(self.hours, since_key)
+
+
+def expire_hours(hours, oldest_key):
+    """oldest_key(시간 버킷 키) 이전 버킷 제거"""
+    return {k: v for k, v in hours.items() if k >= oldest_key}
+
+
+def summarize_hours(hours, since_key=None):
+    """
+    hours → analyze / stats 공통 응답 형태
+    clicksByHour 키는 UTC 시(0~23) 문자열, peakHour도 같은 문자열
+    """
+    clicks_by_hour = defaultdict(int)
+    clicks_by_day = defaultdict(int)
+    clicks_by_referer = defaultdict(int)
+    total = 0
+
+    for key, bucket in hours.items():
+        if since_key is not None and key < since_key:
+            continue
+        n = int(bucket.get("t", 0))
+        if n <= 0:
+            continue
+        total += n
+        clicks_by_hour[str(int(key[11:13]))] += n
+        clicks_by_day[key[:10]] += n
+        for ref, v in bucket.get("r", {}).items():
+            clicks_by_referer[ref] += int(v)
+
+    return {
+        "totalClicks": total,
+        "clicksByHour": dict(clicks_by_hour),
+        "clicksByDay": dict(clicks_by_day),
+        "clicksByReferer": dict(clicks_by_referer),
+        "peakHour": max(clicks_by_hour, key=clicks_by_hour.get) if clicks_by_hour else None,
+        "topReferer": max(clicks_by_referer, key=clicks_by_referer.get) if clicks_by_referer else None,
+    }
@@ -0,0 +1,161 @@
+# lambda/common/python/click_counter.py
+"""
+shortId별 누적 클릭 수 (clickCount) 샤딩 카운터
+- 평소에는 urls item의 clickCount를 그대로 증가
+- 한 shortId에 쓰기가 몰리면(컨테이너 기준 쓰기 빈도가 임계값 초과 / throttling 발생)
+  urls item에 counterShards = N 을 기록해서 샤딩 모드로 승격 (한 번 승격되면 되돌리지 않음)
+- 샤딩 모드: click_counters 테이블의 (shortId, shard=0..N-1) item 중 하나를 무작위로 골라 ADD
+  → 쓰기가 N개 item으로 분산
+- 읽기: clickCount(승격 전까지 누적) + 샤드 합계 (shortId 파티션 query 1회)
+
+CLICK_COUNTERS_TABLE 이 없으면 샤딩 없이 clickCount만 사용
+"""
+import os
+import random
+import time
+
+import runtime
+
+_THROTTLE_CODES = ("ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded")
+
+
+def _error_code(e):
+    return getattr(e, "response", {}).get("Error", {}).get("Code", "")
+
+
+class ShardedClickCounter:
+    def __init__(self, urls_table, shards_table=None, shard_count=16, hot_writes_per_sec=10.0, window_seconds=10.0):
+        """
+        hot_writes_per_sec: window_seconds 동안 한 shortId에 대한 increment 호출 빈도가 이 값을 넘으면 승격
+        """
+        self.urls_table = urls_table
+        self.shards_table = shards_table
+        self.shard_count = max(1, int(shard_count))
+        self.hot_writes_per_sec = float(hot_writes_per_sec)
+        self.window_seconds = float(window_seconds)
+        # shortId -> 샤드 수 (승격된 링크만, 되돌리지 않으므로 계속 캐시)
+        self._shards = {}
+        # shortId -> [window 시작 시각, 쓰기 횟수]
+        self._writes = {}
+
+    def increment(self, short_id, n=1):
+        """실패 시 예외 (호출 쪽에서 재시도 판단)"""
+        if self.shards_table is None:
+            self._increment_item(short_id, n, sharded_check=False)
+            return
+
+        shards = self._shards.get(short_id)
+        if shards is None and self._is_hot(short_id):
+            shards = self.promote(short_id)
+
+        if shards is None:
+            try:
+                self._increment_item(short_id, n, sharded_check=True)
+                return
+            except Exception as e:
+                code = _error_code(e)
+                if code == "ConditionalCheckFailedException":
+                    # 다른 컨테이너가 이미 승격시킨 링크
+                    shards = self._load_shards(short_id)
+                elif code in _THROTTLE_CODES:
+                    print(f"clickCount throttled, promoting {short_id} to sharded counter")
+                    shards = self.promote(short_id)
+                else:
+                    raise
+                if not shards:
+                    raise
+
+        self.shards_table.update_item(
+            Key={"shortId": short_id, "shard": random.randrange(shards)},
+            UpdateExpression="ADD clicks :inc",
+            ExpressionAttributeValues={":inc": n},
+        )
+
+    def _increment_item(self, short_id, n, sharded_check):
+        kwargs = {
+            "Key": {"shortId": short_id},
+            "UpdateExpression": "SET clickCount = if_not_exists(clickCount, :zero) + :inc",
+            "ExpressionAttributeValues": {":zero": 0, ":inc": n},
+        }
+        if sharded_check:
+            kwargs["ConditionExpression"] = "attribute_not_exists(counterShards)"
+        self.urls_table.update_item(**kwargs)
+
+    def _is_hot(self, short_id):
+        """컨테이너 메모리 기준 고정 window 쓰기 빈도"""
+        now = time.monotonic()
+        entry = self._writes.get(short_id)
+        if entry is None or now - entry[0] >= self.window_seconds:
+            # 오래된 항목 정리 (메모리가 shortId 수만큼 계속 늘지 않도록)
+            if len(self._writes) > 10000:
+                self._writes = {k: v for k, v in self._writes.items() if now - v[0] < self.window_seconds}
+            self._writes[short_id] = [now, 1]
+            return False
+
+        entry[1] += 1
+        return entry[1] / self.window_seconds > self.hot_writes_per_sec
+
+    def promote(self, short_id):
+        """urls item에 counterShards 기록 (이미 승격돼 있으면 기존 값 사용)"""
+        try:
+            self.urls_table.update_item(
+                Key={"shortId": short_id},
+                UpdateExpression="SET counterShards = :n",
+                ConditionExpression="attribute_exists(shortId) AND attribute_not_exists(counterShards)",
+                ExpressionAttributeValues={":n": self.shard_count},
+            )
+            print(f"Promoted {short_id} to sharded counter (shards={self.shard_count})")
+            self._shards[short_id] = self.shard_count
+            return self.shard_count
+        except Exception as e:
+            if _error_code(e) != "ConditionalCheckFailedException":
+                print(f"Failed to promote {short_id}: {str(e)}")
+                return None
+        return self._load_shards(short_id)
+
+    def _load_shards(self, short_id):
+        item = self.urls_table.get_item(
+            Key={"shortId": short_id},
+            ProjectionExpression="counterShards",
+        ).get("Item") or {}
+        shards = int(item.get("counterShards", 0)) or None
+        if shards:
+            self._shards[short_id] = shards
+        return shards
+
+
+def read_click_count(url_item, shards_table=None):
+    """urls item → 누적 클릭 수 (샤딩된 링크는 샤드 합계를 더함)"""
+    total = int(url_item.get("clickCount", 0) or 0)
+    if shards_table is None or not url_item.get("counterShards"):
+        return total
+
+    kwargs = {
+        "KeyConditionExpression": "shortId = :id",
+        "ExpressionAttributeValues": {":id": url_item["shortId"]},
+        "ProjectionExpression": "clicks",
+    }
+    while True:
+        resp = shards_table.query(**kwargs)
+        total += sum(int(row.get("clicks", 0)) for row in resp.get("Items", []))
+        if "LastEvaluatedKey" not in resp:
+            return total
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def shards_table_from_env(dynamodb=None):
+    """dynamodb(resource)를 주지 않으면 첫 호출 때 생성되는 runtime.table"""
+    name = os.environ.get("CLICK_COUNTERS_TABLE", "")
+    if not name:
+        return None
+    return dynamodb.Table(name) if dynamodb is not None else runtime.table(name)
+
+
+def counter_from_env(urls_table, dynamodb=None):
+    return ShardedClickCounter(
+        urls_table,
+        shards_table_from_env(dynamodb),
+        shard_count=int(os.environ.get("CLICK_COUNTER_SHARDS", "16")),
+        hot_writes_per_sec=float(os.environ.get("CLICK_COUNTER_HOT_WRITES_PER_SEC", "10")),
+        window_seconds=float(os.environ.get("CLICK_COUNTER_WINDOW_SECONDS", "10")),
+    )
@@ -0,0 +1,150 @@
+# lambda/common/python/click_sink.py
+"""
+클릭 이벤트 싱크 (Lambda layer: redirect / hotlinks 공용)
+- redirect는 클릭 이벤트를 버퍼에 넣기만 하고 바로 응답
+- hotlinks는 edge(CloudFront Function)가 응답한 요청을 CloudFront 로그에서 클릭 이벤트로 만들어 같은 형식으로 전송
+- 실제 clicks 저장 / clickCount 증가는 click_consumer Lambda가 모아서 일괄 처리
+
+CLICK_SINK_BACKEND
+- sqs      : CLICK_QUEUE_URL 로 전송 (운영)
+- file     : CLICK_SINK_FILE 에 NDJSON으로 append (로컬 테스트용 SQS 대용)
+- dynamodb : 기존 동작 (clicks put + clickCount update를 동기로 수행)
+
+batch_id: 같은 입력을 다시 보낼 수 있는 호출자(hotlinks의 S3 재시도)가 넘기는 고정 키
+- 메시지 body가 {"batchId": "<batch_id>#<청크 번호>", "events": [...]} 로 바뀌고
+  click_consumer는 batchId별 반영 표시로 다시 보낸 메시지를 건너뜀
+"""
+import json
+import os
+import time
+
+import runtime
+
+# SQS 메시지 최대 256KB → 이벤트 1건이 ~300B 수준이라 여유 있게 제한
+MAX_EVENTS_PER_MESSAGE = 200
+
+
+def encode_events(events, batch_id=None):
+    """이벤트 리스트를 compact JSON 문자열로 직렬화 (batch_id가 있으면 batchId와 함께 객체로)"""
+    body = events if batch_id is None else {'batchId': batch_id, 'events': events}
+    return json.dumps(body, separators=(',', ':'), ensure_ascii=False)
+
+
+def chunk_batch_id(batch_id, index):
+    return None if batch_id is None else f"{batch_id}#{index}"
+
+
+class SqsClickBackend:
+    """한 메시지 body에 이벤트 여러 개(JSON 배열, batch_id가 있으면 batchId 객체)를 담아 전송"""
+
+    def __init__(self, queue_url, client=None):
+        self.queue_url = queue_url
+        self.client = client or runtime.lazy_client('sqs')
+
+    def send(self, events, batch_id=None):
+        # 청크 번호는 이벤트 순서로 정해지므로 같은 입력을 다시 보내면 같은 batchId
+        for i in range(0, len(events), MAX_EVENTS_PER_MESSAGE):
+            chunk = events[i:i + MAX_EVENTS_PER_MESSAGE]
+            body = encode_events(chunk, chunk_batch_id(batch_id, i // MAX_EVENTS_PER_MESSAGE))
+            self.client.send_message(QueueUrl=self.queue_url, MessageBody=body)
+
+
+class FileClickBackend:
+    """로컬 테스트용: 한 줄에 이벤트 배열 하나씩 NDJSON으로 기록"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, events, batch_id=None):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(encode_events(events, chunk_batch_id(batch_id, 0)) + '\n')
+
+
+class DynamoDBClickBackend:
+    """큐가 없는 환경용 폴백 (기존 동기 처리와 동일)"""
+
+    def __init__(self, clicks_table, counter):
+        """counter: click_counter.ShardedClickCounter (click_consumer와 같은 clickCount 증가 규칙)"""
+        self.clicks_table = clicks_table
+        self.counter = counter
+
+    def send(self, events, batch_id=None):
+        """batch_id는 받기만 함 (clicks put은 같은 키로 덮어쓰지만 clickCount는 다시 보내면 다시 증가)"""
+        for e in events:
+            # click_consumer와 동일하게 analyze 증분 집계용 GSI 키 추가 (timestamp는 UTC isoformat)
+            self.clicks_table.put_item(Item={**e, 'hourBucket': e['timestamp'][:13]})
+            self.counter.increment(e['shortId'])
+
+
+class BufferedClickSink:
+    """
+    컨테이너 메모리 버퍼
+    - max_batch건이 쌓이거나 가장 오래된 이벤트가 max_age_seconds를 넘으면 flush
+    - 기본값(max_batch=1)은 매 요청마다 flush → DynamoDB 쓰기 2회가 메시지 전송 1회로 바뀜
+    - max_batch를 키우면 호출 수는 줄지만, 컨테이너 종료 시 버퍼에 남은 이벤트는 유실될 수 있음
+    """
+
+    def __init__(self, backend, max_batch=1, max_age_seconds=0.0, max_buffer=1000):
+        self.backend = backend
+        self.max_batch = max(1, int(max_batch))
+        self.max_age_seconds = float(max_age_seconds)
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._oldest_at = None
+
+    def emit(self, event):
+        if not self._buffer:
+            self._oldest_at = time.monotonic()
+        self._buffer.append(event)
+
+        if len(self._buffer) >= self.max_batch or self._is_stale():
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return 0
+
+        events = self._buffer
+        self._buffer = []
+        self._oldest_at = None
+
+        try:
+            self.backend.send(events)
+            return len(events)
+        except Exception as e:
+            print(f"Failed to flush clicks: {str(e)}")
+            # 다음 flush 때 재시도 (버퍼가 무한히 커지지 않도록 오래된 것부터 버림)
+            self._buffer = (events + self._buffer)[-self.max_buffer:]
+            self._oldest_at = time.monotonic()
+            return 0
+
+    def _is_stale(self):
+        if self._oldest_at is None or self.max_age_seconds <= 0:
+            return False
+        return time.monotonic() - self._oldest_at >= self.max_age_seconds
+
+
+def create_backend_from_env(clicks_table=None, urls_table=None):
+    """CLICK_SINK_BACKEND / CLICK_QUEUE_URL → 백엔드 (dynamodb 폴백은 clicks / urls table 필요)"""
+    queue_url = os.environ.get('CLICK_QUEUE_URL', '')
+    backend_name = os.environ.get('CLICK_SINK_BACKEND') or ('sqs' if queue_url else 'dynamodb')
+
+    if backend_name == 'sqs':
+        return SqsClickBackend(queue_url)
+    if backend_name == 'file':
+        return FileClickBackend(os.environ.get('CLICK_SINK_FILE', '/tmp/clicks.ndjson'))
+    if clicks_table is None or urls_table is None:
+        raise ValueError(f"click sink backend '{backend_name}' requires clicks / urls tables")
+
+    # 폴백 백엔드에서만 필요하므로 여기서 import
+    from click_counter import counter_from_env
+    return DynamoDBClickBackend(clicks_table, counter_from_env(urls_table))
+
+
+def create_sink_from_env(clicks_table, urls_table):
+    backend = create_backend_from_env(clicks_table, urls_table)
+    return BufferedClickSink(
+        backend,
+        max_batch=int(os.environ.get('CLICK_BUFFER_SIZE', '1')),
+        max_age_seconds=float(os.environ.get('CLICK_BUFFER_MAX_AGE', '0')),
+    )
@@ -0,0 +1,278 @@
+# lambda/common/python/metrics.py
+"""
+호출 단위 지표 (CloudWatch Embedded Metric Format)
+- handler 1회 호출마다 EMF JSON 한 줄을 stdout에 출력 → CloudWatch Logs가 지표로 추출 (PutMetricData 호출 없음)
+- 기록 항목
+  - 단계별 지연(ms): timer("stage") / @timed("stage")
+  - DynamoDB: boto3 기본 세션 이벤트 훅으로 모든 호출의 operation별 지연, 호출 수, 소비 용량(RCU/WCU), throttling
+    (handler 코드 수정 없이 수집, ReturnConsumedCapacity=TOTAL 자동 추가)
+  - 개수: put("events", n)
+  - 캐시 적중률: cache_lookup("url_cache", hit)
+  - ColdStart / InitDuration(ms): 컨테이너 첫 호출에만
+- METRICS_ENABLED != "true" 이면 모든 함수가 import 시점에 no-op으로 바인딩됨
+  (handler/timed 데코레이터는 원래 함수를 그대로 반환, 훅 미설치 → 할당/IO 없음)
+
+사용:
+    import metrics
+
+    @metrics.handler("redirect")
+    def lambda_handler(event, context): ...
+
+    with metrics.timer("write_clicks"):
+        ...
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() == "true"
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "ShortUrl")
+
+# EMF 제한: directive 1개당 지표 100개, 지표 1개당 값 100개
+MAX_METRICS = 100
+MAX_VALUES = 100
+
+_IMPORTED_AT = time.monotonic()
+
+_CAPACITY_OPS = {
+    "GetItem", "PutItem", "UpdateItem", "DeleteItem", "Query", "Scan",
+    "BatchGetItem", "BatchWriteItem", "TransactGetItems", "TransactWriteItems",
+}
+_READ_OPS = {"GetItem", "Query", "Scan", "BatchGetItem", "TransactGetItems"}
+_THROTTLE_CODES = ("ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded")
+
+
+# -------------------------
+# 호출 단위 기록
+# -------------------------
+class _Invocation:
+    """한 번의 handler 호출 동안 쌓이는 값 (analyze/categorize는 스레드에서 기록하므로 lock 사용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}   # name -> (unit, [values])
+        self.totals = {}    # name -> (unit, sum)
+        self.caches = {}    # name -> [hits, lookups]
+
+    def sample(self, name, value, unit):
+        with self._lock:
+            values = self.samples.setdefault(name, (unit, []))[1]
+            if len(values) < MAX_VALUES:
+                values.append(round(value, 3))
+
+    def add(self, name, value, unit):
+        with self._lock:
+            _, total = self.totals.get(name, (unit, 0))
+            self.totals[name] = (unit, total + value)
+
+    def cache(self, name, hit):
+        with self._lock:
+            entry = self.caches.setdefault(name, [0, 0])
+            entry[0] += 1 if hit else 0
+            entry[1] += 1
+
+    def metrics(self):
+        """name -> (unit, value 또는 [values])"""
+        with self._lock:
+            out = {name: (unit, values) for name, (unit, values) in self.samples.items()}
+            out.update(self.totals)
+            for name, (hits, lookups) in self.caches.items():
+                out[f"{name}.lookups"] = ("Count", lookups)
+                out[f"{name}.hitRatio"] = ("Percent", round(100.0 * hits / lookups, 2))
+        return out
+
+
+# 모듈 import ~ 첫 호출 사이(init 단계)에 기록된 값은 첫 호출에 포함
+_current = _Invocation()
+_cold = True
+
+
+def _process_age_ms():
+    """프로세스 시작 후 경과 시간 (Lambda init 단계 전체), /proc 이 없으면 이 모듈 import 이후 시간"""
+    try:
+        with open("/proc/self/stat") as f:
+            # comm 필드에 공백이 있을 수 있으므로 마지막 ')' 이후부터 (starttime = 22번째 필드)
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, (uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000)
+    except Exception:
+        return (time.monotonic() - _IMPORTED_AT) * 1000
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _current.sample(self.name, (time.perf_counter() - self.start) * 1000, "Milliseconds")
+        return False
+
+
+def _timer(name):
+    return _Timer(name)
+
+
+def _timed(name):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with _Timer(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def _put(name, value=1, unit="Count"):
+    _current.add(name, value, unit)
+
+
+def _cache_lookup(name, hit):
+    _current.cache(name, hit)
+
+
+def _emf_line(function_name, invocation, props):
+    metrics = list(invocation.metrics().items())[:MAX_METRICS]
+    doc = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [["Function"]],
+                "Metrics": [{"Name": name, "Unit": unit} for name, (unit, _) in metrics],
+            }],
+        },
+        "Function": function_name,
+        **props,
+    }
+    for name, (_, value) in metrics:
+        doc[name] = value
+    return json.dumps(doc, separators=(",", ":"), default=str)
+
+
+def _handler(function_name):
+    """Lambda handler 데코레이터: 전체 지연 / 오류 / cold start 기록 후 EMF 한 줄 출력"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(event, context=None):
+            global _current, _cold
+            props = {"requestId": getattr(context, "aws_request_id", None)}
+            if _cold:
+                _cold = False
+                props["coldStart"] = True
+                _current.add("ColdStart", 1, "Count")
+                _current.add("InitDuration", round(_process_age_ms(), 3), "Milliseconds")
+
+            start = time.perf_counter()
+            status = None
+            try:
+                result = fn(event, context)
+                if isinstance(result, dict):
+                    status = result.get("statusCode")
+                return result
+            except Exception:
+                status = "exception"
+                raise
+            finally:
+                invocation, _current = _current, _Invocation()
+                invocation.add("Duration", round((time.perf_counter() - start) * 1000, 3), "Milliseconds")
+                failed = status == "exception" or (isinstance(status, int) and status >= 500)
+                invocation.add("Errors", 1 if failed else 0, "Count")
+                if status is not None:
+                    props["status"] = status
+                try:
+                    print(_emf_line(function_name, invocation, props))
+                except Exception as e:
+                    print(f"Failed to emit metrics: {str(e)}")
+        return inner
+    return wrap
+
+
+# -------------------------
+# DynamoDB 호출 훅 (boto3 기본 세션)
+# -------------------------
+def _add_capacity_param(params, model, **kwargs):
+    if model.name in _CAPACITY_OPS:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _before_call(model, context, **kwargs):
+    context["metrics_start"] = time.perf_counter()
+
+
+def _after_call(parsed, model, context, **kwargs):
+    start = context.get("metrics_start")
+    if start is not None:
+        _current.sample(f"ddb.{model.name}", (time.perf_counter() - start) * 1000, "Milliseconds")
+    _current.add("ddb.calls", 1, "Count")
+
+    if not isinstance(parsed, dict):
+        return
+    if parsed.get("Error", {}).get("Code") in _THROTTLE_CODES:
+        _current.add("ddb.throttles", 1, "Count")
+
+    consumed = parsed.get("ConsumedCapacity")
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    units = sum(float(c.get("CapacityUnits", 0) or 0) for c in consumed or [])
+    if units:
+        _current.add("ddb.RCU" if model.name in _READ_OPS else "ddb.WCU", units, "Count")
+
+
+def install_botocore_hooks(session=None):
+    """
+    session(boto3.Session, 기본: boto3 기본 세션) 이후 만든 client/resource의 DynamoDB 호출을 기록
+    설치 이전에 만든 client에는 적용되지 않음 (runtime client는 첫 사용 때 생성되므로 import 순서와 무관)
+    """
+    if session is None:
+        import boto3
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        session = boto3.DEFAULT_SESSION
+    session.events.register("provide-client-params.dynamodb.*", _add_capacity_param)
+    session.events.register("before-call.dynamodb.*", _before_call)
+    session.events.register("after-call.dynamodb.*", _after_call)
+
+
+# -------------------------
+# 비활성 (no-op)
+# -------------------------
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def _noop_timer(name):
+    return _NOOP_TIMER
+
+
+def _noop_decorator(name):
+    return lambda fn: fn
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+if ENABLED:
+    timer, timed, handler, put, cache_lookup = _timer, _timed, _handler, _put, _cache_lookup
+    install_botocore_hooks()
+else:
+    timer, timed, handler = _noop_timer, _noop_decorator, _noop_decorator
+    put = cache_lookup = _noop
@@ -0,0 +1,87 @@
+# lambda/common/python/redirect_policy.py
+"""
+링크별 리다이렉트 정책 (Lambda layer: shorten / redirect / hotlinks 공용)
+
+urls 항목의 redirectPolicy 속성 (없으면 기본 정책 = 301 + 캐시 금지)
+    {"status": 301 | 302 | 307 | 308, "maxAge": 초, "preciseClicks": true | false}
+
+- preciseClicks=true : 모든 클릭을 redirect Lambda가 기록 → 항상 캐시 금지, edge 맵(hotlinks)에도 넣지 않음
+- preciseClicks=false: maxAge > 0 이면 브라우저 / CDN이 maxAge 동안 리다이렉트를 캐시
+                       (캐시된 동안의 재방문은 집계되지 않음 → 근사 집계), edge 맵 대상
+- 기본 정책과 같으면 속성을 저장하지 않음 → 기존 항목과 같은 취급
+"""
+STATUSES = (301, 302, 307, 308)
+MAX_AGE_LIMIT = 86400
+
+DEFAULT_POLICY = {"status": 301, "maxAge": 0, "preciseClicks": False}
+NO_STORE = "no-cache, no-store, must-revalidate"
+
+_FIELDS = ("status", "maxAge", "preciseClicks")
+
+
+def parse_policy(raw):
+    """
+    shorten 요청의 redirect 값 → (저장할 정책 dict 또는 None(기본 정책), 오류 메시지 또는 None)
+    """
+    if raw is None:
+        return None, None
+    if not isinstance(raw, dict):
+        return None, "redirect must be an object"
+
+    unknown = sorted(set(raw) - set(_FIELDS))
+    if unknown:
+        return None, f"Unknown redirect option: {', '.join(unknown)}"
+
+    status = raw.get("status", DEFAULT_POLICY["status"])
+    max_age = raw.get("maxAge", DEFAULT_POLICY["maxAge"])
+    precise = raw.get("preciseClicks", DEFAULT_POLICY["preciseClicks"])
+
+    # bool은 int의 하위 타입이라 따로 제외
+    if isinstance(status, bool) or status not in STATUSES:
+        return None, f"redirect.status must be one of {', '.join(str(s) for s in STATUSES)}"
+    if isinstance(max_age, bool) or not isinstance(max_age, int) or not 0 <= max_age <= MAX_AGE_LIMIT:
+        return None, f"redirect.maxAge must be an integer between 0 and {MAX_AGE_LIMIT}"
+    if not isinstance(precise, bool):
+        return None, "redirect.preciseClicks must be a boolean"
+    if precise and max_age:
+        return None, "redirect.maxAge requires preciseClicks=false (cached redirects are not counted)"
+
+    policy = {"status": status, "maxAge": max_age, "preciseClicks": precise}
+    return (None if policy == DEFAULT_POLICY else policy), None
+
+
+def policy_key(policy):
+    """dedup 해시에 붙일 문자열 (기본 정책이면 빈 문자열 → 기존 urlHash와 같음)"""
+    if not policy:
+        return ""
+    return f"{policy['status']}:{policy['maxAge']}:{int(policy['preciseClicks'])}"
+
+
+def normalize(stored):
+    """저장된 값(resource: Decimal, 저수준 client: 문자열 / bool) → 기본값이 채워진 정책"""
+    policy = dict(DEFAULT_POLICY)
+    if not isinstance(stored, dict):
+        return policy
+
+    try:
+        status = int(stored.get("status", policy["status"]))
+        if status in STATUSES:
+            policy["status"] = status
+        policy["maxAge"] = min(MAX_AGE_LIMIT, max(0, int(stored.get("maxAge", 0))))
+    except (TypeError, ValueError):
+        pass
+    precise = stored.get("preciseClicks", False)
+    policy["preciseClicks"] = precise is True or str(precise).lower() == "true"
+    return policy
+
+
+def from_attribute_value(av):
+    """저수준 client 응답 값 ({"M": {"status": {"N": "302"}, ...}}) → 정책"""
+    fields = (av or {}).get("M") or {}
+    return normalize({name: v.get("N", v.get("BOOL")) for name, v in fields.items()})
+
+
+def cache_control(policy):
+    if policy["preciseClicks"] or policy["maxAge"] <= 0:
+        return NO_STORE
+    return f"public, max-age={policy['maxAge']}"
@@ -0,0 +1,102 @@
+# lambda/common/python/runtime.py
+"""
+공용 AWS / OpenAI client (처음 사용할 때 생성, 컨테이너 재사용 동안 공유)
+- handler import(= Lambda init 단계)에서는 client/resource를 만들지 않음
+  → 해당 호출 경로에서 쓰지 않는 client는 비용 없음 (예: redirect sqs 백엔드는 DynamoDB resource 불필요)
+- boto3 기본 세션을 사용하므로 metrics / 벤치마크 meter의 이벤트 훅이 그대로 적용됨
+- DynamoDB 등 AWS client: TCP keep-alive + 연결 풀 크기(AWS_MAX_POOL_CONNECTIONS) 조정
+  (analyze 병렬 scan, shorten / categorize 쓰기 스레드가 기본 풀 10개를 넘지 않도록)
+- openai 패키지는 첫 LLM 호출 때 import (import + client 생성이 boto3보다 무거움)
+
+사용:
+    urls_table = runtime.table(os.environ.get("URLS_TABLE", "urls"))   # .name 은 바로 사용 가능
+    dynamodb = runtime.lazy_resource("dynamodb")                        # dynamodb.batch_get_item(...)
+    ddb = runtime.lazy_client("dynamodb")                               # 저수준 client
+    client = runtime.lazy_openai(api_key=...)                           # client.chat.completions.create(...)
+"""
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "32"))
+
+_lock = threading.RLock()
+_clients = {}
+_resources = {}
+
+
+def _config():
+    return Config(max_pool_connections=MAX_POOL_CONNECTIONS, tcp_keepalive=True)
+
+
+def client(service):
+    """서비스별 client 1개 (스레드 간 공유 가능)"""
+    found = _clients.get(service)
+    if found is None:
+        with _lock:
+            found = _clients.get(service)
+            if found is None:
+                found = _clients[service] = boto3.client(service, config=_config())
+    return found
+
+
+def resource(service="dynamodb"):
+    """서비스별 resource 1개 (resource 모델 로딩 비용이 있어 저수준 client로 충분하면 client 사용)"""
+    found = _resources.get(service)
+    if found is None:
+        with _lock:
+            found = _resources.get(service)
+            if found is None:
+                found = _resources[service] = boto3.resource(service, config=_config())
+    return found
+
+
+class Lazy:
+    """첫 속성 접근 때 factory()로 실제 객체를 만들고 이후 그대로 위임"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._obj = None
+
+    def resolve(self):
+        obj = self._obj
+        if obj is None:
+            with _lock:
+                obj = self._obj
+                if obj is None:
+                    obj = self._obj = self._factory()
+        return obj
+
+    def __getattr__(self, name):
+        # _factory / _obj 는 인스턴스 속성이라 여기로 오지 않음
+        return getattr(self.resolve(), name)
+
+
+class LazyTable(Lazy):
+    """DynamoDB Table (name은 resource 생성 없이 사용 가능)"""
+
+    def __init__(self, name):
+        super().__init__(lambda: resource("dynamodb").Table(name))
+        self.name = name
+
+
+def table(name):
+    return LazyTable(name)
+
+
+def lazy_client(service):
+    return Lazy(lambda: client(service))
+
+
+def lazy_resource(service="dynamodb"):
+    return Lazy(lambda: resource(service))
+
+
+def lazy_openai(**kwargs):
+    """openai.OpenAI(**kwargs), openai import는 첫 사용 때"""
+    def factory():
+        from openai import OpenAI
+        return OpenAI(**kwargs)
+    return Lazy(factory)
@@ -0,0 +1,153 @@
+# lambda/common/python/topk.py
+"""
+Top-K (heavy hitters) 집계
+- exact_top_k  : {key: count} → heap으로 상위 k개 (전체 정렬 없이 O(n log k))
+- SpaceSaving  : 최대 capacity개 키만 유지하는 근사 카운터
+                 count는 실제 값 이상(과대추정), count - error 는 실제 값 이하
+                 실제 빈도가 전체/capacity 보다 큰 키는 반드시 남음
+                 요약끼리 merge 가능 → 일 단위 요약을 여러 개 합쳐서 7일 top-K
+- summary_buckets / merge_summaries : 일별 요약을 샤드 item 여러 개로 나눠 저장 / 읽을 때 합침
+- CountMinTopK : Count-Min sketch(고정 크기 배열) + 후보 k개 heap (벤치마크 비교용)
+"""
+import hashlib
+import heapq
+import json
+
+
+def exact_top_k(counts, k):
+    """counts: {key: count} 또는 (key, count) iterable → [(key, count)] 내림차순"""
+    items = counts.items() if hasattr(counts, "items") else counts
+    return heapq.nlargest(k, items, key=lambda kv: kv[1])
+
+
+class SpaceSaving:
+    def __init__(self, capacity=200):
+        self.capacity = max(1, int(capacity))
+        # key -> [count, error]
+        self.entries = {}
+
+    def offer(self, key, n=1):
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry[0] += n
+            return
+
+        if len(self.entries) < self.capacity:
+            self.entries[key] = [n, 0]
+            return
+
+        # 가장 작은 카운터를 새 키로 교체 (기존 count를 오차로 물려받음)
+        min_key = min(self.entries, key=lambda k: self.entries[k][0])
+        min_count = self.entries.pop(min_key)[0]
+        self.entries[key] = [min_count + n, min_count]
+
+    def min_count(self):
+        """요약에 없는 키의 count 상한 (꽉 차 있으면 가장 작은 count, 아니면 0)"""
+        if len(self.entries) < self.capacity:
+            return 0
+        return min(count for count, _ in self.entries.values())
+
+    def merge(self, other):
+        """
+        다른 요약을 더함 (mergeable summary 규칙)
+        - 한쪽에만 있는 키는 다른 쪽 min_count를 count와 error에 더함
+          (그쪽에서 밀려난 키일 수 있으므로 → count ≥ 실제 값 유지)
+        - 합친 뒤 상위 capacity개만 유지
+        """
+        self_min = self.min_count()
+        other_min = other.min_count()
+
+        for key, entry in self.entries.items():
+            if key not in other.entries:
+                entry[0] += other_min
+                entry[1] += other_min
+
+        for key, (count, error) in other.entries.items():
+            entry = self.entries.get(key)
+            if entry is None:
+                self.entries[key] = [count + self_min, error + self_min]
+            else:
+                entry[0] += count
+                entry[1] += error
+
+        if len(self.entries) > self.capacity:
+            keep = heapq.nlargest(self.capacity, self.entries.items(), key=lambda kv: kv[1][0])
+            self.entries = {k: v for k, v in keep}
+        return self
+
+    def top(self, k):
+        """[(key, count, error)] count 내림차순"""
+        best = heapq.nlargest(k, self.entries.items(), key=lambda kv: kv[1][0])
+        return [(key, count, error) for key, (count, error) in best]
+
+    def to_json(self):
+        return json.dumps(
+            {"c": self.capacity, "e": self.entries}, ensure_ascii=False, separators=(",", ":")
+        )
+
+    @classmethod
+    def from_json(cls, raw, capacity=None):
+        try:
+            data = json.loads(raw or "{}")
+        except Exception:
+            data = {}
+        summary = cls(capacity or data.get("c") or 200)
+        summary.entries = {k: [int(v[0]), int(v[1])] for k, v in (data.get("e") or {}).items()}
+        return summary
+
+
+def summary_buckets(day, shards=1):
+    """
+    일별 요약 item 키 (click_rollups)
+    샤드 0은 기존 키 TOPK#날짜, 나머지는 TOPK#날짜#n → 샤드 수를 늘려도 기존 요약을 그대로 읽음
+    """
+    return [f"TOPK#{day}"] + [f"TOPK#{day}#{n}" for n in range(1, max(1, int(shards)))]
+
+
+def merge_summaries(raws):
+    """직렬화된 요약 여러 개 → 합친 SpaceSaving (하나도 없으면 None)"""
+    merged = None
+    for raw in raws:
+        if not raw:
+            continue
+        summary = SpaceSaving.from_json(raw)
+        merged = summary if merged is None else merged.merge(summary)
+    return merged
+
+
+class CountMinTopK:
+    """Count-Min sketch로 빈도를 추정하고, 추정치 상위 k개 후보만 따로 유지"""
+
+    def __init__(self, k=10, width=2048, depth=4):
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.table = [[0] * width for _ in range(depth)]
+        self.candidates = {}
+
+    def _indexes(self, key):
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=8 * self.depth).digest()
+        for row in range(self.depth):
+            yield row, int.from_bytes(digest[row * 8:(row + 1) * 8], "little") % self.width
+
+    def add(self, key, n=1):
+        estimate = None
+        for row, col in self._indexes(key):
+            self.table[row][col] += n
+            value = self.table[row][col]
+            estimate = value if estimate is None else min(estimate, value)
+
+        if key in self.candidates or len(self.candidates) < self.k:
+            self.candidates[key] = estimate
+            return
+
+        min_key = min(self.candidates, key=self.candidates.get)
+        if estimate > self.candidates[min_key]:
+            del self.candidates[min_key]
+            self.candidates[key] = estimate
+
+    def estimate(self, key):
+        return min(self.table[row][col] for row, col in self._indexes(key))
+
+    def top(self, k=None):
+        return exact_top_k(self.candidates, k or self.k)
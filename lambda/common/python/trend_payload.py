@@ -0,0 +1,78 @@
+# lambda/common/python/trend_payload.py
+"""
+trends_latest 응답 payload (analyze가 쓰기 시점에 view별로 미리 직렬화)
+- trends 테이블 item: period = "<PERIOD>#payload", generatedAt = view (user / admin)
+  → trends_latest는 GetItem 1회로 응답 body를 그대로 사용
+- body는 JSON 문자열(또는 gzip bytes)이라 DynamoDB Number → Decimal 변환이 없음
+- etag는 압축 전 JSON 기준 (압축 여부와 관계없이 같은 값)
+"""
+import gzip
+import hashlib
+import json
+
+VIEWS = ("admin", "user")
+
+
+def payload_key(period, view):
+    return {"period": f"{period}#payload", "generatedAt": view}
+
+
+def filter_for_view(trend, view):
+    """
+    view=user: 사용자용 정보만 반환 (admin 인사이트 제거)
+    view=admin: 전체 반환
+    """
+    if view != "user":
+        return trend
+
+    filtered = dict(trend)  # shallow copy
+
+    # 최신 구조: insights가 {"admin":[...], "user":[...]} 형태
+    # 과거 데이터(문자열 insights)는 그대로 전달
+    insights = filtered.get("insights")
+    if isinstance(insights, dict):
+        filtered["insights"] = {"user": insights.get("user", [])}
+
+    return filtered
+
+
+def encode_body(trend, period, view):
+    """trends_latest 200 응답 body (JSON 문자열)"""
+    return json.dumps(
+        {"period": period, "view": view, "trend": filter_for_view(trend, view)},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def body_etag(body):
+    return '"' + hashlib.blake2b(body.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def build_payload_items(trend, period, compress=False):
+    """trend item → view별 payload item 리스트 (trends 테이블에 put)"""
+    items = []
+    for view in VIEWS:
+        body = encode_body(trend, period, view)
+        item = {
+            **payload_key(period, view),
+            "trendGeneratedAt": trend.get("generatedAt"),
+            "etag": body_etag(body),
+        }
+        if compress:
+            item["encoding"] = "gzip"
+            item["body"] = gzip.compress(body.encode("utf-8"), mtime=0)
+        else:
+            item["encoding"] = "identity"
+            item["body"] = body
+        items.append(item)
+    return items
+
+
+def decode_body(item):
+    """payload item → JSON 문자열"""
+    body = item.get("body")
+    body = getattr(body, "value", body)
+    if item.get("encoding") == "gzip":
+        return gzip.decompress(bytes(body)).decode("utf-8")
+    return body
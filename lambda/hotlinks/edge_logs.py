@@ -0,0 +1,89 @@
+# lambda/hotlinks/edge_logs.py
+"""
+CloudFront 표준 로그(access log) → 클릭 이벤트
+- edge function이 바로 응답한 리다이렉트는 redirect Lambda를 거치지 않으므로 로그에서 클릭을 복원
+- 이벤트 형식은 redirect가 click_sink로 보내는 것과 같음 → click_consumer가 그대로 처리
+- 로그 파일: gzip TSV, "#Fields:" 헤더의 필드 순서를 따름 (필드 추가/순서 변경에 영향 없음)
+
+대상 요청: GET + 결과 유형 FunctionGeneratedResponse + 30x
+(edge에서 못 찾아 origin(API Gateway → redirect)으로 간 요청은 redirect가 이미 기록)
+"""
+import gzip
+import hashlib
+from urllib.parse import unquote
+
+# 공통 layer (lambda/common/python)
+from click_agg import hash_ip
+
+FUNCTION_RESULT = "FunctionGeneratedResponse"
+REDIRECT_STATUSES = {"301", "302", "303", "307", "308"}
+
+
+def read_log_lines(raw):
+    """S3 object body(bytes) → 줄 iterator (gzip이면 해제)"""
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    return raw.decode("utf-8", errors="replace").splitlines()
+
+
+def _field(row, fields, name):
+    i = fields.get(name)
+    if i is None or i >= len(row):
+        return ""
+    return row[i]
+
+
+def _timestamp(date, time_, request_id, short_id, used):
+    """
+    로그 시각은 초 단위 → 같은 초의 같은 shortId 클릭이 clicks(shortId, timestamp) 키에서 겹치지 않도록
+    x-edge-request-id 해시로 마이크로초를 채우고, 파일 안에서 겹치면 다음 값 사용
+    (같은 로그를 다시 처리해도 같은 키)
+    """
+    micros = int(hashlib.sha256(request_id.encode()).hexdigest()[:8], 16) % 1000000
+    ts = f"{date}T{time_}.{micros:06d}"
+    while (short_id, ts) in used:
+        micros = (micros + 1) % 1000000
+        ts = f"{date}T{time_}.{micros:06d}"
+    used.add((short_id, ts))
+    return ts
+
+
+def click_events(lines, short_id_re):
+    """로그 줄 → 클릭 이벤트 리스트 (short_id_re: edge function과 같은 shortId 규칙)"""
+    fields = {}
+    events = []
+    used = set()
+
+    for line in lines:
+        if line.startswith("#Fields:"):
+            fields = {name: i for i, name in enumerate(line[len("#Fields:"):].split())}
+            continue
+        if not line or line.startswith("#") or not fields:
+            continue
+
+        row = line.split("\t")
+        results = (_field(row, fields, "x-edge-result-type"), _field(row, fields, "x-edge-detailed-result-type"))
+        if FUNCTION_RESULT not in results:
+            continue
+        if _field(row, fields, "cs-method") != "GET" or _field(row, fields, "sc-status") not in REDIRECT_STATUSES:
+            continue
+
+        short_id = _field(row, fields, "cs-uri-stem").lstrip("/")
+        if not short_id_re.match(short_id):
+            continue
+
+        ip = _field(row, fields, "c-ip")
+        referer = unquote(_field(row, fields, "cs(Referer)"))
+        events.append({
+            "shortId": short_id,
+            "timestamp": _timestamp(
+                _field(row, fields, "date"), _field(row, fields, "time"), _field(row, fields, "x-edge-request-id"),
+                short_id, used,
+            ),
+            "ip": hash_ip(ip if ip != "-" else ""),
+            # User-Agent는 로그에서 두 번 인코딩될 수 있음
+            "userAgent": unquote(unquote(_field(row, fields, "cs(User-Agent)"))),
+            "referer": referer if referer and referer != "-" else "direct",
+        })
+
+    return events
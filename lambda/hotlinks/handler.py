@@ -0,0 +1,152 @@
+# lambda/hotlinks/handler.py
+import json
+import os
+from datetime import datetime, timedelta
+from urllib.parse import unquote_plus
+
+# 공통 layer (lambda/common/python)
+import metrics
+import runtime
+from click_sink import create_backend_from_env
+from redirect_policy import normalize
+from topk import merge_summaries, summary_buckets
+
+from edge_logs import click_events, read_log_lines
+from redirect_map import SHORT_ID_RE, MAX_TOTAL_BYTES, diff_map, entry_bytes, map_entry, store_from_env
+
+# resource / client는 첫 호출 때 생성
+dynamodb = runtime.lazy_resource('dynamodb')
+urls_table = runtime.table(os.environ.get('URLS_TABLE', 'urls'))
+rollups_table = runtime.table(os.environ.get('ROLLUPS_TABLE', 'click_rollups'))
+s3 = runtime.lazy_client('s3')
+
+# 최근 N일(오늘 포함) 일별 top-k 요약(click_consumer TOPK#날짜[#샤드])을 합쳐서 상위 링크 선정
+WINDOW_DAYS = int(os.environ.get('HOTLINKS_WINDOW_DAYS', '2'))
+TOPK_SHARDS = int(os.environ.get('TOPK_SHARDS', '8'))
+TOP_N = int(os.environ.get('HOTLINKS_TOP_N', '500'))
+# 요약의 하한값(count - error) 기준 최소 클릭 수 → 근사 오차로 들어온 링크 제외
+MIN_CLICKS = int(os.environ.get('HOTLINKS_MIN_CLICKS', '20'))
+
+
+@metrics.handler('hotlinks')
+def lambda_handler(event, context):
+    """
+    - 스케줄(EventBridge): 인기 링크 맵 갱신 (publish)
+    - S3 이벤트(CloudFront 로그 적재): edge가 응답한 리다이렉트를 클릭 이벤트로 변환해서 클릭 큐로 전송 (ingest)
+    """
+    try:
+        if event.get('Records'):
+            result = ingest_logs(event['Records'])
+        else:
+            result = publish()
+        print("hotlinks result:", json.dumps(result))
+        return result
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+
+# -------------------------
+# Publish (top-N → redirect map)
+# -------------------------
+def publish(now=None):
+    now = now or datetime.utcnow()
+    candidates = hot_short_ids(now)
+    urls = fetch_urls([short_id for short_id, _ in candidates])
+
+    desired = {}
+    size = 0
+    for short_id, _ in candidates:
+        found = urls.get(short_id)
+        if found is None:
+            continue
+        entry = map_entry(short_id, found.get('originalUrl'), normalize(found.get('redirectPolicy')))
+        if entry is None:
+            continue
+        size += entry_bytes(*entry)
+        if size > MAX_TOTAL_BYTES:
+            break
+        desired[entry[0]] = entry[1]
+
+    store = store_from_env()
+    with metrics.timer('map_load'):
+        current = store.load()
+    puts, deletes = diff_map(current, desired)
+    with metrics.timer('map_apply'):
+        store.apply(puts, deletes)
+
+    metrics.put('hotlinks.published', len(desired))
+    metrics.put('hotlinks.puts', len(puts))
+    metrics.put('hotlinks.deletes', len(deletes))
+    return {
+        'candidates': len(candidates),
+        'published': len(desired),
+        'puts': len(puts),
+        'deletes': len(deletes),
+    }
+
+
+@metrics.timed('hot_short_ids')
+def hot_short_ids(now):
+    """[(shortId, 최소 클릭 수)] 내림차순"""
+    days = [(now - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(max(1, WINDOW_DAYS))]
+    keys = [{'bucket': b} for d in days for b in summary_buckets(d, TOPK_SHARDS)]
+    rows = batch_get(rollups_table, keys, ['summary'])
+
+    merged = merge_summaries(row.get('summary') for row in rows)
+    if merged is None:
+        return []
+
+    hot = [(short_id, count - error) for short_id, count, error in merged.top(len(merged.entries))
+           if count - error >= MIN_CLICKS]
+    hot.sort(key=lambda kv: kv[1], reverse=True)
+    return hot[:TOP_N]
+
+
+def fetch_urls(short_ids):
+    """shortId → urls 항목"""
+    attrs = ['shortId', 'originalUrl', 'redirectPolicy']
+    return {row['shortId']: row for row in batch_get(urls_table, [{'shortId': s} for s in short_ids], attrs)}
+
+
+def batch_get(table, keys, attrs):
+    """BatchGetItem (100개 단위 + UnprocessedKeys 재시도)"""
+    names = {f"#a{i}": a for i, a in enumerate(attrs)}
+    projection = {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+    items = []
+    for i in range(0, len(keys), 100):
+        request = {table.name: {'Keys': keys[i:i + 100], **projection}}
+        while request:
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(resp.get('Responses', {}).get(table.name, []))
+            request = resp.get('UnprocessedKeys') or None
+    return items
+
+
+# -------------------------
+# Ingest (CloudFront 로그 → 클릭 큐)
+# -------------------------
+def ingest_logs(records):
+    backend = create_backend_from_env()
+    files = 0
+    sent = 0
+
+    for record in records:
+        s3_info = record.get('s3') or {}
+        bucket = s3_info.get('bucket', {}).get('name')
+        key = unquote_plus(s3_info.get('object', {}).get('key', ''))
+        if not bucket or not key:
+            continue
+
+        with metrics.timer('log_read'):
+            raw = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        events = click_events(read_log_lines(raw), SHORT_ID_RE)
+        if events:
+            # 실패하면 예외 → S3 비동기 호출 재시도 (이미 보낸 파일/청크도 다시 전송됨)
+            # 같은 로그는 같은 이벤트 순서 → 같은 batchId라 click_consumer가 다시 보낸 메시지를 건너뜀
+            backend.send(events, batch_id=f"edge:{bucket}/{key}")
+        files += 1
+        sent += len(events)
+
+    metrics.put('edge.clicks', sent)
+    return {'files': files, 'clicks': sent}
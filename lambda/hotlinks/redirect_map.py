@@ -0,0 +1,139 @@
+# lambda/hotlinks/redirect_map.py
+"""
+edge 리다이렉트 맵 (shortId → "<status> <maxAge> <originalUrl>")
+- hotlinks publisher가 인기 링크만 골라 만든 맵을 저장소에 반영, CloudFront Function이 조회
+- 값에 링크별 리다이렉트 정책(상태 코드 / 캐시 max-age)을 함께 넣어 edge 응답도 redirect Lambda와 같게
+- 저장소 반영은 현재 내용과의 차이(put / delete)만 보냄 → 인기 링크가 거의 그대로면 호출 0회
+
+HOTLINKS_STORE
+- kvs  : CloudFront KeyValueStore (HOTLINKS_KVS_ARN, 운영)
+         cloudfront-keyvaluestore API는 SigV4A 서명 → Lambda zip에 awscrt 포함 필요
+- file : HOTLINKS_FILE 에 JSON 객체로 저장 (로컬 테스트 / bench/edge_harness.py)
+"""
+import json
+import os
+import re
+
+# 공통 layer (lambda/common/python)
+import runtime
+
+# CloudFront KeyValueStore 제한: key 512B, value 1KB, 전체 5MB
+MAX_KEY_BYTES = 512
+MAX_VALUE_BYTES = 1024
+MAX_TOTAL_BYTES = 5 * 1024 * 1024
+
+# UpdateKeys 1회에 넣을 put + delete 수 / ListKeys 페이지 크기
+UPDATE_BATCH = 50
+LIST_PAGE = 50
+
+# edge function(redirect.js)과 같은 shortId 규칙 (base62 4~16자리)
+SHORT_ID_RE = re.compile(r"^[0-9A-Za-z]{4,16}$")
+
+
+def edge_value(original_url, policy):
+    """redirect.js 가 나눠 읽는 형식 (redirect_policy.cache_control 과 같게 max-age 0 = 캐시 금지)"""
+    return f"{policy['status']} {policy['maxAge']} {original_url}"
+
+
+def map_entry(short_id, original_url, policy):
+    """맵에 넣을 수 있으면 (key, value), 아니면 None (policy: redirect_policy.normalize 결과)"""
+    if policy["preciseClicks"]:
+        # 정확한 집계가 필요한 링크는 항상 redirect Lambda에서 기록
+        return None
+    if not short_id or not SHORT_ID_RE.match(short_id):
+        return None
+    if not isinstance(original_url, str) or not original_url.startswith(("http://", "https://")):
+        return None
+    # Location 헤더에 그대로 쓰이므로 개행 등 제어 문자는 제외
+    if any(ord(ch) < 0x20 for ch in original_url):
+        return None
+    value = edge_value(original_url, policy)
+    if len(short_id.encode("utf-8")) > MAX_KEY_BYTES or len(value.encode("utf-8")) > MAX_VALUE_BYTES:
+        return None
+    return short_id, value
+
+
+def entry_bytes(key, value):
+    return len(key.encode("utf-8")) + len(value.encode("utf-8"))
+
+
+def diff_map(current, desired):
+    """current / desired: {key: value} → (puts {key: value}, deletes [key])"""
+    puts = {k: v for k, v in desired.items() if current.get(k) != v}
+    deletes = sorted(k for k in current if k not in desired)
+    return puts, deletes
+
+
+# -------------------------
+# Stores
+# -------------------------
+class FileMapStore:
+    """로컬 테스트용: JSON 파일 하나 (임시 파일에 쓴 뒤 교체 → 읽는 쪽이 반쯤 쓴 파일을 보지 않음)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def apply(self, puts, deletes):
+        data = self.load()
+        data.update(puts)
+        for key in deletes:
+            data.pop(key, None)
+
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+class KvsMapStore:
+    """CloudFront KeyValueStore (ETag 조건부 UpdateKeys, 다른 writer와 겹치면 ConflictException → 다음 주기에 다시 diff)"""
+
+    def __init__(self, kvs_arn, client=None):
+        self.kvs_arn = kvs_arn
+        self.client = client or runtime.lazy_client("cloudfront-keyvaluestore")
+
+    def load(self):
+        items = {}
+        kwargs = {"KvsARN": self.kvs_arn, "MaxResults": LIST_PAGE}
+        while True:
+            resp = self.client.list_keys(**kwargs)
+            for item in resp.get("Items", []):
+                items[item["Key"]] = item["Value"]
+            if not resp.get("NextToken"):
+                return items
+            kwargs["NextToken"] = resp["NextToken"]
+
+    def apply(self, puts, deletes):
+        # delete 먼저 → 전체 크기 제한(5MB) 근처에서도 put이 실패하지 않도록
+        ops = [("delete", k, None) for k in deletes] + [("put", k, v) for k, v in puts.items()]
+        if not ops:
+            return
+
+        etag = self.client.describe_key_value_store(KvsARN=self.kvs_arn)["ETag"]
+        for i in range(0, len(ops), UPDATE_BATCH):
+            chunk = ops[i:i + UPDATE_BATCH]
+            kwargs = {"KvsARN": self.kvs_arn, "IfMatch": etag}
+            chunk_puts = [{"Key": k, "Value": v} for op, k, v in chunk if op == "put"]
+            chunk_deletes = [{"Key": k} for op, k, _ in chunk if op == "delete"]
+            if chunk_puts:
+                kwargs["Puts"] = chunk_puts
+            if chunk_deletes:
+                kwargs["Deletes"] = chunk_deletes
+            etag = self.client.update_keys(**kwargs)["ETag"]
+
+
+def store_from_env():
+    backend = os.environ.get("HOTLINKS_STORE", "kvs")
+    if backend == "file":
+        return FileMapStore(os.environ.get("HOTLINKS_FILE", "/tmp/hotlinks.json"))
+    kvs_arn = os.environ.get("HOTLINKS_KVS_ARN", "")
+    if not kvs_arn:
+        raise ValueError("HOTLINKS_KVS_ARN is required for the kvs store")
+    return KvsMapStore(kvs_arn)
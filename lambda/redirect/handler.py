@@ -1,14 +1,34 @@
 # lambda/redirect/handler.py
 import json
-import boto3
 import os
 from datetime import datetime
-from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
-urls_table = dynamodb.Table(os.environ.get('URLS_TABLE', 'urls'))
-clicks_table = dynamodb.Table(os.environ.get('CLICKS_TABLE', 'clicks'))
+# 공통 layer (lambda/common/python)
+import metrics
+import runtime
+from click_agg import hash_ip
+from click_sink import create_sink_from_env
+from redirect_policy import cache_control, from_attribute_value
+from url_cache import UrlCache, is_missing
 
+# shortId 조회는 저수준 client (resource 모델 로딩 없음), Table은 dynamodb 싱크 백엔드(폴백)에서만 생성됨
+URLS_TABLE = os.environ.get('URLS_TABLE', 'urls')
+ddb = runtime.lazy_client('dynamodb')
+urls_table = runtime.table(URLS_TABLE)
+clicks_table = runtime.table(os.environ.get('CLICKS_TABLE', 'clicks'))
+
+# 컨테이너 재사용 시 버퍼 유지 (clicks 저장 / clickCount 증가는 click_consumer가 처리)
+click_sink = create_sink_from_env(clicks_table, urls_table)
+
+# shortId → URL 캐시 (인기 링크는 DynamoDB 조회 없이 응답)
+url_cache = UrlCache(
+    max_size=int(os.environ.get('URL_CACHE_SIZE', '1000')),
+    ttl_seconds=float(os.environ.get('URL_CACHE_TTL', '60')),
+    negative_ttl_seconds=float(os.environ.get('URL_CACHE_NEGATIVE_TTL', '30')),
+)
+CACHE_LOG_EVERY = int(os.environ.get('URL_CACHE_LOG_EVERY', '100'))
+
+@metrics.handler('redirect')
 def lambda_handler(event, context):
     try:
         # Path parameter에서 shortId 추출
@@ -17,31 +37,21 @@ def lambda_handler(event, context):
         if not short_id:
             return create_response(400, {'error': 'Short ID is required'})
         
-        # DynamoDB에서 URL 조회
-        response = urls_table.get_item(Key={'shortId': short_id})
-        item = response.get('Item')
+        # 캐시 → DynamoDB 순으로 URL 조회
+        item = get_url_item(short_id)
         
         if not item:
             return create_response(404, {'error': 'URL not found'})
         
-        original_url = item.get('originalUrl')
-        
-        # 클릭 로그 저장 (비동기로 처리하면 더 좋음)
+        # 클릭 이벤트는 싱크에 넘기고 바로 응답 (저장/카운트는 비동기)
         log_click(short_id, event)
         
-        # 클릭 카운트 증가
-        urls_table.update_item(
-            Key={'shortId': short_id},
-            UpdateExpression='SET clickCount = if_not_exists(clickCount, :zero) + :inc',
-            ExpressionAttributeValues={':zero': 0, ':inc': 1}
-        )
-        
-        # 301 리다이렉트
+        # 링크별 정책(redirectPolicy)의 상태 코드 / 캐시 헤더
         return {
-            'statusCode': 301,
+            'statusCode': item['status'],
             'headers': {
-                'Location': original_url,
-                'Cache-Control': 'no-cache, no-store, must-revalidate'
+                'Location': item['originalUrl'],
+                'Cache-Control': item['cacheControl']
             },
             'body': ''
         }
@@ -50,8 +60,36 @@ def lambda_handler(event, context):
         print(f"Error: {str(e)}")
         return create_response(500, {'error': 'Internal server error'})
 
+def get_url_item(short_id):
+    """캐시 우선 조회, 없으면 DynamoDB 조회 후 캐싱 (없는 shortId는 None으로 캐싱)"""
+    item = url_cache.get(short_id)
+    metrics.cache_lookup('url_cache', not is_missing(item))
+
+    if is_missing(item):
+        # 리다이렉트에 필요한 필드만 조회, 응답 헤더 값으로 바꿔서 보관
+        response = ddb.get_item(
+            TableName=URLS_TABLE,
+            Key={'shortId': {'S': short_id}},
+            ProjectionExpression='originalUrl, redirectPolicy',
+        )
+        found = response.get('Item')
+        item = None
+        if found is not None:
+            policy = from_attribute_value(found.get('redirectPolicy'))
+            item = {
+                'originalUrl': found.get('originalUrl', {}).get('S'),
+                'status': policy['status'],
+                'cacheControl': cache_control(policy),
+            }
+        url_cache.put(short_id, item)
+
+    if CACHE_LOG_EVERY > 0 and url_cache.lookups() % CACHE_LOG_EVERY == 0:
+        print("url_cache:", json.dumps(url_cache.stats()))
+
+    return item
+
 def log_click(short_id, event):
-    """클릭 이벤트 로깅"""
+    """클릭 이벤트를 싱크로 전달"""
     try:
         # 요청 정보 추출
         headers = event.get('headers', {})
@@ -65,17 +103,11 @@ def log_click(short_id, event):
             'referer': headers.get('Referer', headers.get('referer', 'direct'))
         }
         
-        clicks_table.put_item(Item=click_item)
+        with metrics.timer('click_sink'):
+            click_sink.emit(click_item)
     except Exception as e:
         print(f"Failed to log click: {str(e)}")
 
-def hash_ip(ip):
-    """IP 주소 해시 처리 (개인정보 보호)"""
-    import hashlib
-    if not ip:
-        return 'unknown'
-    return hashlib.sha256(ip.encode()).hexdigest()[:16]
-
 def create_response(status_code, body):
     return {
         'statusCode': status_code,
@@ -0,0 +1,81 @@
+# lambda/redirect/url_cache.py
+"""
+shortId → urls item 캐시 (컨테이너 재사용 동안 유지)
+- 크기 제한 LRU + TTL
+- 없는 shortId도 짧게 캐싱(negative caching)해서 스캐너가 DynamoDB를 두드리지 못하게 함
+"""
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class UrlCache:
+    def __init__(self, max_size=1000, ttl_seconds=60.0, negative_ttl_seconds=30.0):
+        self.max_size = max(0, int(max_size))
+        self.ttl_seconds = float(ttl_seconds)
+        self.negative_ttl_seconds = float(negative_ttl_seconds)
+        self._data = OrderedDict()  # shortId -> (expires_at, item or None)
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, short_id):
+        """
+        return: item(dict) / None(없는 shortId로 캐싱됨) / _MISSING(캐시에 없음 → 조회 필요)
+        """
+        entry = self._data.get(short_id)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+
+        expires_at, item = entry
+        if expires_at <= time.monotonic():
+            del self._data[short_id]
+            self.misses += 1
+            return _MISSING
+
+        self._data.move_to_end(short_id)
+        if item is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return item
+
+    def put(self, short_id, item):
+        if self.max_size == 0:
+            return
+
+        ttl = self.ttl_seconds if item is not None else self.negative_ttl_seconds
+        if ttl <= 0:
+            return
+
+        self._data[short_id] = (time.monotonic() + ttl, item)
+        self._data.move_to_end(short_id)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, short_id):
+        self._data.pop(short_id, None)
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'negativeHits': self.negative_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hitRatio': round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def lookups(self):
+        return self.hits + self.negative_hits + self.misses
+
+
+def is_missing(value):
+    return value is _MISSING
@@ -1,13 +1,41 @@
 # lambda/shorten/handler.py
+import base64
+import binascii
 import json
-import boto3
-import uuid
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import urlparse
+from botocore.exceptions import ClientError
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ.get('URLS_TABLE', 'urls'))
+# 공통 layer (lambda/common/python)
+import metrics
+import runtime
+from redirect_policy import parse_policy, policy_key
+from shortid import create_generator_from_env
+from url_dedup import url_hash
+
+# resource / client는 첫 DynamoDB 호출 때 생성
+dynamodb = runtime.lazy_resource('dynamodb')
+table = runtime.table(os.environ.get('URLS_TABLE', 'urls'))
+
+# 컨테이너 재사용 시 counter 전략의 임대 블록 유지
+id_generator = create_generator_from_env()
+MAX_ID_ATTEMPTS = int(os.environ.get('SHORT_ID_MAX_ATTEMPTS', '5'))
+
+# 일괄 생성 (POST /shorten/batch)
+MAX_BATCH_URLS = int(os.environ.get('MAX_BATCH_URLS', '5000'))
+BATCH_WRITE_WORKERS = int(os.environ.get('BATCH_WRITE_WORKERS', '8'))
+BATCH_WRITE_MAX_RETRIES = 5
+
+# 같은 URL 재사용 (urlHash → shortId). 테이블이 없으면 dedup 비활성
+URL_HASHES_TABLE = os.environ.get('URL_HASHES_TABLE', '')
+hashes_table = runtime.table(URL_HASHES_TABLE) if URL_HASHES_TABLE else None
+DEDUP_DEFAULT = os.environ.get('DEDUP_URLS', 'false').lower() == 'true'
+
+# categorize가 처리할 대기 표시 (sparse GSI byCategoryStatus, 분류 후 제거됨)
+CATEGORY_PENDING = 'pending'
 
 
 def is_valid_url(url: str) -> bool:
@@ -24,6 +52,9 @@ def is_valid_url(url: str) -> bool:
 
         host = parsed.hostname or ""
 
+        # 포트 형식 검사 (숫자가 아니거나 0~65535 밖이면 ValueError)
+        parsed.port
+
         # localhost 허용 여부 (원하면 False로 변경)
         if host == "localhost":
             return True
@@ -47,7 +78,11 @@ def is_valid_url(url: str) -> bool:
         return False
 
 
+@metrics.handler('shorten')
 def lambda_handler(event, context):
+    if is_batch_request(event):
+        return batch_handler(event)
+
     try:
         # 요청 body 파싱
         body = json.loads(event.get('body', '{}'))
@@ -60,39 +95,468 @@ def lambda_handler(event, context):
 
         if not is_valid_url(original_url):
             return create_response(400, {'error': 'Invalid URL format'})
+
+        # 링크별 리다이렉트 정책 (상태 코드 / 캐시 max-age / 정확한 클릭 집계 여부)
+        policy, policy_error = parse_policy(body.get('redirect'))
+        if policy_error:
+            return create_response(400, {'error': policy_error})
         
-        # 단축 코드 생성 (UUID 앞 8자리)
-        short_id = str(uuid.uuid4())[:8]
-        
-        # DynamoDB에 저장
+        # ✅ 항상 커스텀 도메인으로 만들기 (환경변수 BASE_URL 사용)
+        base_url = os.environ.get("BASE_URL", "").rstrip("/")
+        if not base_url:
+            return create_response(500, {"error": "BASE_URL is not set"})
+
         item = {
-            'shortId': short_id,
             'originalUrl': original_url,
             'title': title,
             'createdAt': datetime.utcnow().isoformat(),
-            'clickCount': 0
+            'clickCount': 0,
+            'categoryStatus': CATEGORY_PENDING
         }
-        
-        table.put_item(Item=item)
+        if policy:
+            item['redirectPolicy'] = policy
+
+        # dedup 모드: 같은 URL(+ 같은 정책)이 이미 있으면 기존 shortId 반환
+        dedup = dedup_enabled(body)
+        stale_id = None
+        if dedup:
+            item['urlHash'] = url_hash(original_url, policy_key(policy))
+            existing, stale_id = find_existing_short_id(item['urlHash'])
+            metrics.cache_lookup('dedup', bool(existing))
+            if existing:
+                return create_response(200, dedup_response(existing, base_url, policy))
+
+        # 단축 코드 생성 + 저장 (충돌 시 재발급)
+        short_id = put_with_new_short_id(item)
+
+        if dedup:
+            winner = claim_url_hash(item['urlHash'], short_id, stale_id)
+            if winner and winner['shortId'] != short_id:
+                # 동시에 같은 URL이 등록됨 → 방금 만든 항목은 지우고 먼저 등록된 링크 반환
+                table.delete_item(Key={'shortId': short_id})
+                return create_response(200, dedup_response(winner, base_url, policy))
         
         # 응답
-        # ✅ 항상 커스텀 도메인으로 만들기 (환경변수 BASE_URL 사용)
+        short_url = f"{base_url}/{short_id}"
+
+        resp_body = {
+            'shortId': short_id,
+            'shortUrl': short_url,
+            'originalUrl': original_url
+        }
+        if policy:
+            resp_body['redirect'] = policy
+        if dedup:
+            resp_body['deduplicated'] = False
+        return create_response(200, resp_body)
+        
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return create_response(500, {'error': 'Internal server error'})
+
+def put_with_new_short_id(item):
+    """
+    shortId가 이미 있으면 덮어쓰지 않도록 조건부 저장, 충돌 시 새 ID로 재시도
+    return: 저장된 shortId
+    """
+    for _ in range(MAX_ID_ATTEMPTS):
+        short_id = id_generator.next_id()
+        try:
+            table.put_item(
+                Item={**item, 'shortId': short_id},
+                ConditionExpression='attribute_not_exists(shortId)'
+            )
+            return short_id
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+            print(f"shortId collision: {short_id}")
+            metrics.put('shortid.collisions')
+
+    raise RuntimeError('Failed to allocate a unique shortId')
+
+# -------------------------
+# Dedup (url_hashes 테이블)
+# -------------------------
+def dedup_enabled(options):
+    """요청의 dedup 값이 있으면 우선, 없으면 DEDUP_URLS 환경변수"""
+    if hashes_table is None:
+        return False
+    flag = options.get('dedup') if isinstance(options, dict) else None
+    return DEDUP_DEFAULT if flag is None else bool(flag)
+
+def dedup_response(existing, base_url, policy):
+    """
+    기존 링크 재사용 응답: 요청 값이 아니라 저장된 originalUrl / title 반환
+    (정규화 결과만 같은 URL일 수 있고, 요청의 title은 저장되지 않음)
+    """
+    short_id = existing['shortId']
+    resp_body = {
+        'shortId': short_id,
+        'shortUrl': f"{base_url}/{short_id}",
+        'originalUrl': existing.get('originalUrl'),
+        'title': existing.get('title', ''),
+        'deduplicated': True
+    }
+    if policy:
+        resp_body['redirect'] = policy
+    return resp_body
+
+def find_existing_short_id(h):
+    """
+    return: (살아있는 urls 항목(shortId / originalUrl / title) 또는 None, 만료/삭제된 shortId 또는 None)
+    - urls 항목이 TTL 등으로 사라졌으면 매핑을 덮어쓸 수 있도록 stale로 돌려줌
+    - 배치 claim에서 스레드로 호출되므로 client 사용
+    """
+    client = dynamodb.meta.client
+    mapping = client.get_item(TableName=hashes_table.name, Key={'urlHash': h}, ConsistentRead=True).get('Item')
+    if not mapping:
+        return None, None
+
+    short_id = mapping.get('shortId')
+    found = client.get_item(
+        TableName=table.name,
+        Key={'shortId': short_id},
+        ProjectionExpression='shortId, originalUrl, title'
+    ).get('Item')
+    if found:
+        return found, None
+    return None, short_id
+
+def claim_url_hash(h, short_id, stale_id=None):
+    """매핑 조건부 저장. 다른 요청이 먼저 등록했으면 그 urls 항목, 아니면 None"""
+    condition = 'attribute_not_exists(urlHash)'
+    values = None
+    if stale_id:
+        condition += ' OR shortId = :stale'
+        values = {':stale': stale_id}
+
+    kwargs = {
+        'TableName': hashes_table.name,
+        'Item': {'urlHash': h, 'shortId': short_id},
+        'ConditionExpression': condition,
+    }
+    if values:
+        kwargs['ExpressionAttributeValues'] = values
+
+    try:
+        dynamodb.meta.client.put_item(**kwargs)
+        return None
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        existing, _ = find_existing_short_id(h)
+        return existing
+
+def batch_get_keys(tbl, keys, projection):
+    """BatchGetItem (100개 단위 + UnprocessedKeys 재시도)"""
+    items = []
+    for i in range(0, len(keys), 100):
+        request = {tbl.name: {'Keys': keys[i:i + 100], 'ProjectionExpression': projection}}
+        while request:
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(resp.get('Responses', {}).get(tbl.name, []))
+            request = resp.get('UnprocessedKeys') or None
+    return items
+
+def find_existing_short_ids(hashes):
+    """
+    urlHash 목록 → ({urlHash: 살아있는 urls 항목(shortId / originalUrl / title)}, {urlHash: 만료/삭제된 shortId})
+    - find_existing_short_id의 배치 버전
+    """
+    mappings = batch_get_keys(hashes_table, [{'urlHash': h} for h in set(hashes)], 'urlHash, shortId')
+    if not mappings:
+        return {}, {}
+
+    alive = {it['shortId']: it for it in batch_get_keys(
+        table, [{'shortId': sid} for sid in {m['shortId'] for m in mappings}], 'shortId, originalUrl, title'
+    )}
+    existing, stale = {}, {}
+    for m in mappings:
+        if m['shortId'] in alive:
+            existing[m['urlHash']] = alive[m['shortId']]
+        else:
+            stale[m['urlHash']] = m['shortId']
+    return existing, stale
+
+def claim_url_hashes(items, stale):
+    """
+    배치로 만든 항목의 매핑을 claim_url_hash와 같은 조건부 저장으로 병렬 등록
+    - 동시 등록에서 진 항목은 urls에서 지우고 먼저 등록된 항목을 돌려줌
+    - 매핑 저장 자체가 실패하면 링크는 그대로 두고 dedup만 건너뜀
+    return: {진 항목의 shortId: 먼저 등록된 urls 항목}
+    """
+    def claim(item):
+        short_id = item['shortId']
+        try:
+            winner = claim_url_hash(item['urlHash'], short_id, stale.get(item['urlHash']))
+            if winner and winner['shortId'] != short_id:
+                dynamodb.meta.client.delete_item(TableName=table.name, Key={'shortId': short_id})
+                return short_id, winner
+        except Exception as e:
+            print(f"url hash claim error: {short_id}: {str(e)}")
+        return short_id, None
+
+    if not items:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, BATCH_WRITE_WORKERS)) as pool:
+        return {sid: winner for sid, winner in pool.map(claim, items) if winner}
+
+# -------------------------
+# Batch (POST /shorten/batch)
+# -------------------------
+def is_batch_request(event):
+    route = event.get('routeKey') or ''
+    path = event.get('rawPath') or event.get('path') or ''
+    return route.endswith('/shorten/batch') or path.endswith('/shorten/batch')
+
+def request_body(event):
+    """HTTP API는 text/plain이 아닌 body(NDJSON 등)를 base64로 넘기므로 isBase64Encoded면 디코딩"""
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        try:
+            body = base64.b64decode(body, validate=True).decode('utf-8')
+        except (binascii.Error, UnicodeDecodeError):
+            raise ValueError('Invalid base64 body')
+    return body
+
+def parse_batch_body(raw):
+    """
+    지원 형식
+    - {"urls": ["https://...", {"url": "https://...", "title": "..."}]}
+    - JSON 배열 (위 urls와 동일한 원소)
+    - NDJSON: 한 줄에 URL 문자열 또는 {"url", "title"} 객체
+    - 객체 원소의 redirect 값이 옵션의 redirect(배치 전체 기본 정책)보다 우선
+    return: ([{"url", "title", "redirect"}], 옵션 dict)
+    """
+    raw = (raw or '').strip()
+    if not raw:
+        return [], {}
+
+    options = {}
+    try:
+        data = json.loads(raw)
+        if isinstance(data, dict):
+            options = data
+            entries = data.get('urls', [])
+        else:
+            entries = data
+    except json.JSONDecodeError:
+        entries = []
+        for line in raw.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                entries.append(line)
+
+    if not isinstance(entries, list):
+        raise ValueError('urls must be a list')
+
+    default_redirect = options.get('redirect')
+    out = []
+    for e in entries:
+        if isinstance(e, dict):
+            out.append({
+                'url': e.get('url'),
+                'title': e.get('title', ''),
+                'redirect': e.get('redirect', default_redirect),
+            })
+        else:
+            out.append({'url': e, 'title': '', 'redirect': default_redirect})
+    return out, options
+
+def batch_handler(event):
+    try:
         base_url = os.environ.get("BASE_URL", "").rstrip("/")
         if not base_url:
             return create_response(500, {"error": "BASE_URL is not set"})
 
-        short_url = f"{base_url}/{short_id}"
+        try:
+            entries, options = parse_batch_body(request_body(event))
+        except ValueError as e:
+            return create_response(400, {'error': str(e)})
+
+        if not entries:
+            return create_response(400, {'error': 'urls is required'})
+        if len(entries) > MAX_BATCH_URLS:
+            return create_response(400, {'error': f'Too many urls (max {MAX_BATCH_URLS})'})
+        metrics.put('batch.urls', len(entries))
+
+        created_at = datetime.utcnow().isoformat()
+        results = [None] * len(entries)
+        items = []  # (index, item)
+
+        # 1) 일괄 유효성 검사
+        policies = {}  # index -> 리다이렉트 정책 (기본 정책이면 없음)
+        for i, e in enumerate(entries):
+            url = e['url']
+            policy, policy_error = parse_policy(e['redirect'])
+            if not url or not isinstance(url, str):
+                results[i] = {'index': i, 'url': url, 'status': 'error', 'error': 'URL is required'}
+            elif not is_valid_url(url):
+                results[i] = {'index': i, 'url': url, 'status': 'error', 'error': 'Invalid URL format'}
+            elif policy_error:
+                results[i] = {'index': i, 'url': url, 'status': 'error', 'error': policy_error}
+            else:
+                item = {
+                    'originalUrl': url,
+                    'title': e['title'] or '',
+                    'createdAt': created_at,
+                    'clickCount': 0,
+                    'categoryStatus': CATEGORY_PENDING
+                }
+                if policy:
+                    item['redirectPolicy'] = policy
+                    policies[i] = policy
+                items.append((i, item))
+
+        # 2) dedup: 이미 있는 URL(+ 같은 정책)은 기존 shortId, 배치 안의 같은 URL은 한 번만 생성
+        dedup = dedup_enabled(options)
+        aliases = []  # (index, 같은 URL로 먼저 나온 항목의 index)
+        stale = {}
+        if dedup:
+            for i, item in items:
+                item['urlHash'] = url_hash(item['originalUrl'], policy_key(policies.get(i)))
+            existing, stale = find_existing_short_ids([item['urlHash'] for _, item in items])
+
+            first = {}
+            unique_items = []
+            for i, item in items:
+                h = item['urlHash']
+                if h in existing:
+                    results[i] = existing_result(i, item['originalUrl'], existing[h], base_url)
+                elif h in first:
+                    aliases.append((i, first[h]))
+                else:
+                    first[h] = i
+                    unique_items.append((i, item))
+            items = unique_items
+
+        # 3) shortId 발급 + batch_write_item
+        with metrics.timer('assign_short_ids'):
+            assign_short_ids(items)
+        with metrics.timer('batch_write'):
+            failed = write_items_in_batches([item for _, item in items])
+        metrics.put('batch.failed', len(failed))
+
+        lost = {}
+        if dedup:
+            with metrics.timer('claim_hashes'):
+                lost = claim_url_hashes([item for _, item in items if item['shortId'] not in failed], stale)
+
+        for i, item in items:
+            short_id = item['shortId']
+            if short_id in failed:
+                results[i] = {'index': i, 'url': item['originalUrl'], 'status': 'error', 'error': 'Write failed'}
+            elif short_id in lost:
+                results[i] = existing_result(i, item['originalUrl'], lost[short_id], base_url)
+            else:
+                results[i] = {
+                    'index': i,
+                    'url': item['originalUrl'],
+                    'status': 'created',
+                    'shortId': short_id,
+                    'shortUrl': f"{base_url}/{short_id}"
+                }
 
+        # 배치 안에서 중복된 URL은 먼저 나온 항목의 결과를 따름
+        for i, j in aliases:
+            results[i] = {**results[j], 'index': i, 'url': entries[i]['url']}
+            if results[i]['status'] == 'created':
+                results[i]['status'] = 'existing'
+
+        created = sum(1 for r in results if r['status'] == 'created')
+        reused = sum(1 for r in results if r['status'] == 'existing')
         return create_response(200, {
-            'shortId': short_id,
-            'shortUrl': short_url,
-            'originalUrl': original_url
+            'created': created,
+            'existing': reused,
+            'failed': len(results) - created - reused,
+            'results': results
         })
-        
+
     except Exception as e:
         print(f"Error: {str(e)}")
         return create_response(500, {'error': 'Internal server error'})
 
+def existing_result(index, url, existing, base_url):
+    """기존 링크 재사용 결과: dedup_response처럼 저장된 originalUrl / title 반환"""
+    return {
+        'index': index,
+        'url': url,
+        'status': 'existing',
+        'shortId': existing['shortId'],
+        'shortUrl': f"{base_url}/{existing['shortId']}",
+        'originalUrl': existing.get('originalUrl'),
+        'title': existing.get('title', '')
+    }
+
+def assign_short_ids(items):
+    """
+    batch_write_item은 조건부 저장이 안 되므로 발급 단계에서 충돌을 막음
+    - counter 전략: 구조상 중복 없음
+    - random 전략: 배치 내 중복 + 기존 shortId를 BatchGetItem으로 확인 후 재발급
+    """
+    for _, item in items:
+        item['shortId'] = id_generator.next_id()
+
+    if getattr(id_generator, 'unique', False):
+        return
+
+    for _ in range(MAX_ID_ATTEMPTS):
+        seen = set()
+        dup = []
+        for _, item in items:
+            if item['shortId'] in seen:
+                dup.append(item)
+            seen.add(item['shortId'])
+
+        existing = {it['shortId'] for it in batch_get_keys(table, [{'shortId': sid} for sid in seen], 'shortId')}
+
+        dup.extend(item for _, item in items if item['shortId'] in existing)
+        if not dup:
+            return
+        for item in dup:
+            print(f"shortId collision: {item['shortId']}")
+            metrics.put('shortid.collisions')
+            item['shortId'] = id_generator.next_id()
+
+    raise RuntimeError('Failed to allocate unique shortIds')
+
+def write_items_in_batches(items):
+    """
+    25개 단위 batch_write_item을 병렬 실행, UnprocessedItems는 백오프 후 재시도
+    return: 끝내 저장하지 못한 shortId 집합
+    """
+    chunks = [items[i:i + 25] for i in range(0, len(items), 25)]
+    if not chunks:
+        return set()
+
+    with ThreadPoolExecutor(max_workers=max(1, BATCH_WRITE_WORKERS)) as pool:
+        results = pool.map(write_chunk, chunks)
+        return set().union(*results)
+
+def write_chunk(chunk):
+    # 스레드에서 호출되므로 resource 대신 thread-safe한 client 사용 (타입 변환은 resource와 동일)
+    client = dynamodb.meta.client
+    request = {table.name: [{'PutRequest': {'Item': item}} for item in chunk]}
+
+    try:
+        for attempt in range(BATCH_WRITE_MAX_RETRIES + 1):
+            resp = client.batch_write_item(RequestItems=request)
+            request = resp.get('UnprocessedItems') or {}
+            if not request:
+                return set()
+            time.sleep(min(1.0, 0.05 * (2 ** attempt)))
+    except Exception as e:
+        # 청크 하나의 예외(ClientError 외 네트워크 / 검증 오류 포함)는 그 청크 항목만 실패 처리
+        print(f"batch_write_item error: {str(e)}")
+        return {item['shortId'] for item in chunk}
+
+    return {r['PutRequest']['Item']['shortId'] for r in request.get(table.name, [])}
+
 def create_response(status_code, body):
     return {
         'statusCode': status_code,
@@ -0,0 +1,106 @@
+# lambda/shorten/shortid.py
+"""
+shortId 생성기
+- random : base62 랜덤 ID (길이 설정 가능, 기본 8자리 = 62^8 ≈ 2.2e14)
+- counter: counters 테이블에서 블록 단위로 번호를 임대 → 컨테이너가 DynamoDB 왕복 없이 발급
+           번호는 길이 내에서 섞어서(1:1 치환) 순차 ID가 노출되지 않도록 함
+
+SHORT_ID_STRATEGY=random|counter, SHORT_ID_LENGTH, SHORT_ID_BLOCK_SIZE, COUNTERS_TABLE
+"""
+import os
+import secrets
+import threading
+
+# 공통 layer (lambda/common/python)
+import runtime
+
+BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+def encode_base62(n: int, length: int) -> str:
+    """0 <= n < 62**length 인 정수를 고정 길이 base62 문자열로 변환"""
+    chars = []
+    for _ in range(length):
+        n, r = divmod(n, 62)
+        chars.append(BASE62[r])
+    return "".join(reversed(chars))
+
+
+class RandomBase62Generator:
+    # 발급 ID끼리 중복될 수 있음 → 저장 시 충돌 확인 필요
+    unique = False
+
+    def __init__(self, length=8):
+        self.length = length
+        self.space = 62 ** length
+
+    def next_int(self) -> int:
+        return secrets.randbelow(self.space)
+
+    def next_id(self) -> str:
+        return encode_base62(self.next_int(), self.length)
+
+
+class CounterBlockGenerator:
+    """
+    counters 테이블의 카운터를 block_size만큼 ADD 해서 [end - block_size, end) 구간을 임대
+    - 컨테이너가 죽으면 남은 구간은 버려짐 (ID 공간이 충분히 커서 문제 없음)
+    - 섞기: n → (n * multiplier + offset) mod 62^length (multiplier가 62와 서로소라 충돌 없음)
+    """
+
+    unique = True
+
+    def __init__(self, counters_table, length=7, block_size=1000, counter_name="shortId"):
+        self.table = counters_table
+        self.length = length
+        self.space = 62 ** length
+
+        # 황금비 근처 값을 쓰면 연속 번호가 ID 공간 전체로 고르게 흩어짐
+        self.multiplier = int(self.space * 0.6180339887) | 1
+        while self.multiplier % 31 == 0:
+            self.multiplier += 2
+        self.offset = int(self.space * 0.3819660113)
+        self.block_size = block_size
+        self.counter_name = counter_name
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def _lease_block(self):
+        resp = self.table.update_item(
+            Key={"name": self.counter_name},
+            UpdateExpression="ADD #v :n",
+            ExpressionAttributeNames={"#v": "value"},
+            ExpressionAttributeValues={":n": self.block_size},
+            ReturnValues="UPDATED_NEW",
+        )
+        end = int(resp["Attributes"]["value"])
+        if end > self.space:
+            raise RuntimeError("shortId counter space exhausted, increase SHORT_ID_LENGTH")
+        self._next = end - self.block_size
+        self._end = end
+
+    def next_int(self) -> int:
+        with self._lock:
+            if self._next >= self._end:
+                self._lease_block()
+            n = self._next
+            self._next += 1
+        return (n * self.multiplier + self.offset) % self.space
+
+    def next_id(self) -> str:
+        return encode_base62(self.next_int(), self.length)
+
+
+def create_generator_from_env():
+    strategy = os.environ.get("SHORT_ID_STRATEGY", "random")
+
+    if strategy == "counter":
+        table = runtime.table(os.environ.get("COUNTERS_TABLE", "counters"))
+        return CounterBlockGenerator(
+            table,
+            length=int(os.environ.get("SHORT_ID_LENGTH", "7")),
+            block_size=int(os.environ.get("SHORT_ID_BLOCK_SIZE", "1000")),
+        )
+
+    return RandomBase62Generator(length=int(os.environ.get("SHORT_ID_LENGTH", "8")))
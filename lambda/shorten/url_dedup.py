@@ -0,0 +1,43 @@
+# lambda/shorten/url_dedup.py
+"""
+같은 originalUrl 재사용 (dedup 모드)
+- URL 정규화 → sha256 해시 → url_hashes 테이블(urlHash → shortId)
+- 리다이렉트 정책이 기본값이 아니면 정책도 해시에 포함 → 같은 URL + 같은 정책끼리만 재사용
+"""
+import hashlib
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    의미가 같은 URL을 같은 문자열로
+    - scheme/host 소문자, 기본 포트 제거, 빈 path는 "/"
+    - path/query/fragment는 대소문자·순서가 의미를 가질 수 있어 그대로 둠
+      (SPA 라우팅처럼 fragment가 다른 페이지를 가리키는 경우가 있음)
+    - 포트 형식이 잘못되면 ValueError (shorten의 is_valid_url에서 먼저 거름)
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    port = parts.port
+    netloc = host
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{host}:{port}"
+    if parts.username or parts.password:
+        userinfo = parts.username or ""
+        if parts.password:
+            userinfo += f":{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, parts.fragment))
+
+
+def url_hash(url: str, variant: str = "") -> str:
+    """variant: redirect_policy.policy_key (기본 정책이면 빈 문자열 → 기존 해시와 같음)"""
+    key = normalize_url(url)
+    if variant:
+        key += "\n" + variant
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
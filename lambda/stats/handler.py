@@ -1,15 +1,54 @@
 # lambda/stats/handler.py
 import json
-import boto3
 import os
+import time
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import OrderedDict
 from boto3.dynamodb.conditions import Key
 
-dynamodb = boto3.resource('dynamodb')
-urls_table = dynamodb.Table(os.environ.get('URLS_TABLE', 'urls'))
-clicks_table = dynamodb.Table(os.environ.get('CLICKS_TABLE', 'clicks'))
+# 공통 layer (lambda/common/python)
+import metrics
+import runtime
+from click_agg import ClickAggregator, expire_hours, summarize_hours
+from click_counter import read_click_count, shards_table_from_env
+from hll import HyperLogLog, merge_sketches
 
+# resource / client는 첫 DynamoDB 호출 때 생성
+dynamodb = runtime.lazy_resource('dynamodb')
+urls_table = runtime.table(os.environ.get('URLS_TABLE', 'urls'))
+clicks_table = runtime.table(os.environ.get('CLICKS_TABLE', 'clicks'))
+
+# shortId별 통계 스냅샷 저장 위치 (click_rollups 테이블, bucket=STATS#<shortId>)
+ROLLUPS_TABLE = os.environ.get('ROLLUPS_TABLE', '')
+rollups_table = runtime.table(ROLLUPS_TABLE) if ROLLUPS_TABLE else None
+
+# 샤딩된 clickCount (click_counters 테이블, 없으면 urls.clickCount만 사용)
+counter_shards_table = shards_table_from_env()
+
+PERIODS = {
+    '1h': timedelta(hours=1),
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+DEFAULT_PERIOD = '7d'
+# 스냅샷은 가장 긴 기간(30d)만큼 시간 버킷을 보관
+SNAPSHOT_WINDOW = PERIODS['30d']
+# 이 기간 이하는 스냅샷 없이 clicks를 바로 조회 (시간 버킷 단위 오차를 피하기 위해)
+RAW_QUERY_MAX_PERIOD = PERIODS['1h']
+
+# query 1회 최대 1MB → 요청당 읽을 페이지 수 제한
+MAX_CLICK_PAGES = int(os.environ.get('MAX_CLICK_PAGES', '20'))
+# 이 시간 이내 클릭은 스냅샷에 넣지 않고 요청마다 다시 읽음
+# 스냅샷 워터마크보다 이전 시각으로 늦게 저장되는 클릭(click_consumer 재시도, edge 클릭의 CloudFront 로그 전달 지연)은
+# 다시 읽지 않으므로, 늦게 들어오는 최대 시간보다 크게 둠
+SNAPSHOT_LAG_SECONDS = int(os.environ.get('SNAPSHOT_LAG_SECONDS', '7200'))
+
+# 컨테이너 메모리 스냅샷 캐시 (shortId -> (watermark, hours))
+SNAPSHOT_CACHE_SIZE = int(os.environ.get('SNAPSHOT_CACHE_SIZE', '200'))
+_snapshot_cache = OrderedDict()
+
+@metrics.handler('stats')
 def lambda_handler(event, context):
     try:
         short_id = event.get('pathParameters', {}).get('shortId')
@@ -24,23 +63,22 @@ def lambda_handler(event, context):
         if not url_item:
             return create_response(404, {'error': 'URL not found'})
         
-        # 클릭 로그 조회 (최근 7일)
-        seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-        
-        clicks_response = clicks_table.query(
-            KeyConditionExpression=Key('shortId').eq(short_id) & Key('timestamp').gte(seven_days_ago)
-        )
-        clicks = clicks_response.get('Items', [])
-        
+        qs = event.get('queryStringParameters') or {}
+        period = (qs.get('period') or DEFAULT_PERIOD).strip().lower()
+        if period not in PERIODS:
+            return create_response(400, {'error': 'Invalid period', 'allowed': list(PERIODS)})
+
         # 통계 계산
-        stats = calculate_stats(clicks)
+        with metrics.timer('period_stats'):
+            stats, truncated = get_period_stats(short_id, period)
         
         return create_response(200, {
             'shortId': short_id,
             'originalUrl': url_item.get('originalUrl'),
             'title': url_item.get('title', ''),
-            'totalClicks': int(url_item.get('clickCount', 0)),
-            'period': '7d',
+            'totalClicks': read_click_count(url_item, counter_shards_table),
+            'period': period,
+            'truncated': truncated,
             'stats': stats
         })
         
@@ -48,49 +86,148 @@ def lambda_handler(event, context):
         print(f"Error: {str(e)}")
         return create_response(500, {'error': 'Internal server error'})
 
-def calculate_stats(clicks):
-    """클릭 데이터 통계 계산"""
-    clicks_by_hour = defaultdict(int)
-    clicks_by_day = defaultdict(int)
-    clicks_by_referer = defaultdict(int)
-    
-    for click in clicks:
-        timestamp = click.get('timestamp', '')
-        referer = click.get('referer', 'direct')
-        
-        if timestamp:
-            try:
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                hour = dt.hour
-                day = dt.strftime('%Y-%m-%d')
-                
-                clicks_by_hour[hour] += 1
-                clicks_by_day[day] += 1
-            except:
-                pass
-        
-        # 리퍼러 도메인 추출
-        referer_domain = extract_domain(referer)
-        clicks_by_referer[referer_domain] += 1
-    
-    return {
-        'clicksByHour': dict(clicks_by_hour),
-        'clicksByDay': dict(clicks_by_day),
-        'clicksByReferer': dict(clicks_by_referer),
-        'peakHour': max(clicks_by_hour, key=clicks_by_hour.get) if clicks_by_hour else None,
-        'topReferer': max(clicks_by_referer, key=clicks_by_referer.get) if clicks_by_referer else None
-    }
-
-def extract_domain(url):
-    """URL에서 도메인 추출"""
-    if not url or url == 'direct':
-        return 'direct'
+def iter_click_pages(short_id, after, include_start=False, state=None):
+    """
+    shortId의 after 이후 클릭을 timestamp 오름차순 페이지로 조회 (페이지 수 제한)
+    페이지 제한에 걸리면 state['truncated'] = True
+    """
+    cond = Key('timestamp').gte(after) if include_start else Key('timestamp').gt(after)
+    kwargs = {'KeyConditionExpression': Key('shortId').eq(short_id) & cond}
+
+    for _ in range(MAX_CLICK_PAGES):
+        resp = clicks_table.query(**kwargs)
+        metrics.put('clicks.read', resp.get('Count', 0))
+        yield resp.get('Items', [])
+        if 'LastEvaluatedKey' not in resp:
+            return
+        kwargs['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+
+    if state is not None:
+        state['truncated'] = True
+
+def get_period_stats(short_id, period):
+    now = datetime.utcnow()
+    since = now - PERIODS[period]
+    state = {'truncated': False}
+
+    # 짧은 기간은 바로 조회 (고유 방문자도 조회한 클릭으로 바로 계산)
+    if PERIODS[period] <= RAW_QUERY_MAX_PERIOD:
+        agg = ClickAggregator(visitors=HyperLogLog())
+        agg.consume(iter_click_pages(short_id, since.isoformat(), include_start=True, state=state))
+        stats = stats_from_hours(agg.hours)
+        stats['uniqueVisitors'] = agg.visitors.count()
+        return stats, state['truncated']
+
+    watermark, hours = load_snapshot(short_id, now)
+    # 오래 조회되지 않은 스냅샷은 30일 이전 클릭을 다시 읽지 않도록 당김
+    watermark = max(watermark, (now - SNAPSHOT_WINDOW).isoformat())
+
+    # 스냅샷 이후(tail) 클릭만 조회, settle 이전 클릭은 스냅샷에 바로 누적
+    settle = (now - timedelta(seconds=SNAPSHOT_LAG_SECONDS)).isoformat()
+    snapshot = ClickAggregator(hours, until=settle)
+
+    fresh = []
+    advanced = False
+    for page in iter_click_pages(short_id, watermark, state=state):
+        for click in page:
+            if snapshot.add(click):
+                watermark = click['timestamp']
+                advanced = True
+            else:
+                fresh.append(click)
+
+    # 30일을 벗어난 시간 버킷 제거, DynamoDB에는 새로 확정된 클릭이 있을 때만 저장
+    hours = expire_hours(snapshot.hours, hour_key(now - SNAPSHOT_WINDOW))
+    save_snapshot(short_id, watermark, hours, persist=advanced)
+
+    # 기간에 해당하는 시간 버킷 + 아직 스냅샷에 안 들어간 최근 클릭
+    start = hour_key(since)
+    window = {k: {'t': v['t'], 'r': dict(v['r'])} for k, v in hours.items() if k >= start}
+    ClickAggregator(window).consume([fresh])
+
+    stats = stats_from_hours(window)
+    stats['uniqueVisitors'] = unique_visitors(short_id, since, now)
+    return stats, state['truncated']
+
+# -------------------------
+# Snapshot (shortId별 시간 버킷 부분 집계)
+# -------------------------
+# hours: {"YYYY-MM-DDTHH": {"t": 클릭 수, "r": {referer 도메인: 클릭 수}}}
+def hour_key(dt):
+    return dt.strftime('%Y-%m-%dT%H')
+
+def stats_from_hours(hours):
+    """analyze와 같은 형태로 요약 (stats.totalClicks는 기간 내 클릭 수, 응답 최상위 totalClicks는 누적)"""
+    return summarize_hours(hours)
+
+def load_snapshot(short_id, now):
+    """메모리 → DynamoDB 순으로 스냅샷 조회, 없으면 30일 전부터 새로 시작"""
+    cached = _snapshot_cache.get(short_id)
+    metrics.cache_lookup('snapshot_cache', bool(cached))
+    if cached:
+        _snapshot_cache.move_to_end(short_id)
+        watermark, hours = cached
+        return watermark, json.loads(json.dumps(hours))
+
+    if rollups_table is not None:
+        try:
+            item = rollups_table.get_item(Key={'bucket': f'STATS#{short_id}'}).get('Item')
+            if item and item.get('watermark'):
+                return item['watermark'], json.loads(item.get('hours') or '{}')
+        except Exception as e:
+            print(f"Failed to load stats snapshot: {str(e)}")
+
+    return (now - SNAPSHOT_WINDOW).isoformat(), {}
+
+def save_snapshot(short_id, watermark, hours, persist=True):
+    """메모리 캐시는 항상 갱신, persist=False(워터마크가 그대로)면 DynamoDB 쓰기 생략"""
+    _snapshot_cache[short_id] = (watermark, hours)
+    _snapshot_cache.move_to_end(short_id)
+    while len(_snapshot_cache) > SNAPSHOT_CACHE_SIZE:
+        _snapshot_cache.popitem(last=False)
+
+    if rollups_table is None or not persist:
+        return
+
     try:
-        from urllib.parse import urlparse
-        parsed = urlparse(url)
-        return parsed.netloc or 'unknown'
-    except:
-        return 'unknown'
+        rollups_table.put_item(Item={
+            'bucket': f'STATS#{short_id}',
+            'watermark': watermark,
+            'hours': json.dumps(hours, separators=(',', ':')),
+            # 조회가 끊긴 링크의 스냅샷은 TTL로 정리
+            'expiresAt': int(time.time()) + int(SNAPSHOT_WINDOW.total_seconds()) + 86400
+        })
+    except Exception as e:
+        print(f"Failed to save stats snapshot: {str(e)}")
+
+# -------------------------
+# Unique visitors (click_consumer가 쌓는 U#<shortId>#YYYY-MM-DD HyperLogLog)
+# -------------------------
+@metrics.timed('unique_visitors')
+def unique_visitors(short_id, since, now):
+    """
+    기간이 걸치는 일 버킷 sketch를 merge 해서 근사 고유 방문자 수 (rollups 테이블이 없으면 None)
+    - 일 단위 sketch라 첫날은 기간 밖(같은 날 since 이전) 방문자까지 포함될 수 있음
+    """
+    if rollups_table is None:
+        return None
+
+    days = [since.date() + timedelta(days=i) for i in range((now.date() - since.date()).days + 1)]
+    keys = [{'bucket': f'U#{short_id}#{d:%Y-%m-%d}'} for d in days]
+
+    try:
+        rows = []
+        request = {rollups_table.name: {'Keys': keys, 'ProjectionExpression': 'hll'}}
+        while request:
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            rows.extend(resp.get('Responses', {}).get(rollups_table.name, []))
+            request = resp.get('UnprocessedKeys') or None
+    except Exception as e:
+        print(f"Failed to load visitor sketches: {str(e)}")
+        return None
+
+    merged = merge_sketches(row.get('hll') for row in rows)
+    return merged.count() if merged is not None else 0
 
 def create_response(status_code, body):
     return {
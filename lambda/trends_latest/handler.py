@@ -1,20 +1,45 @@
+import base64
 import json
-import boto3
 import os
+import time
+from datetime import datetime, timezone
 from decimal import Decimal
 from boto3.dynamodb.conditions import Key
 
-dynamodb = boto3.resource("dynamodb")
-trends_table = dynamodb.Table(os.environ.get("TRENDS_TABLE"))
+# 공통 layer (lambda/common/python)
+import metrics
+import runtime
+from trend_payload import body_etag, decode_body, encode_body, payload_key
 
-def _resp(status, body):
+# resource는 첫 DynamoDB 호출 때 생성
+trends_table = runtime.table(os.environ.get("TRENDS_TABLE"))
+
+# 조회 가능한 period (analyze의 PERIOD 값, 쉼표 구분)
+# 같은 테이블의 "<period>#checkpoint" / "<period>#payload" 같은 내부 item은 조회 대상이 아님
+DEFAULT_PERIOD = os.environ.get("DEFAULT_PERIOD", "1h")
+ALLOWED_PERIODS = [p.strip() for p in os.environ.get("TRENDS_PERIODS", DEFAULT_PERIOD).split(",") if p.strip()]
+
+# analyze 스케줄 (EventBridge rate(1 hour)) → 다음 결과가 나올 예상 시각 = generatedAt + 주기 + 실행 여유
+ANALYZE_INTERVAL_SECONDS = int(os.environ.get("ANALYZE_INTERVAL_SECONDS", "3600"))
+ANALYZE_RUN_LAG_SECONDS = int(os.environ.get("ANALYZE_RUN_LAG_SECONDS", "120"))
+# 예상 시각이 지났는데 새 결과가 없을 때(지연/실패) 응답 max-age
+OVERDUE_MAX_AGE = int(os.environ.get("TRENDS_OVERDUE_MAX_AGE", "60"))
+# 컨테이너 캐시를 이 시간마다 payload etag만 조회해서 재검증 (수동 analyze 실행 대비)
+CACHE_REVALIDATE_SECONDS = int(os.environ.get("TRENDS_CACHE_REVALIDATE_SECONDS", "60"))
+CACHE_MAX_ENTRIES = 32
+
+# 컨테이너 캐시: (period, view) -> {"version", "body", "gzipBody", "etag", "nextRunAt", "checkedAt"}
+_cache = {}
+
+def _resp(status, body, headers=None):
     return {
         "statusCode": status,
         "headers": {
             "Content-Type": "application/json",
             "Access-Control-Allow-Origin": "*",
+            **(headers or {}),
         },
-        "body": json.dumps(body, ensure_ascii=False),
+        "body": body if isinstance(body, str) else json.dumps(body, ensure_ascii=False),
     }
 
 def _to_jsonable(obj):
@@ -31,59 +56,159 @@ def _to_jsonable(obj):
 
     return obj
 
-def _filter_for_view(trend: dict, view: str) -> dict:
-    """
-    view=user: 사용자용 정보만 반환 (admin 인사이트 제거)
-    view=admin: 전체 반환
-    """
-    if view != "user":
-        return trend
-
-    filtered = dict(trend)  # shallow copy
-
-    insights = filtered.get("insights")
-
-    # 최신 구조: insights가 {"admin":[...], "user":[...]} 형태
-    if isinstance(insights, dict):
-        user_insights = insights.get("user", [])
-        filtered["insights"] = {"user": user_insights}
+# -------------------------
+# Cache / conditional GET
+# -------------------------
+def _latest(period, attrs=None):
+    """PK=period, SK=generatedAt 최신 1건 (attrs가 있으면 해당 속성만)"""
+    kwargs = {
+        "KeyConditionExpression": Key("period").eq(period),
+        "ScanIndexForward": False,   # 최신(내림차순)
+        "Limit": 1,
+    }
+    if attrs:
+        kwargs["ProjectionExpression"] = ", ".join(attrs)
+    items = trends_table.query(**kwargs).get("Items", [])
+    return items[0] if items else None
 
-    # 과거 데이터 호환: insights가 문자열인 경우 그대로 둠(사용자 페이지에서도 보여줄지 판단 필요)
-    # 여기서는 사용자 페이지라면 문자열 insights는 그대로 전달(혹은 제거도 가능)
-    # if isinstance(insights, str):
-    #     filtered.pop("insights", None)
+def _next_run_at(generated_at):
+    """generatedAt(ISO8601, Z) → 다음 analyze 결과 예상 시각 (epoch seconds), 파싱 실패 시 0"""
+    try:
+        dt = datetime.fromisoformat(str(generated_at).replace("Z", "+00:00"))
+    except Exception:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp() + ANALYZE_INTERVAL_SECONDS + ANALYZE_RUN_LAG_SECONDS
+
+def _entry_from_payload(item, now):
+    """analyze가 미리 직렬화한 payload item → 캐시 항목 (gzip이면 base64만 해 두고 그대로 응답)"""
+    raw = item.get("body")
+    raw = getattr(raw, "value", raw)
+    return {
+        "version": item.get("etag"),
+        "body": decode_body(item),
+        "gzipBody": base64.b64encode(bytes(raw)).decode("ascii") if item.get("encoding") == "gzip" else None,
+        "etag": item.get("etag"),
+        "nextRunAt": _next_run_at(item.get("trendGeneratedAt")),
+        "checkedAt": now,
+    }
 
-    # 혹시 admin 전용 필드가 생기면 여기서 제거하면 됨
-    # filtered.pop("someAdminOnlyField", None)
+def _entry_from_trend(item, period, view, now):
+    """payload가 없는 과거 데이터: trend item을 직접 변환/필터/직렬화"""
+    trend = _to_jsonable(item)
+    if not isinstance(trend, dict):
+        raise ValueError("Invalid trend item")
 
-    return filtered
+    body = encode_body(trend, period, view)
+    return {
+        "version": item.get("generatedAt"),
+        "body": body,
+        "gzipBody": None,
+        "etag": body_etag(body),
+        "nextRunAt": _next_run_at(item.get("generatedAt")),
+        "checkedAt": now,
+    }
 
+def _is_current(payload, latest):
+    """payload가 최신 trend item으로 만든 것인지 (payload 저장만 실패한 실행 뒤의 이전 payload 제외)"""
+    return bool(payload and latest and payload.get("trendGeneratedAt") == latest.get("generatedAt"))
+
+def _current_version(period, view):
+    """최신 trend로 만든 payload면 etag, 아니면 최신 trend generatedAt → 캐시 항목 version과 비교"""
+    latest = _latest(period, attrs=["generatedAt"])
+    if latest is None:
+        return None
+    item = trends_table.get_item(
+        Key=payload_key(period, view), ProjectionExpression="etag, trendGeneratedAt"
+    ).get("Item")
+    if _is_current(item, latest):
+        return item.get("etag")
+    return latest.get("generatedAt")
+
+def _get_entry(period, view, now):
+    """
+    컨테이너 캐시 조회
+    - 재검증 주기 안이면 DynamoDB 호출 없음
+    - 지나면 최신 generatedAt + payload etag만 조회해서 같으면 그대로 사용
+    - 새로 읽을 때는 payload GetItem, payload가 없거나 최신 trend와 다르면 최신 trend query 후 직렬화
+    """
+    key = (period, view)
+    entry = _cache.get(key)
+
+    if entry is not None:
+        if now - entry["checkedAt"] < CACHE_REVALIDATE_SECONDS and now < entry["nextRunAt"]:
+            metrics.cache_lookup("trend_cache", True)
+            return entry
+        if _current_version(period, view) == entry["version"]:
+            entry["checkedAt"] = now
+            metrics.cache_lookup("trend_cache", True)
+            return entry
+
+    metrics.cache_lookup("trend_cache", False)
+    payload = trends_table.get_item(Key=payload_key(period, view)).get("Item")
+    if payload and _is_current(payload, _latest(period, attrs=["generatedAt"])):
+        entry = _entry_from_payload(payload, now)
+    else:
+        item = _latest(period)
+        if item is None:
+            _cache.pop(key, None)
+            return None
+        entry = _entry_from_trend(item, period, view, now)
+
+    if key not in _cache and len(_cache) >= CACHE_MAX_ENTRIES:
+        _cache.pop(next(iter(_cache)))
+    _cache[key] = entry
+    return entry
+
+def _cache_headers(entry, now):
+    """다음 analyze 결과 예상 시각까지 CloudFront/브라우저 캐시"""
+    max_age = int(entry["nextRunAt"] - now)
+    if max_age <= 0:
+        max_age = OVERDUE_MAX_AGE
+    max_age = min(max_age, ANALYZE_INTERVAL_SECONDS + ANALYZE_RUN_LAG_SECONDS)
+    return {"ETag": entry["etag"], "Cache-Control": f"public, max-age={max_age}"}
+
+def _header(event, name):
+    for k, v in (event.get("headers") or {}).items():
+        if k.lower() == name and v:
+            return v
+    return ""
+
+def _if_none_match(event):
+    v = _header(event, "if-none-match")
+    return [t.strip().removeprefix("W/") for t in v.split(",")] if v else []
+
+@metrics.handler("trends_latest")
 def lambda_handler(event, context):
     try:
         qs = event.get("queryStringParameters") or {}
-        period = qs.get("period") or os.environ.get("DEFAULT_PERIOD", "1h")
+        period = (qs.get("period") or DEFAULT_PERIOD).strip()
+        if period not in ALLOWED_PERIODS:
+            # 잘못된 period로 컨테이너 캐시 자리를 차지하지 않도록 조회 전에 거절
+            return _resp(400, {"error": "Invalid period", "allowed": ALLOWED_PERIODS})
         view = (qs.get("view") or qs.get("audience") or "admin").strip().lower()
         if view not in ("admin", "user"):
             view = "admin"
 
-        # PK=period, SK=generatedAt 최신 1건
-        res = trends_table.query(
-            KeyConditionExpression=Key("period").eq(period),
-            ScanIndexForward=False,   # 최신(내림차순)
-            Limit=1
-        )
-
-        items = res.get("Items", [])
-        if not items:
+        now = time.time()
+        entry = _get_entry(period, view, now)
+        if entry is None:
             return _resp(404, {"error": "No trend data", "period": period})
 
-        trend = _to_jsonable(items[0])
-        if not isinstance(trend, dict):
-            return _resp(500, {"error": "Invalid trend item"})
+        headers = _cache_headers(entry, now)
+        tags = _if_none_match(event)
+        if entry["etag"] in tags or "*" in tags:
+            metrics.put("not_modified")
+            return {"statusCode": 304, "headers": {"Access-Control-Allow-Origin": "*", **headers}, "body": ""}
 
-        trend = _filter_for_view(trend, view)
+        # 미리 압축된 payload는 클라이언트가 gzip을 받으면 그대로 전달
+        if entry["gzipBody"] and "gzip" in _header(event, "accept-encoding").lower():
+            resp = _resp(200, entry["gzipBody"], {**headers, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+            resp["isBase64Encoded"] = True
+            return resp
 
-        return _resp(200, {"period": period, "view": view, "trend": trend})
+        return _resp(200, entry["body"], {**headers, "Vary": "Accept-Encoding"})
 
     except Exception as e:
         return _resp(500, {"error": str(e)})
@@ -0,0 +1,60 @@
+# tests/conftest.py
+"""
+단위 테스트 공용 설정 (pytest + moto)
+- import 경로는 Lambda와 같게: 공통 layer(lambda/common/python) + 함수 디렉터리
+- DynamoDB는 moto, 테이블 구성은 bench/local_dynamodb.py (Terraform과 같은 키 / GSI)
+
+    pip install boto3 moto pytest
+    python -m pytest tests
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+for path in ("lambda/common/python", "lambda/categorize", "lambda/shorten", "bench"):
+    sys.path.insert(0, os.path.join(ROOT, path))
+
+# 실제 AWS로 나가지 않도록 boto3 import 전에 가짜 인증 정보
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+import runtime  # noqa: E402
+from local_dynamodb import create_tables, table_env  # noqa: E402
+
+
+def _reset_runtime():
+    # runtime은 client / resource를 프로세스 전역으로 캐시 → 테스트마다 새 mock에서 다시 생성
+    runtime._clients.clear()
+    runtime._resources.clear()
+
+
+@pytest.fixture
+def dynamodb(monkeypatch):
+    """moto DynamoDB resource (테이블 생성 + Lambda 테이블 환경변수 설정)"""
+    for env, name in table_env().items():
+        monkeypatch.setenv(env, name)
+    with mock_aws():
+        _reset_runtime()
+        resource = boto3.resource("dynamodb")
+        create_tables(resource)
+        yield resource
+    _reset_runtime()
+
+
+@pytest.fixture
+def load_lambda(dynamodb):
+    """lambda/<name>/handler.py → <name>_handler 모듈 (환경변수 설정 후 호출)"""
+    def load(name):
+        path = os.path.join(ROOT, "lambda", name, "handler.py")
+        spec = importlib.util.spec_from_file_location(f"{name}_handler", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    return load
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from classify_cache import ClassificationCache, patterns_for
+
+HOST = "news.example"
+
+
+@pytest.fixture
+def table(dynamodb):
+    return dynamodb.Table("category_cache")
+
+
+@pytest.fixture
+def cache(table):
+    return ClassificationCache(table, promote_samples=10, verify_rate=0)
+
+
+def _record(cache, n, category="news"):
+    promoted = {}
+    for _ in range(n):
+        promoted.update(cache.record(HOST, "/a", category, 0.9))
+    return promoted
+
+
+def test_patterns_for():
+    assert patterns_for(HOST, "/a/b") == [f"{HOST}/a", HOST]
+    assert patterns_for(HOST, "/") == [HOST]
+    assert patterns_for("", "/a") == []
+
+
+def test_lookup_needs_min_samples(cache):
+    _record(cache, 2)
+    assert cache.lookup(HOST, "/a") is None
+
+    _record(cache, 1)
+    category, conf, reason = cache.lookup(HOST, "/a")
+    assert (category, conf) == ("news", 0.9)
+    assert reason.startswith(f"cache:{HOST}/a")
+
+
+def test_promotes_on_llm_samples_only(cache):
+    assert _record(cache, 9) == {}
+
+    # 캐시 판정 재사용(hits)은 승격 표본이 아님
+    for _ in range(20):
+        cache.lookup(HOST, "/a")
+    cache.flush_hits()
+    assert cache.load_learned_rules() == {}
+
+    promoted = _record(cache, 1)
+    assert promoted == {HOST: ("news", 0.9, f"learned:{HOST}")}
+    assert cache.load_learned_rules() == promoted
+
+
+def test_demotes_on_disagreement_and_needs_new_samples(cache):
+    _record(cache, 10)
+    assert HOST in cache.load_learned_rules()
+
+    # 10 / 11 = 91% < 95% → 강등, baseTotal = 11
+    cache.record(HOST, "/a", "blog", 0.9)
+    assert cache.load_learned_rules() == {}
+    assert HOST in cache.demoted
+
+    assert _record(cache, 9) == {}
+    assert HOST in _record(cache, 1)
+
+
+def test_expired_rule_is_demoted(table):
+    cache = ClassificationCache(table, promote_samples=10, verify_rate=0, learned_ttl_seconds=60)
+    _record(cache, 10)
+    table.update_item(
+        Key={"pattern": HOST},
+        UpdateExpression="SET learnedAt = :at",
+        ExpressionAttributeValues={":at": int(time.time()) - 120},
+    )
+
+    assert cache.load_learned_rules() == {}
+    assert "learned" not in table.get_item(Key={"pattern": HOST})["Item"]
+
+
+def test_verify_rate_sends_hits_to_llm(table):
+    cache = ClassificationCache(table, verify_rate=1.0)
+    _record(cache, 5)
+
+    assert cache.lookup(HOST, "/a") is None
+    assert cache.verifications == 1
+    assert cache.should_verify()
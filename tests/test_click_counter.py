@@ -0,0 +1,88 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from click_counter import ShardedClickCounter, read_click_count
+
+SHORT_ID = "abc123"
+
+
+@pytest.fixture
+def tables(dynamodb):
+    urls = dynamodb.Table("urls")
+    urls.put_item(Item={"shortId": SHORT_ID, "originalUrl": "https://example.com"})
+    return urls, dynamodb.Table("click_counters")
+
+
+def _item(urls):
+    return urls.get_item(Key={"shortId": SHORT_ID})["Item"]
+
+
+def _total(tables):
+    urls, shards = tables
+    return read_click_count(_item(urls), shards)
+
+
+def test_increment_without_shards_table(tables):
+    urls, _ = tables
+    counter = ShardedClickCounter(urls)
+    for _ in range(3):
+        counter.increment(SHORT_ID)
+
+    assert _item(urls)["clickCount"] == 3
+    assert read_click_count(_item(urls)) == 3
+
+
+def test_hot_link_is_promoted(tables):
+    urls, shards = tables
+    counter = ShardedClickCounter(urls, shards, shard_count=4, hot_writes_per_sec=0.1, window_seconds=10)
+    for _ in range(5):
+        counter.increment(SHORT_ID)
+
+    item = _item(urls)
+    assert item["counterShards"] == 4
+    assert item["clickCount"] == 1
+    assert _total(tables) == 5
+
+
+def test_promotion_race_between_containers(tables):
+    urls, shards = tables
+    first = ShardedClickCounter(urls, shards, shard_count=4)
+    second = ShardedClickCounter(urls, shards, shard_count=8)
+
+    first.increment(SHORT_ID)
+    assert first.promote(SHORT_ID) == 4
+
+    # second는 승격을 모르는 상태 → 조건부 update 실패 → counterShards를 읽어서 샤드에 씀
+    second.increment(SHORT_ID, 2)
+    assert second._shards[SHORT_ID] == 4
+    # 늦게 승격을 시도해도 먼저 기록된 샤드 수를 따름
+    assert second.promote(SHORT_ID) == 4
+
+    assert _item(urls)["clickCount"] == 1
+    assert _total(tables) == 3
+
+
+def test_throttled_increment_promotes(tables, monkeypatch):
+    urls, shards = tables
+    counter = ShardedClickCounter(urls, shards, shard_count=4)
+
+    def throttled(*args, **kwargs):
+        raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "UpdateItem")
+
+    monkeypatch.setattr(counter, "_increment_item", throttled)
+    counter.increment(SHORT_ID)
+
+    assert _item(urls)["counterShards"] == 4
+    assert _total(tables) == 1
+
+
+def test_other_errors_are_raised(tables, monkeypatch):
+    urls, shards = tables
+    counter = ShardedClickCounter(urls, shards)
+
+    def broken(*args, **kwargs):
+        raise ClientError({"Error": {"Code": "ValidationException", "Message": "bad"}}, "UpdateItem")
+
+    monkeypatch.setattr(counter, "_increment_item", broken)
+    with pytest.raises(ClientError):
+        counter.increment(SHORT_ID)
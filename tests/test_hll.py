@@ -0,0 +1,67 @@
+import pytest
+
+from hll import HyperLogLog, merge_sketches
+
+
+def _sketch(values, p=12):
+    sketch = HyperLogLog(p)
+    for v in values:
+        sketch.add(v)
+    return sketch
+
+
+def test_sparse_round_trip():
+    sketch = _sketch(f"visitor-{i}" for i in range(50))
+    raw = sketch.to_bytes()
+
+    assert raw[:2] == bytes([12, 1])  # p, sparse
+    assert len(raw) <= 2 + 3 * 50
+    assert HyperLogLog.from_bytes(raw).registers == sketch.registers
+
+
+def test_dense_round_trip():
+    sketch = _sketch(range(20000))
+    raw = sketch.to_bytes()
+
+    assert raw[:2] == bytes([12, 0])  # p, dense
+    assert len(raw) == 2 + sketch.m
+    restored = HyperLogLog.from_bytes(raw)
+    assert restored.registers == sketch.registers
+    assert restored.count() == sketch.count()
+
+
+def test_empty_bytes_is_empty_sketch():
+    assert HyperLogLog.from_bytes(b"").is_empty()
+    assert HyperLogLog.from_bytes(None).count() == 0
+
+
+def test_merge_counts_overlap_once():
+    a = _sketch(range(0, 6000))
+    b = _sketch(range(3000, 9000))
+    union = _sketch(range(9000))
+
+    merged = HyperLogLog.from_bytes(a.to_bytes()).merge(HyperLogLog.from_bytes(b.to_bytes()))
+
+    assert merged.registers == union.registers
+    assert abs(merged.count() - 9000) / 9000 < 0.05
+
+
+def test_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(10))
+
+
+def test_merge_sketches_skips_empty_and_mismatched():
+    a = _sketch(["x", "y"])
+    other = _sketch(["z"], p=10)
+
+    merged = merge_sketches([None, a.to_bytes(), b"", other.to_bytes()])
+
+    assert merged.registers == a.registers
+    assert merge_sketches([]) is None
+
+
+def test_hash_ip_value_used_as_hash():
+    # redirect의 hash_ip 값(hex 16자리)은 다시 해시하지 않고 그대로 64bit 값으로 사용
+    sketch = _sketch(["8000000000000000"])
+    assert sketch.registers[1 << 11] == 64 - 12 + 1
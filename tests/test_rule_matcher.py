@@ -0,0 +1,38 @@
+from rule_matcher import RuleMatcher
+
+NEWS = ("news", 0.9, "domain=example.com")
+LEARNED = ("blog", 0.8, "learned:blog.example.com")
+
+
+def test_domain_rule_matches_subdomains():
+    matcher = RuleMatcher({"example.com": NEWS}, [])
+
+    assert matcher.match_domain("example.com") == NEWS
+    assert matcher.match_domain("a.b.example.com") == NEWS
+    assert matcher.match_domain("notexample.com") is None
+
+
+def test_host_rule_matches_exact_host_only():
+    matcher = RuleMatcher({}, [])
+    matcher.add_host_rules({"blog.example.com": LEARNED})
+
+    assert matcher.match_domain("blog.example.com") == LEARNED
+    assert matcher.match_domain("x.blog.example.com") is None
+
+    matcher.remove_host_rules(["blog.example.com"])
+    assert matcher.match_domain("blog.example.com") is None
+
+
+def test_domain_rule_for_same_host_wins_over_host_rule():
+    matcher = RuleMatcher({"blog.example.com": NEWS}, [])
+    matcher.add_host_rules({"blog.example.com": LEARNED})
+
+    assert matcher.match_domain("blog.example.com") == NEWS
+
+
+def test_path_rules_in_order():
+    matcher = RuleMatcher({}, [(["/wiki/"], "docs", 0.7, "wiki"), (["/w"], "other", 0.5, "w")])
+
+    assert matcher.classify("x.com", "/wiki/page") == ("docs", 0.7, "wiki")
+    assert matcher.classify("x.com", "/west") == ("other", 0.5, "w")
+    assert matcher.classify("x.com", "/") is None
@@ -0,0 +1,80 @@
+import pytest
+
+from shortid import CounterBlockGenerator, RandomBase62Generator, encode_base62
+
+
+class _FixedIds:
+    """정해진 순서로 shortId를 내주는 생성기 (충돌 재시도 확인용)"""
+
+    unique = False
+
+    def __init__(self, ids):
+        self.ids = iter(ids)
+
+    def next_id(self):
+        return next(self.ids)
+
+
+@pytest.fixture
+def shorten(load_lambda, monkeypatch):
+    monkeypatch.setenv("BASE_URL", "https://s.example")
+    return load_lambda("shorten")
+
+
+def test_encode_base62_fixed_length():
+    assert encode_base62(0, 4) == "0000"
+    assert encode_base62(61, 2) == "0z"
+    assert encode_base62(62 ** 3 - 1, 3) == "zzz"
+
+
+def test_random_generator_length():
+    gen = RandomBase62Generator(length=8)
+    assert all(len(gen.next_id()) == 8 for _ in range(100))
+
+
+def test_counter_blocks_unique_across_containers(dynamodb):
+    table = dynamodb.Table("counters")
+    first = CounterBlockGenerator(table, length=4, block_size=50)
+    second = CounterBlockGenerator(table, length=4, block_size=50)
+
+    ids = [first.next_id() for _ in range(120)] + [second.next_id() for _ in range(120)]
+
+    assert len(set(ids)) == len(ids)
+    assert all(len(i) == 4 for i in ids)
+
+
+def test_counter_space_exhausted(dynamodb):
+    gen = CounterBlockGenerator(dynamodb.Table("counters"), length=1, block_size=100)
+    with pytest.raises(RuntimeError):
+        gen.next_id()
+
+
+def test_put_retries_on_collision(shorten, dynamodb, monkeypatch):
+    urls = dynamodb.Table("urls")
+    urls.put_item(Item={"shortId": "taken", "originalUrl": "https://old.example"})
+    monkeypatch.setattr(shorten, "id_generator", _FixedIds(["taken", "fresh"]))
+
+    assert shorten.put_with_new_short_id({"originalUrl": "https://new.example"}) == "fresh"
+    assert urls.get_item(Key={"shortId": "taken"})["Item"]["originalUrl"] == "https://old.example"
+    assert urls.get_item(Key={"shortId": "fresh"})["Item"]["originalUrl"] == "https://new.example"
+
+
+def test_put_gives_up_after_max_attempts(shorten, dynamodb, monkeypatch):
+    dynamodb.Table("urls").put_item(Item={"shortId": "taken", "originalUrl": "https://old.example"})
+    monkeypatch.setattr(shorten, "id_generator", _FixedIds(["taken"] * 2))
+    monkeypatch.setattr(shorten, "MAX_ID_ATTEMPTS", 2)
+
+    with pytest.raises(RuntimeError):
+        shorten.put_with_new_short_id({"originalUrl": "https://new.example"})
+
+
+def test_batch_ids_reissued_for_duplicates_and_existing(shorten, dynamodb, monkeypatch):
+    dynamodb.Table("urls").put_item(Item={"shortId": "taken", "originalUrl": "https://old.example"})
+    monkeypatch.setattr(shorten, "id_generator", _FixedIds(["taken", "dup", "dup", "x1", "x2"]))
+    items = [(i, {"originalUrl": f"https://e{i}.example"}) for i in range(3)]
+
+    shorten.assign_short_ids(items)
+
+    ids = [item["shortId"] for _, item in items]
+    assert len(set(ids)) == 3
+    assert "taken" not in ids
@@ -0,0 +1,74 @@
+import random
+from collections import Counter
+
+from topk import SpaceSaving, exact_top_k, merge_summaries, summary_buckets
+
+
+def _stream(n, keys, seed):
+    """Zipf 비슷한 분포 (소수 링크에 클릭이 몰림)"""
+    rng = random.Random(seed)
+    population = [f"s{i}" for i in range(keys)]
+    return rng.choices(population, weights=[1 / (i + 1) for i in range(keys)], k=n)
+
+
+def _summarize(stream, capacity):
+    summary = SpaceSaving(capacity)
+    for key in stream:
+        summary.offer(key)
+    return summary
+
+
+def _assert_bounds(summary, truth):
+    # 남은 키: count - error <= 실제 값 <= count
+    for key, (count, error) in summary.entries.items():
+        assert count - error <= truth[key] <= count
+    # 빠진 키: 실제 값 <= min_count
+    floor = summary.min_count()
+    for key, n in truth.items():
+        if key not in summary.entries:
+            assert n <= floor
+
+
+def test_space_saving_error_bounds():
+    stream = _stream(20000, 2000, seed=1)
+    truth = Counter(stream)
+    summary = _summarize(stream, 50)
+
+    _assert_bounds(summary, truth)
+    # 전체 / capacity 보다 많이 나온 키는 반드시 남음
+    for key, n in truth.items():
+        if n > len(stream) / summary.capacity:
+            assert key in summary.entries
+
+
+def test_not_full_summary_is_exact():
+    stream = _stream(500, 20, seed=2)
+    summary = _summarize(stream, 50)
+
+    assert summary.min_count() == 0
+    assert {k: c for k, (c, e) in summary.entries.items()} == Counter(stream)
+
+
+def test_merged_daily_summaries_keep_bounds():
+    days = [_stream(5000, 1000, seed=day) for day in range(7)]
+    truth = Counter(key for day in days for key in day)
+
+    merged = merge_summaries(_summarize(day, 100).to_json() for day in days)
+
+    _assert_bounds(merged, truth)
+    assert len(merged.entries) == 100
+    assert [k for k, _, _ in merged.top(5)] == [k for k, _ in exact_top_k(truth, 5)]
+
+
+def test_json_round_trip():
+    summary = _summarize(_stream(1000, 300, seed=3), 20)
+    restored = SpaceSaving.from_json(summary.to_json())
+
+    assert restored.capacity == 20
+    assert restored.entries == summary.entries
+
+
+def test_summary_buckets_and_empty_merge():
+    assert summary_buckets("2026-01-01") == ["TOPK#2026-01-01"]
+    assert summary_buckets("2026-01-01", 3) == ["TOPK#2026-01-01", "TOPK#2026-01-01#1", "TOPK#2026-01-01#2"]
+    assert merge_summaries([None, ""]) is None